@@ -0,0 +1,96 @@
+"""Benchmark of the extraction paths from Postgres to Parquet.
+
+Run from etl-aws-sql-s3, against the database set in Configuration:
+    python -m benchmarks.arrow_extraction_benchmark [query] [repeats]
+
+Times a query written to an in-memory Parquet file through
+  read_sql      psycopg2 tuples -> pandas DataFrame -> Arrow table
+  streaming     psycopg2 tuples -> Arrow record batches (StreamingExtractor)
+  adbc / connectorx
+                Arrow record batches straight from the driver (ArrowExtractor),
+                for every driver installed
+and checks they all give the same number of rows. Nothing is written to S3.
+"""
+import importlib
+import io
+import sys
+import time
+import pyarrow
+import pyarrow.parquet as pq
+from configuration import Configuration
+from extraction import ArrowExtractor
+from extraction.arrowextractor import DRIVERS, DRIVER_MODULES
+
+QUERY = "SELECT * FROM generic.parking_area"
+
+
+def write_batches(batches, options):
+    buffer = io.BytesIO()
+    writer, rows = None, 0
+
+    for batch in batches:
+        if writer is None:
+            writer = pq.ParquetWriter(buffer, batch.schema, **options.writer_kwargs())
+        writer.write_batch(batch)
+        rows += batch.num_rows
+
+    writer.close()
+    return rows, buffer.getvalue()
+
+
+def main(query, repeats):
+    configuration = Configuration()
+    options = configuration.parquet_options
+
+    paths = {
+        "read_sql": lambda: [
+            batch
+            for batch in pyarrow.Table.from_pandas(
+                configuration.read_sql(query), preserve_index=False
+            ).to_batches()
+        ],
+        "streaming": lambda: configuration.extractor.iter_batches(query),
+    }
+
+    for driver in DRIVERS:
+        try:
+            importlib.import_module(DRIVER_MODULES[driver])
+        except ImportError:
+            continue
+
+        extractor = ArrowExtractor(
+            configuration.resources.connection_uri(),
+            configuration.resources.connection_slot,
+            configuration.extractor,
+            configuration.EXTRACT_BATCH_SIZE,
+            driver,
+        )
+        paths[driver] = lambda extractor=extractor: extractor.iter_batches(query)
+
+    print(f"{'path':>10} {'rows':>10} {'best s':>8} {'mean s':>8} {'rows/s':>10}")
+
+    tables = {}
+    for name, batches in paths.items():
+        timings = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            rows, data = write_batches(batches(), options)
+            timings.append(time.perf_counter() - started)
+
+        tables[name] = pq.read_table(pyarrow.BufferReader(data))
+        print(
+            f"{name:>10} {rows:>10} {min(timings):>8.3f}"
+            f" {sum(timings) / len(timings):>8.3f} {rows / min(timings):>10.0f}"
+        )
+
+    for name, table in tables.items():
+        assert len(table) == len(tables["read_sql"]), f"{name} row count differs"
+
+    configuration.resources.close()
+
+
+if __name__ == "__main__":
+    main(
+        sys.argv[1] if len(sys.argv) > 1 else QUERY,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 3,
+    )
@@ -0,0 +1,56 @@
+"""Benchmark of the query modes of the customers full load.
+
+Run from etl-aws-sql-s3, against the database set in Configuration:
+    python -m benchmarks.customers_query_benchmark [repeats]
+
+Times the read of users and deleted users in "union" mode (one UNION ALL
+query, the flag is set by Postgres) and in "split" mode (one query per table,
+the flag is set in pandas), and checks both return the same rows. Nothing is
+written to S3.
+"""
+import sys
+import time
+import pandas as pd
+from customer.customersingestion import CustomersIngestion
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - started, result
+
+
+def sorted_frame(df):
+    return df.sort_values(["user_id", "deleted_user"]).reset_index(drop=True)
+
+
+def main(repeats):
+    ci = CustomersIngestion()
+    frames = {}
+
+    print(f"{'mode':>6} {'rows':>10} {'best s':>8} {'mean s':>8} {'MiB':>8}")
+
+    for mode in CustomersIngestion.QUERY_MODES:
+        timings = []
+        for _ in range(repeats):
+            seconds, frames[mode] = timed(ci._read_customers, mode)
+            timings.append(seconds)
+
+        df = frames[mode]
+        print(
+            f"{mode:>6} {len(df):>10} {min(timings):>8.3f}"
+            f" {sum(timings) / len(timings):>8.3f}"
+            f" {df.memory_usage(deep=True).sum() / 1024**2:>8.1f}"
+        )
+
+    pd.testing.assert_frame_equal(
+        sorted_frame(frames["union"]),
+        sorted_frame(frames["split"]),
+        check_dtype=False,
+    )
+
+    ci.resources.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 3)
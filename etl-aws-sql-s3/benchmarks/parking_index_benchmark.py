@@ -0,0 +1,81 @@
+"""Benchmark of the nearest-parking-area lookup of the trip end points.
+
+Run from etl-aws-sql-s3:
+    python -m benchmarks.parking_index_benchmark [parking areas] [end points]
+
+Indexes synthetic parking areas around Barcelona in a GridIndex for several
+cell sizes and prints the build time and the lookup throughput of synthetic
+trip end points, next to a brute-force haversine search vectorized by
+chunks of end points (only timed on a sample, it compares every end point
+with every parking area). Checks the grid finds the same distances as the
+brute force on that sample.
+"""
+import sys
+import time
+import numpy as np
+from geo import GridIndex, TripGeometry
+
+CELL_METERS = [100, 250, 500, 1000]
+
+BRUTE_FORCE_SAMPLE = 10_000
+
+# Ties broken differently by the projection of the grid
+TOLERANCE_METERS = 0.1
+
+
+def make_points(rows, rng):
+    return 41.32 + rng.random(rows) * 0.14, 2.07 + rng.random(rows) * 0.16
+
+
+def brute_force(parking_lat, parking_lng, lat, lng, chunk=200):
+    # Haversine distance of every end point of a chunk to every parking area
+    geometry = TripGeometry()
+    distances = np.empty(len(lat))
+
+    for start in range(0, len(lat), chunk):
+        end = start + chunk
+        distances[start:end] = geometry.haversine(
+            lat[start:end, None], lng[start:end, None], parking_lat, parking_lng
+        ).min(axis=1)
+
+    return distances
+
+
+def main(parking_areas, end_points):
+    rng = np.random.default_rng(0)
+    parking_lat, parking_lng = make_points(parking_areas, rng)
+    lat, lng = make_points(end_points, rng)
+
+    sample = slice(0, BRUTE_FORCE_SAMPLE)
+
+    started = time.perf_counter()
+    expected = brute_force(parking_lat, parking_lng, lat[sample], lng[sample])
+    brute_force_rate = len(expected) / (time.perf_counter() - started)
+
+    print(f"{parking_areas} parking areas, {end_points} end points")
+    print(f"{'index':>12} {'build s':>8} {'points/s':>12} {'max diff m':>11}")
+    print(f"{'brute force':>12} {'-':>8} {brute_force_rate:>12.0f} {'-':>11}")
+
+    for cell_meters in CELL_METERS:
+        started = time.perf_counter()
+        index = GridIndex(parking_lat, parking_lng, cell_meters=cell_meters)
+        build_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        nearest = index.nearest(lat, lng)
+        lookup_seconds = time.perf_counter() - started
+
+        diff = np.abs(nearest["distance_meters"].to_numpy()[sample] - expected)
+        assert diff.max() < TOLERANCE_METERS, f"cell {cell_meters} m differs"
+
+        print(
+            f"{f'grid {cell_meters} m':>12} {build_seconds:>8.3f}"
+            f" {end_points / lookup_seconds:>12.0f} {diff.max():>11.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 5_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000,
+    )
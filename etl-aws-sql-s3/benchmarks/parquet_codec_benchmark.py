@@ -0,0 +1,78 @@
+"""Benchmark of the Parquet codecs DatasetWriter can be configured with.
+
+Run from etl-aws-sql-s3:
+    python -m benchmarks.parquet_codec_benchmark [rows]
+
+For every dataset with a schema (synthetic rows, see schema_benchmark) and
+every codec and level, prints the encode and decode throughput, in MiB of
+Arrow data per second, and the size of the file.
+"""
+import io
+import sys
+import time
+import pyarrow
+import pyarrow.parquet as pq
+from benchmarks.schema_benchmark import make_dataset
+from schema import SchemaRegistry
+from schema.schemaregistry import DATASET_SCHEMAS
+from storage import ParquetOptions
+
+CODECS = [
+    ("gzip", None),
+    ("snappy", None),
+    ("lz4", None),
+    ("zstd", 1),
+    ("zstd", 3),
+    ("zstd", 9),
+    ("none", None),
+]
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def encode(table, options):
+    buffer = io.BytesIO()
+    pq.write_table(
+        table, buffer, row_group_size=options.row_group_size, **options.writer_kwargs()
+    )
+    return buffer.getvalue()
+
+
+def decode(data):
+    return pq.read_table(pyarrow.BufferReader(data))
+
+
+def main(rows):
+    schemas = SchemaRegistry()
+
+    print(
+        f"{'dataset':>15} {'codec':>8} {'level':>5}"
+        f" {'encode MiB/s':>13} {'decode MiB/s':>13} {'size MiB':>9}"
+    )
+
+    for dataset in DATASET_SCHEMAS:
+        table = schemas.apply_arrow(
+            dataset, pyarrow.Table.from_pandas(make_dataset(dataset, rows))
+        )
+        arrow_mib = table.nbytes / 1024**2
+
+        for codec, level in CODECS:
+            options = ParquetOptions(compression=codec, compression_level=level)
+
+            data, encode_seconds = timed(encode, table, options)
+            _, decode_seconds = timed(decode, data)
+
+            print(
+                f"{dataset:>15} {codec:>8} {level or '-':>5}"
+                f" {arrow_mib / encode_seconds:>13.0f}"
+                f" {arrow_mib / decode_seconds:>13.0f}"
+                f" {len(data) / 1024**2:>9.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
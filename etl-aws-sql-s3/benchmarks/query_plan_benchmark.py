@@ -0,0 +1,221 @@
+"""Benchmark of the query plans of the trips delta queries.
+
+Run from etl-aws-sql-s3, against a scratch local Postgres database named
+mobility (the queries name their tables mobility.opendata.*):
+    python -m benchmarks.query_plan_benchmark [dsn] [trips] [repeats]
+
+Seeds opendata.vehicle_trip with synthetic trips and
+opendata.vehicle_trip_route_point with POINTS_PER_TRIP route points per trip,
+with the indexes of the source, then runs EXPLAIN (ANALYZE, BUFFERS) on every
+variant of each query with the watermark bound as a parameter, and prints the
+planning and execution times, the shared buffers hit and read, and the scans
+of the plan. The three queries of the "split" mode are summed on a row of
+their own, to compare with the variants of the single trips_delta query.
+
+Then reads the delta into pandas in every query mode of TripsIngestion, as
+the delta load does, times it and checks all modes return the same rows.
+The seeded tables are dropped and recreated on every run.
+"""
+import sys
+import time
+import pandas as pd
+import psycopg2
+from query import QueryRegistry
+from trip.tripsingestion import TripsIngestion
+
+DSN = "dbname=mobility"
+
+POINTS_PER_TRIP = 20
+
+# Share of the trips started after the watermark, the size of a daily delta
+DELTA_RATIO = 0.05
+
+SPLIT_QUERY_NAMES = [
+    "trips_delta_start_points",
+    "trips_delta_end_points",
+    "trips_delta_trips",
+]
+
+QUERY_NAMES = SPLIT_QUERY_NAMES + ["trips_delta"]
+
+SEED = [
+    "CREATE SCHEMA IF NOT EXISTS opendata",
+    "DROP TABLE IF EXISTS opendata.vehicle_trip_route_point, opendata.vehicle_trip",
+    """CREATE TABLE opendata.vehicle_trip AS
+    SELECT
+        id,
+        (ARRAY['scooter', 'bicycle', 'moped'])[1 + id %% 3] AS vehicle_type,
+        1 + id %% 5000 AS vehicle_id,
+        1 + id %% 7 AS provider_id,
+        'electric' AS propulsion_type,
+        %(points)s * 10 AS trip_duration_seconds,
+        (random() * 5000)::int AS trip_distance_meters,
+        TIMESTAMPTZ '2026-01-01' + id * INTERVAL '30 seconds' AS start_time,
+        TIMESTAMPTZ '2026-01-01' + id * INTERVAL '30 seconds'
+            + %(points)s * INTERVAL '10 seconds' AS end_time,
+        random() * 1000 AS initial_odometer_km,
+        random() * 1000 + 5 AS current_odometer_km,
+        md5(id::text) AS trip_id
+    FROM generate_series(1, %(trips)s) AS id""",
+    """CREATE TABLE opendata.vehicle_trip_route_point AS
+    SELECT
+        t.id AS vehicle_trip_id,
+        t.start_time + p * INTERVAL '10 seconds' AS created_on,
+        40.4 + random() * 0.1 AS gps_lat,
+        -3.7 + random() * 0.1 AS gps_lng
+    FROM opendata.vehicle_trip t, generate_series(0, %(points)s - 1) AS p""",
+    "ALTER TABLE opendata.vehicle_trip ADD PRIMARY KEY (id)",
+    "CREATE INDEX ON opendata.vehicle_trip (start_time)",
+    "CREATE INDEX ON opendata.vehicle_trip_route_point (created_on)",
+    "CREATE INDEX ON opendata.vehicle_trip_route_point (vehicle_trip_id, created_on)",
+    "ANALYZE opendata.vehicle_trip",
+    "ANALYZE opendata.vehicle_trip_route_point",
+]
+
+
+def seed(conn, trips):
+    with conn.cursor() as cursor:
+        for statement in SEED:
+            cursor.execute(statement, {"trips": trips, "points": POINTS_PER_TRIP})
+
+        # Watermarks are stored as text, bind it the way the delta loads do
+        cursor.execute(
+            """SELECT to_char(
+                percentile_disc(%s) WITHIN GROUP (ORDER BY start_time),
+                'YYYY-MM-DD HH24:MI:SS.USOF'
+            ) FROM opendata.vehicle_trip""",
+            (1 - DELTA_RATIO,),
+        )
+        since = cursor.fetchone()[0]
+
+    conn.commit()
+    return since
+
+
+def scans(plan):
+    """Return the scans of a plan node and its children, e.g.
+    "Index Scan on vehicle_trip_route_point"."""
+    found = []
+    if "Relation Name" in plan:
+        found.append(f"{plan['Node Type']} on {plan['Relation Name']}")
+
+    for child in plan.get("Plans", []):
+        found.extend(scans(child))
+
+    return found
+
+
+def print_plan(name, variant, explained):
+    plan = explained["Plan"]
+    print(
+        f"{name:>25} {variant:>12} {plan['Actual Rows']:>8}"
+        f" {explained['Planning Time']:>8.2f} {explained['Execution Time']:>9.2f}"
+        f" {plan['Shared Hit Blocks']:>8} {plan['Shared Read Blocks']:>8}"
+        f"  {', '.join(scans(plan))}"
+    )
+
+
+def compare_plans(conn, queries, since, repeats):
+    print(
+        f"{'query':>25} {'variant':>12} {'rows':>8} {'plan ms':>8} {'exec ms':>9}"
+        f" {'hit':>8} {'read':>8}  scans"
+    )
+
+    split = []
+    for name in QUERY_NAMES:
+        for variant in queries.variants(name):
+            explained = [
+                queries.explain(conn, name, variant, {"since": since})
+                for _ in range(repeats)
+            ]
+            best = min(explained, key=lambda e: e["Execution Time"])
+            print_plan(name, variant, best)
+
+            if name in SPLIT_QUERY_NAMES:
+                split.append(best)
+
+    # The split mode as one plan: total times and buffers, rows of the last query
+    print_plan(
+        "split total",
+        "-",
+        {
+            "Plan": {
+                "Actual Rows": split[-1]["Plan"]["Actual Rows"],
+                "Shared Hit Blocks": sum(e["Plan"]["Shared Hit Blocks"] for e in split),
+                "Shared Read Blocks": sum(
+                    e["Plan"]["Shared Read Blocks"] for e in split
+                ),
+            },
+            "Planning Time": sum(e["Planning Time"] for e in split),
+            "Execution Time": sum(e["Execution Time"] for e in split),
+        },
+    )
+
+
+def read_delta(conn, queries, since, query_mode, variant):
+    """TripsIngestion._read_delta on a plain connection, without dtypes."""
+    params = {"since": since}
+
+    if query_mode == "single":
+        return pd.read_sql(
+            queries.sql("trips_delta", variant), conn, params=params
+        ).set_index("vehicle_trip_id")
+
+    return TripsIngestion._join_delta(
+        *(
+            pd.read_sql(queries.sql(name), conn, params=params)
+            for name in SPLIT_QUERY_NAMES
+        )
+    )
+
+
+def compare_modes(conn, queries, since, repeats):
+    print(f"\n{'mode':>6} {'variant':>12} {'rows':>8} {'best s':>8} {'mean s':>8}")
+
+    runs = [("split", "-")] + [
+        ("single", variant) for variant in queries.variants("trips_delta")
+    ]
+
+    frames = {}
+    for query_mode, variant in runs:
+        timings = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            df = read_delta(conn, queries, since, query_mode, variant)
+            timings.append(time.perf_counter() - started)
+            conn.rollback()
+
+        frames[query_mode, variant] = df
+        print(
+            f"{query_mode:>6} {variant:>12} {len(df):>8} {min(timings):>8.3f}"
+            f" {sum(timings) / len(timings):>8.3f}"
+        )
+
+    for run, df in frames.items():
+        pd.testing.assert_frame_equal(
+            df.sort_index(),
+            frames["split", "-"].sort_index(),
+            check_dtype=False,
+            obj=f"{run} delta",
+        )
+
+
+def main(dsn, trips, repeats):
+    queries = QueryRegistry()
+    conn = psycopg2.connect(dsn)
+
+    since = seed(conn, trips)
+    print(f"{trips} trips, {trips * POINTS_PER_TRIP} route points, since {since}")
+
+    compare_plans(conn, queries, since, repeats)
+    compare_modes(conn, queries, since, repeats)
+
+    conn.close()
+
+
+if __name__ == "__main__":
+    main(
+        sys.argv[1] if len(sys.argv) > 1 else DSN,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 200_000,
+        int(sys.argv[3]) if len(sys.argv) > 3 else 3,
+    )
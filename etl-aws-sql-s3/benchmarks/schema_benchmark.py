@@ -0,0 +1,82 @@
+"""Benchmark of the dataset schemas of the SchemaRegistry.
+
+Run from etl-aws-sql-s3:
+    python -m benchmarks.schema_benchmark [rows]
+
+Builds, for every dataset with a schema, a DataFrame with the dtypes read_sql
+returns (object strings, int64, float64, datetime64[ns]) and prints its memory
+and Parquet size before and after the declared dtypes are applied.
+"""
+import io
+import sys
+import numpy as np
+import pandas as pd
+import pyarrow
+import pyarrow.parquet as pq
+from schema import SchemaRegistry
+from schema.schemaregistry import DATASET_SCHEMAS
+from storage import ParquetOptions
+
+CATEGORIES = 12
+
+
+def make_column(column_type, rows, rng):
+    if column_type == "category":
+        values = np.array([f"value_{i:02d}_{'x' * i}" for i in range(CATEGORIES)])
+        return values[rng.integers(0, CATEGORIES, rows)].astype(object)
+    if column_type == "int32":
+        return rng.integers(0, 100_000, rows)
+    if column_type == "float32":
+        return rng.random(rows) * 100
+    return pd.Timestamp("2023-01-01") + pd.to_timedelta(
+        rng.integers(0, 365 * 86400, rows), unit="s"
+    )
+
+
+def make_dataset(dataset, rows, seed=0):
+    rng = np.random.default_rng(seed)
+
+    # Ids are not in the schemas but are part of every extraction
+    columns = {"id": np.arange(rows, dtype="int64")}
+    for name, column_type in DATASET_SCHEMAS[dataset].items():
+        columns[name] = make_column(column_type, rows, rng)
+
+    return pd.DataFrame(columns)
+
+
+def parquet_bytes(table):
+    # Same encoding as DatasetWriter
+    buffer = io.BytesIO()
+    pq.write_table(table, buffer, **ParquetOptions().writer_kwargs())
+    return buffer.tell()
+
+
+def main(rows):
+    schemas = SchemaRegistry()
+
+    print(
+        f"{'dataset':>15} {'memory MiB':>18} {'parquet MiB':>18}"
+        f"\n{'':>15} {'before':>8} {'after':>9} {'before':>8} {'after':>9}"
+    )
+
+    for dataset in DATASET_SCHEMAS:
+        df = make_dataset(dataset, rows)
+
+        memory_before = df.memory_usage(deep=True).sum()
+        parquet_before = parquet_bytes(pyarrow.Table.from_pandas(df))
+
+        schemas.apply(dataset, df)
+        memory_after = df.memory_usage(deep=True).sum()
+        parquet_after = parquet_bytes(
+            schemas.apply_arrow(dataset, pyarrow.Table.from_pandas(df))
+        )
+
+        print(
+            f"{dataset:>15}"
+            f" {memory_before / 1024**2:>8.1f} {memory_after / 1024**2:>9.1f}"
+            f" {parquet_before / 1024**2:>8.1f} {parquet_after / 1024**2:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
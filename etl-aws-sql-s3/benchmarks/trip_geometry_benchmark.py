@@ -0,0 +1,86 @@
+"""Benchmark of the trip geometry features of TripGeometry.
+
+Run from etl-aws-sql-s3:
+    python -m benchmarks.trip_geometry_benchmark [trips]
+
+Computes the features of synthetic trips around Barcelona in float64 and
+float32 and prints the throughput, the memory of the features and the largest
+error of float32 against float64. The accuracy against published reference
+values is tested in test/trip_geometry_test.py.
+"""
+import sys
+import time
+import numpy as np
+import pandas as pd
+from geo import TripGeometry
+from geo.tripgeometry import FEATURES
+
+MIN_METERS = 100
+
+
+def make_trips(rows, seed=0):
+    rng = np.random.default_rng(seed)
+
+    start_lat = 41.32 + rng.random(rows) * 0.14
+    start_lng = 2.07 + rng.random(rows) * 0.16
+    straight_line = rng.random(rows) * 0.03
+
+    return pd.DataFrame(
+        {
+            "start_gps_lat": start_lat,
+            "start_gps_lng": start_lng,
+            "end_gps_lat": start_lat + straight_line * rng.standard_normal(rows),
+            "end_gps_lng": start_lng + straight_line * rng.standard_normal(rows),
+            "trip_distance_meters": rng.random(rows) * 5000,
+            "trip_duration_seconds": rng.integers(0, 3600, rows),
+        }
+    )
+
+
+def main(rows):
+    trips = make_trips(rows)
+    features = {}
+
+    print(f"{'dtype':>8} {'trips/s':>12} {'seconds':>8} {'MiB':>8}")
+
+    for dtype in ("float64", "float32"):
+        geometry = TripGeometry(dtype)
+
+        started = time.perf_counter()
+        features[dtype] = geometry.features(trips)
+        seconds = time.perf_counter() - started
+
+        print(
+            f"{dtype:>8} {rows / seconds:>12.0f} {seconds:>8.3f}"
+            f" {features[dtype].memory_usage().sum() / 1024**2:>8.1f}"
+        )
+
+    # Bearings and ratios of points a few meters apart are noise in any dtype
+    measurable = (
+        (features["float64"]["straight_line_meters"] >= MIN_METERS)
+        & (trips["trip_distance_meters"] >= MIN_METERS)
+    ).to_numpy()
+
+    print(
+        f"\nfloat32 error on trips of at least {MIN_METERS} m"
+        f"\n{'feature':>20} {'max abs':>10} {'max rel':>10}"
+    )
+
+    for name in FEATURES:
+        exact = features["float64"][name].to_numpy()[measurable]
+        error = np.abs(
+            features["float32"][name].to_numpy(dtype="float64")[measurable] - exact
+        )
+
+        if name == "bearing_degrees":
+            # 359.9 and 0.1 are 0.2 degrees apart, relative errors mean nothing
+            error = np.minimum(error, 360 - error)
+            print(f"{name:>20} {np.nanmax(error):>10.4f} {'-':>10}")
+            continue
+
+        relative = error[exact > 0] / exact[exact > 0]
+        print(f"{name:>20} {np.nanmax(error):>10.4f} {np.nanmax(relative):>10.2e}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000)
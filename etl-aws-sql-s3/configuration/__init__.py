@@ -0,0 +1 @@
+from .configuration import Configuration
@@ -1,44 +1,147 @@
-import psycopg2
-import boto3
+import datetime
+import pandas.io.sql as psql
+from extraction import ArrowExtractor, StreamingExtractor
+from fingerprint import FingerprintStore
+from query import QueryRegistry
+from resources import ResourceRegistry
+from schema import SchemaRegistry
+from storage import DatasetWriter, ParquetOptions
+from watermark import LocalWatermarkBackend, S3WatermarkBackend, WatermarkStore
 
 
 class Configuration(object):
-    def __init__(self):
+    def __init__(self, resources=None):
         import os
 
-        self.conn = psycopg2.connect(
-            user="",
-            password="",
-            host="",
-            port="",
-            database="",
-        )
-
         self.REGION = ""
 
         self.ACCESS_KEY_ID = ""
 
         self.SECRET_ACCESS_KEY = ""
 
-        self.s3c = boto3.client(
-            "s3",
-            region_name=self.REGION,
-            aws_access_key_id=self.ACCESS_KEY_ID,
-            aws_secret_access_key=self.SECRET_ACCESS_KEY,
+        # Point it to a local S3 stand-in (MinIO, moto server) to test uploads
+        self.S3_ENDPOINT_URL = None
+
+        # Shared by every ingestion class of the process unless one is injected
+        self.PG_MAX_CONNECTIONS = 4
+        self.S3_MAX_POOL_CONNECTIONS = 32
+
+        self.resources = resources or ResourceRegistry.default(
+            connection_params=dict(
+                user="",
+                password="",
+                host="",
+                port="",
+                database="",
+            ),
+            s3_params=dict(
+                region_name=self.REGION,
+                aws_access_key_id=self.ACCESS_KEY_ID,
+                aws_secret_access_key=self.SECRET_ACCESS_KEY,
+                endpoint_url=self.S3_ENDPOINT_URL,
+            ),
+            max_connections=self.PG_MAX_CONNECTIONS,
+            max_pool_connections=self.S3_MAX_POOL_CONNECTIONS,
         )
 
+        self.s3c = self.resources.s3_client()
+
         # self.cursor = conn.cursor() # Only necessary if creating SQL tables
 
         self.today = datetime.date.today()
 
         # Constants
         self.BUCKET_NAME = "generic-bucket"
-        self.TRIPS = f"generic/generic{self.today.year}.parquet"
-        self.PARKINGS = f"generic/generic{self.today.year}.parquet"
-        self.VEVENTS = f"generic/generic{self.today.year}.parquet"
-        self.VEHICLES = f"generic/generic{self.today.year}.parquet"
-        self.CUSTOMERS = f"generic/generic{self.today.year}.parquet"
-        self.BOOKINGS = f"generic/generic{self.today.year}.parquet"
+
+        # Delta loads keep their high-water mark here instead of scanning the
+        # yearly snapshot. Set WATERMARK_DIR to keep the state on local disk.
+        self.WATERMARK_PREFIX = "generic/_watermarks"
+        self.WATERMARK_DIR = ""
+
+        if self.WATERMARK_DIR:
+            watermark_backend = LocalWatermarkBackend(self.WATERMARK_DIR)
+        else:
+            watermark_backend = S3WatermarkBackend(
+                self.s3c, self.BUCKET_NAME, self.WATERMARK_PREFIX
+            )
+
+        self.watermarks = WatermarkStore(watermark_backend)
+
+        # SQL of every dataset, values are bound as parameters, see QueryRegistry
+        self.queries = QueryRegistry()
+
+        # Target dtypes of each dataset, applied at extraction and kept in Parquet
+        self.schemas = SchemaRegistry()
+
+        # Partitioned, append-only output: dataset=<name>/date=YYYY-MM-DD/part-NNNN.parquet
+        self.DATASETS_PREFIX = "generic/datasets"
+
+        # Uploads are streamed as multipart uploads of S3_PART_SIZE bytes parts
+        self.S3_PART_SIZE = 8 * 1024**2
+        self.S3_MAX_PARTS_IN_FLIGHT = 4
+
+        # Encoding of every Parquet file written, see ParquetOptions and
+        # benchmarks/parquet_codec_benchmark.py
+        self.PARQUET_COMPRESSION = "zstd"
+        self.PARQUET_COMPRESSION_LEVEL = None
+        self.PARQUET_ROW_GROUP_SIZE = 1_000_000
+        self.PARQUET_USE_DICTIONARY = True
+        self.PARQUET_WRITE_STATISTICS = True
+
+        self.parquet_options = ParquetOptions(
+            compression=self.PARQUET_COMPRESSION,
+            compression_level=self.PARQUET_COMPRESSION_LEVEL,
+            row_group_size=self.PARQUET_ROW_GROUP_SIZE,
+            use_dictionary=self.PARQUET_USE_DICTIONARY,
+            write_statistics=self.PARQUET_WRITE_STATISTICS,
+        )
+
+        self.dataset_writer = DatasetWriter(
+            self.s3c,
+            self.BUCKET_NAME,
+            self.DATASETS_PREFIX,
+            part_size=self.S3_PART_SIZE,
+            max_parts_in_flight=self.S3_MAX_PARTS_IN_FLIGHT,
+            upload_slot=lambda: self.resources.limit("s3"),
+            schemas=self.schemas,
+            parquet_options=self.parquet_options,
+        )
+
+        # Large extractions are streamed through a server-side cursor, holding
+        # at most EXTRACT_MAX_BATCHES batches of EXTRACT_BATCH_SIZE rows
+        self.EXTRACT_BATCH_SIZE = 50000
+        self.EXTRACT_MAX_BATCHES = 2
+
+        self.extractor = StreamingExtractor(
+            self.resources.connection,
+            self.EXTRACT_BATCH_SIZE,
+            self.EXTRACT_MAX_BATCHES,
+        )
+
+        # Passthrough datasets skip psycopg2 and pandas with ADBC or connectorx
+        # when one is installed, "adbc" or "connectorx" to force one
+        self.ARROW_DRIVER = None
+
+        self.arrow_extractor = ArrowExtractor(
+            self.resources.connection_uri(),
+            self.resources.connection_slot,
+            self.extractor,
+            self.EXTRACT_BATCH_SIZE,
+            self.ARROW_DRIVER,
+        )
+
+        # Row count + checksum of the source, compared before a delta extraction
+        self.fingerprints = FingerprintStore(
+            self.read_sql, self.watermarks, self.dataset_writer
+        )
 
         os.environ["generic"] = self.ACCESS_KEY_ID
         os.environ["generic"] = self.SECRET_ACCESS_KEY
+
+    def read_sql(self, query, params=None, dataset=None):
+        """Run query on a pooled connection and return the result as a DataFrame,
+        with the dtypes declared for dataset if one is given."""
+        with self.resources.connection() as conn:
+            df = psql.read_sql(query, conn, params=params)
+
+        return self.schemas.apply(dataset, df)
@@ -1,175 +1,112 @@
 import pandas as pd
-import pandas.io.sql as psql
-import boto3
-import io
 import logging
 import pyarrow
 from configuration import Configuration
 
 
 class CustomersIngestion(Configuration):
-    def __init__(self):
-        super().__init__()
+    # Ids the customers dataset is made of, fingerprinted to detect changes
+    FINGERPRINT_SOURCE = """SELECT id AS user_id FROM mobility.users.user
+            UNION ALL
+            SELECT id AS user_id FROM mobility.users.deleted_user"""
 
-    def customersDf_full_s3Load(self):
+    # "union" runs a single query, "split" the former one query per table
+    QUERY_MODES = ("union", "split")
 
-        dft1 = psql.read_sql(
-            """SELECT
-                u.id as user_id, u.locale, u.marketing_accepted, 
-                u.privacy_accepted, u.created_on, u.updated_on,
-                p.city, p.street, p.postal_code, p.status, p.birth_date, 
-                p.card_status as credit_card_status
-            FROM
-                mobility.users.user u
+    def __init__(self, resources=None):
+        super().__init__(resources)
 
-            INNER JOIN  mobility.users.profile p
+    @staticmethod
+    def _flag_deleted_users(users, deleted_users):
+        """Stack users and deleted users, flagging the deleted ones.
 
-            ON u.id = p.user_id
-            ;""",
-            self.conn,
-        )
-
-        dft2 = psql.read_sql(
-            """SELECT
-                u.id as user_id, u.locale, u.marketing_accepted, 
-                u.privacy_accepted, u.created_on, u.updated_on,
-                p.city, p.street, p.postal_code, p.status, 
-                p.birth_date, p.card_status as credit_card_status
-            FROM
-                mobility.users.deleted_user u
+        Input:
+        users DataFrame: Rows with a user_id column.
+        deleted_users DataFrame: Rows of deleted users with a user_id column.
 
-            INNER JOIN  mobility.users.deleted_profile p
+        Output:
+        DataFrame: Both frames concatenated, with a boolean deleted_user column.
+        """
+        merged_dft = pd.concat([users, deleted_users], ignore_index=True)
 
-            ON u.id = p.user_id
-                    ;""",
-            self.conn,
+        # isin builds one hash table of the deleted ids, each row is then an O(1) lookup
+        merged_dft["deleted_user"] = merged_dft["user_id"].isin(
+            deleted_users["user_id"].unique()
         )
 
-        def _user_is_deleted(u_id):
-            """Check wether user_id is a deleted user.
+        return merged_dft
 
-            Input:
-            user_id STR: User id from user and deleted_user tables.
+    def _read_customers(self, query_mode="union"):
+        """Read users and deleted users, flagging the deleted ones.
 
-            Output:
-            Bool: True if user is deleted, false otherwise.
-            """
-            deleted_users = dft2.user_id
+        Input:
+        query_mode STR: "union" runs a single UNION ALL query where Postgres
+        sets the deleted_user flag, "split" runs one query per table and flags
+        the rows in pandas.
 
-            return u_id in deleted_users
+        Output:
+        DataFrame: Users and deleted users with a boolean deleted_user column,
+        with the dtypes declared for the customers dataset.
+        """
+        if query_mode == "union":
+            return self.read_sql(
+                self.queries.sql("customers"),
+                dataset="customers",
+            )
 
-        merged_dft = dft1.append(dft2)
+        if query_mode == "split":
+            dft1 = self.read_sql(self.queries.sql("customers_users"))
 
-        merged_dft["deleted_user"] = merged_dft["user_id"].apply(_user_is_deleted)
+            dft2 = self.read_sql(self.queries.sql("customers_deleted_users"))
 
-        # return merged_dft when the new function get_customer_df is refractored, I'll just do the full load just for now
-        parquet_buffer = io.BytesIO()  # Add, getter for  referencing user id
+            # Categories are set after the concat, which would turn categorical
+            # columns with different categories back into objects
+            return self.schemas.apply("customers", self._flag_deleted_users(dft1, dft2))
 
-        merged_dft.to_parquet(parquet_buffer, compression="gzip")
-
-        s3_resource = boto3.resource("s3")
-        s3_resource.Object(self.BUCKET_NAME, self.CUSTOMERS).put(
-            Body=parquet_buffer.getvalue()
+        raise ValueError(
+            f"Unknown query_mode {query_mode}, expected one of {self.QUERY_MODES}"
         )
 
-        return None
+    def customersDf_full_s3Load(self, query_mode="union"):
+        fingerprint = self.fingerprints.compute(self.FINGERPRINT_SOURCE)
 
-    def customersDf_delta_s3Load(self):
-        # TODO: Add a getter in the CONFIGURATION class mapping user_id and Key properties
-        def _user_is_deleted(u_id):
-            """
-            Check wether user_id is a deleted user.
+        merged_dft = self._read_customers(query_mode)
 
-            Input:
-            user_id STR: User id from user and deleted_user tables.
-
-            Output:
-            Bool: True if user is deleted, false otherwise.
-            """
-            deleted_users = dft2.user_id
-
-            return u_id in deleted_users
-
-        customers_data = self.s3c.get_object(
-            Bucket=self.BUCKET_NAME, Key=self.CUSTOMERS
-        )
-
-        customers_data = pd.read_parquet(
-            io.BytesIO(customers_data["Body"].read()), engine="pyarrow"
+        # return merged_dft when the new function get_customer_df is refractored, I'll just do the full load just for now
+        result = self.dataset_writer.overwrite(
+            "customers", merged_dft, metadata=self.fingerprints.metadata(fingerprint)
         )
 
-        current_userIds = customers_data.user_id
+        self.fingerprints.record("customers", fingerprint)
 
-        del customers_data
+        return result
 
-        dft1 = psql.read_sql(
-            """WITH data_cte AS (
-                SELECT 
-                    user_id, 
-                    event_date, 
-                    event_type, 
-                    event_amount,
-                    DATE_TRUNC('month', event_date) AS month,
-                    DATE_TRUNC('year', event_date) AS year
-                FROM events
-            )
-
-            SELECT 
-                user_id, 
-                month,
-                year,
-                event_type, 
-                SUM(event_amount) AS event_amount_sum,
-                COUNT(DISTINCT event_date) AS event_count,
-                AVG(event_amount) AS event_amount_avg
-            FROM data_cte
-            GROUP BY ROLLUP (user_id, month, year, event_type);
-            """,
-            self.conn,
+    def customersDf_delta_s3Load(self):
+        # TODO: Add a getter in the CONFIGURATION class mapping user_id and Key properties
+        changed, fingerprint = self.fingerprints.changed(
+            "customers", self.FINGERPRINT_SOURCE
         )
 
-        dft2 = psql.read_sql(
-            """WITH data_cte AS (
-                SELECT 
-                    user_id, 
-                    event_date, 
-                    event_type, 
-                    CASE 
-                        WHEN event_type = 'purchase' THEN event_amount
-                        ELSE 0
-                    END AS purchase_amount,
-                    CASE 
-                        WHEN event_type = 'refund' THEN event_amount
-                        ELSE 0
-                    END AS refund_amount
-                FROM events
+        if not changed:
+            logging.warning(
+                "Customera dataset is up to date or replica is not updated yed"
             )
-            SELECT 
-                user_id, 
-                SUM(purchase_amount) - SUM(refund_amount) AS net_purchases,
-                SUM(CASE WHEN event_type = 'purchase' THEN 1 ELSE 0 END) AS total_purchases,
-                SUM(CASE WHEN event_type = 'refund' THEN 1 ELSE 0 END) AS total_refunds
-            FROM data_cte
-            GROUP BY user_id
-            """,
-            self.conn,
-        )
+            return None
 
-        merged_dft = dft1.append(dft2)
+        dft1 = self.read_sql(self.queries.sql("customers_delta_events"))
 
-        merged_dft["deleted_user"] = merged_dft["user_id"].apply(_user_is_deleted)
+        dft2 = self.read_sql(self.queries.sql("customers_delta_purchases"))
 
-        if set(current_userIds) == set(merged_dft.user_id):
-            logging.warning(
-                "Customera dataset is up to date or replica is not updated yed"
-            )
-        else:
+        merged_dft = self.schemas.apply(
+            "customers", self._flag_deleted_users(dft1, dft2)
+        )
 
-            parquet_buffer = io.BytesIO()
+        # The delta queries aggregate every user, not only the changed ones, so
+        # their result replaces the dataset
+        result = self.dataset_writer.overwrite(
+            "customers", merged_dft, metadata=self.fingerprints.metadata(fingerprint)
+        )
 
-            merged_dft.to_parquet(parquet_buffer, compression="gzip")
+        self.fingerprints.record("customers", fingerprint)
 
-            s3_resource = boto3.resource("s3")
-            s3_resource.Object(self.BUCKET_NAME, self.CUSTOMERS).put(
-                Body=parquet_buffer.getvalue()
-            )
+        return result
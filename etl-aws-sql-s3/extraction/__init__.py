@@ -0,0 +1,2 @@
+from .arrowextractor import ArrowExtractor
+from .streamingextractor import BatchMaxTracker, StreamingExtractor
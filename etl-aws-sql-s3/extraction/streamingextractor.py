@@ -0,0 +1,166 @@
+import queue
+import threading
+import uuid
+import psycopg2.extensions
+import pyarrow
+import pyarrow.compute as pc
+
+# numeric comes back as decimal.Decimal by default, which Arrow can only store
+# as a decimal whose precision changes from batch to batch
+DEC2FLOAT = psycopg2.extensions.new_type(
+    psycopg2.extensions.DECIMAL.values,
+    "DEC2FLOAT",
+    lambda value, cursor: float(value) if value is not None else None,
+)
+
+# Postgres type oid -> Arrow type, anything else is inferred from the first batch
+PG_ARROW_TYPES = {
+    16: pyarrow.bool_(),
+    20: pyarrow.int64(),
+    21: pyarrow.int16(),
+    23: pyarrow.int32(),
+    25: pyarrow.string(),
+    700: pyarrow.float32(),
+    701: pyarrow.float64(),
+    1042: pyarrow.string(),
+    1043: pyarrow.string(),
+    1082: pyarrow.date32(),
+    1114: pyarrow.timestamp("us"),
+    1184: pyarrow.timestamp("us", tz="UTC"),
+    1700: pyarrow.float64(),
+}
+
+
+class StreamingExtractor(object):
+    """Extract query results as Arrow record batches through a server-side
+    (named) cursor, so the result set never has to fit in client memory.
+
+    Rows are fetched on a background thread while the previous batch is being
+    written. At most max_batches batches are alive at any time: the fetcher
+    waits for the consumer before it pulls more rows from Postgres.
+    """
+
+    def __init__(self, connect, batch_size=50000, max_batches=2):
+        """connect is a callable returning a context manager that yields a
+        psycopg2 connection, e.g. ResourceRegistry.connection. The connection
+        is held for the whole extraction.
+        """
+        if max_batches < 1:
+            raise ValueError("max_batches must be at least 1")
+
+        self.connect = connect
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+
+    def _arrow_schema(self, description, rows):
+        fields = []
+        for i, column in enumerate(description):
+            arrow_type = PG_ARROW_TYPES.get(column.type_code)
+            if arrow_type is None:
+                arrow_type = pyarrow.array([row[i] for row in rows]).type
+            fields.append(pyarrow.field(column.name, arrow_type))
+
+        return pyarrow.schema(fields)
+
+    def _to_batch(self, rows, schema):
+        columns = list(zip(*rows)) if rows else [[] for _ in schema]
+
+        return pyarrow.RecordBatch.from_arrays(
+            [
+                pyarrow.array(column, type=field.type)
+                for column, field in zip(columns, schema)
+            ],
+            schema=schema,
+        )
+
+    def iter_batches(self, query, params=None, schema=None):
+        """Run query and yield its result as record batches.
+
+        Input:
+        query STR: SQL query, may contain psycopg2 placeholders.
+        params TUPLE or DICT: Query parameters.
+        schema DatasetSchema: Optional target types, each batch is cast to them
+        as soon as it is fetched.
+
+        Output:
+        Generator: pyarrow.RecordBatch of at most batch_size rows. A query
+        without rows yields a single empty batch carrying the schema.
+        """
+        slots = threading.Semaphore(self.max_batches)
+        stop = threading.Event()
+        ready = queue.Queue()
+        done = object()
+
+        def _fetch():
+            try:
+                with self.connect() as conn, conn.cursor(
+                    name=f"extract_{uuid.uuid4().hex}"
+                ) as cursor:
+                    psycopg2.extensions.register_type(DEC2FLOAT, cursor)
+                    cursor.itersize = self.batch_size
+                    cursor.execute(query, params)
+
+                    arrow_schema = None
+                    while not stop.is_set():
+                        slots.acquire()
+                        if stop.is_set():
+                            break
+
+                        rows = cursor.fetchmany(self.batch_size)
+                        if arrow_schema is None:
+                            arrow_schema = self._arrow_schema(cursor.description, rows)
+                        elif not rows:
+                            slots.release()
+                            break
+
+                        batch = self._to_batch(rows, arrow_schema)
+                        if schema is not None:
+                            batch = schema.apply_arrow(batch)
+                        ready.put(batch)
+
+                        if len(rows) < self.batch_size:
+                            break
+            except BaseException as error:
+                ready.put(error)
+            finally:
+                ready.put(done)
+
+        fetcher = threading.Thread(target=_fetch, daemon=True)
+        fetcher.start()
+
+        try:
+            while True:
+                item = ready.get()
+                if item is done:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+
+                yield item
+
+                # The consumer is done with the batch, let the fetcher pull another
+                del item
+                slots.release()
+        finally:
+            stop.set()
+            slots.release()
+            fetcher.join()
+
+
+class BatchMaxTracker(object):
+    """Pass record batches through while keeping the max value of a column,
+    e.g. to commit a watermark after a streamed load.
+    """
+
+    def __init__(self, batches, column):
+        self.batches = batches
+        self.column = column
+        self.max = None
+
+    def __iter__(self):
+        for batch in self.batches:
+            batch_max = pc.max(batch.column(self.column)).as_py()
+            if batch_max is not None and (self.max is None or batch_max > self.max):
+                self.max = batch_max
+
+            yield batch
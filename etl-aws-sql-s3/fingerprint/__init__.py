@@ -0,0 +1 @@
+from .fingerprintstore import FingerprintStore
@@ -0,0 +1,2 @@
+from .spatialindex import GridIndex, SpatialIndexCache
+from .tripgeometry import TripGeometry
@@ -0,0 +1,312 @@
+import os
+import threading
+import numpy as np
+import pandas as pd
+from .tripgeometry import EARTH_RADIUS_METERS, TripGeometry
+
+
+class GridIndex(object):
+    """Uniform grid over points projected to meters, for nearest-point
+    lookups of whole batches of queries with NumPy.
+
+    Points are projected with an equirectangular projection centered on their
+    mean latitude and sorted by grid cell, so the points of a cell are a slice
+    found with searchsorted. A query looks at the rings of cells around its own
+    until the nearest point found is closer than the unexplored rings. The
+    ranking is exact in the projection, which within a city is exact to a few
+    centimeters; the distances returned are haversine distances.
+    """
+
+    # Queries still unresolved after this many rings, e.g. far from every
+    # point, are compared with every point instead
+    MAX_RINGS = 8
+
+    # Maximum number of query x point distances computed at once
+    MAX_PAIRS = 10_000_000
+
+    def __init__(self, lat, lng, ids=None, cell_meters=250):
+        """
+        Input:
+        lat, lng ARRAY: Coordinates of the points, in degrees, without NaN.
+        ids ARRAY: Id of each point, their position if None.
+        cell_meters FLOAT: Side of the grid cells, about the distance between
+        neighbouring points.
+        """
+        lat = np.asarray(lat, dtype="float64")
+        lng = np.asarray(lng, dtype="float64")
+
+        if len(lat) == 0:
+            raise ValueError("Cannot index an empty set of points")
+
+        ids = np.arange(len(lat)) if ids is None else np.asarray(ids)
+
+        self.cell_meters = cell_meters
+        self.cos_lat0 = np.cos(np.radians(lat.mean()))
+
+        x, y = self._project(lat, lng)
+        cell_x, cell_y = self._cells(x, y)
+        keys = self._keys(cell_x, cell_y)
+
+        order = np.argsort(keys, kind="stable")
+
+        self.keys = keys[order]
+
+        # Occupied cells and the slice of their points, searched by the queries
+        self.cells, self.cell_starts, self.cell_counts = np.unique(
+            self.keys, return_index=True, return_counts=True
+        )
+
+        self.x, self.y = x[order], y[order]
+        self.lat, self.lng = lat[order], lng[order]
+        self.ids = pd.array(ids[order])
+
+        self.cell_bounds = (cell_x.min(), cell_x.max(), cell_y.min(), cell_y.max())
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _project(self, lat, lng):
+        return (
+            EARTH_RADIUS_METERS * np.radians(lng) * self.cos_lat0,
+            EARTH_RADIUS_METERS * np.radians(lat),
+        )
+
+    def _cells(self, x, y):
+        return (
+            np.floor(x / self.cell_meters).astype("int64"),
+            np.floor(y / self.cell_meters).astype("int64"),
+        )
+
+    @staticmethod
+    def _keys(cell_x, cell_y):
+        # One sortable int64 per cell, cell_y is shifted to be positive
+        return cell_x * (1 << 32) + (cell_y + (1 << 31))
+
+    @staticmethod
+    def _ring(k):
+        """Offsets (dx, dy) of the cells at Chebyshev distance k."""
+        steps = np.arange(-k, k + 1)
+        dx, dy = np.meshgrid(steps, steps)
+        on_ring = np.maximum(np.abs(dx), np.abs(dy)) == k
+
+        return dx[on_ring], dy[on_ring]
+
+    def _update(self, best, best_d2, queries, points, qx, qy):
+        # Keep, for each query, the closest of its candidate points. The pairs
+        # of a query are contiguous, so each group is reduced without sorting.
+        if not len(queries):
+            return
+
+        d2 = (qx[queries] - self.x[points]) ** 2 + (qy[queries] - self.y[points]) ** 2
+
+        starts = np.flatnonzero(np.r_[True, queries[1:] != queries[:-1]])
+        group_min = np.minimum.reduceat(d2, starts)
+
+        # First pair of each group reaching the minimum
+        sizes = np.diff(np.r_[starts, len(d2)])
+        hits = np.flatnonzero(d2 == np.repeat(group_min, sizes))
+        hits = hits[np.r_[True, queries[hits][1:] != queries[hits][:-1]]]
+
+        queries, points, d2 = queries[hits], points[hits], d2[hits]
+
+        closer = d2 < best_d2[queries]
+        best[queries[closer]] = points[closer]
+        best_d2[queries[closer]] = d2[closer]
+
+    def _search_rings(self, best, best_d2, pending, qx, qy):
+        qcell_x, qcell_y = self._cells(qx, qy)
+        min_x, max_x, min_y, max_y = self.cell_bounds
+
+        # Ring from which no cell holds a point any more
+        last_ring = np.maximum.reduce(
+            [
+                np.abs(qcell_x - min_x),
+                np.abs(qcell_x - max_x),
+                np.abs(qcell_y - min_y),
+                np.abs(qcell_y - max_y),
+            ]
+        )
+
+        for k in range(self.MAX_RINGS + 1):
+            if not len(pending):
+                break
+
+            dx, dy = self._ring(k)
+            keys = self._keys(
+                qcell_x[pending][:, None] + dx, qcell_y[pending][:, None] + dy
+            ).ravel()
+
+            cells = np.minimum(np.searchsorted(self.cells, keys), len(self.cells) - 1)
+            occupied = self.cells[cells] == keys
+            starts = self.cell_starts[cells]
+            counts = np.where(occupied, self.cell_counts[cells], 0)
+
+            # Expand the (query, cell) pairs into (query, point) pairs
+            queries = np.repeat(np.repeat(pending, len(dx)), counts)
+            offsets = np.arange(counts.sum()) - np.repeat(
+                np.cumsum(counts) - counts, counts
+            )
+            points = np.repeat(starts, counts) + offsets
+
+            self._update(best, best_d2, queries, points, qx, qy)
+
+            # Every point outside rings 0..k is at least k cells away
+            resolved = (best_d2[pending] <= (k * self.cell_meters) ** 2) | (
+                last_ring[pending] <= k
+            )
+            pending = pending[~resolved]
+
+        return pending
+
+    def _search_all(self, best, best_d2, pending, qx, qy):
+        chunk = max(1, self.MAX_PAIRS // len(self))
+
+        for start in range(0, len(pending), chunk):
+            queries = pending[start : start + chunk]
+
+            d2 = (qx[queries, None] - self.x) ** 2 + (qy[queries, None] - self.y) ** 2
+            points = d2.argmin(axis=1)
+
+            best[queries] = points
+            best_d2[queries] = d2[np.arange(len(queries)), points]
+
+    def _nearest_positions(self, lat, lng):
+        best = np.full(len(lat), -1, dtype="int64")
+        best_d2 = np.full(len(lat), np.inf)
+
+        valid = ~(np.isnan(lat) | np.isnan(lng))
+        qx, qy = self._project(np.where(valid, lat, 0), np.where(valid, lng, 0))
+
+        pending = self._search_rings(best, best_d2, np.flatnonzero(valid), qx, qy)
+        self._search_all(best, best_d2, pending, qx, qy)
+
+        return best
+
+    def nearest(self, lat, lng):
+        """Find the nearest point of every query.
+
+        Input:
+        lat, lng ARRAY: Coordinates of the queries, in degrees.
+
+        Output:
+        DataFrame: One row per query, in order, with the id of the nearest
+        point and distance_meters to it, missing for queries with a NaN
+        coordinate.
+        """
+        lat = np.asarray(lat, dtype="float64")
+        lng = np.asarray(lng, dtype="float64")
+
+        best = np.full(len(lat), -1, dtype="int64")
+
+        # Queries per batch so the 3 x 3 cells around each hold MAX_PAIRS points
+        points_per_cell = len(self) / len(self.cells)
+        batch_size = max(1, int(self.MAX_PAIRS / (9 * points_per_cell)))
+
+        for start in range(0, len(lat), batch_size):
+            batch = slice(start, start + batch_size)
+            best[batch] = self._nearest_positions(lat[batch], lng[batch])
+
+        found = best >= 0
+        distance = np.full(len(lat), np.nan)
+        distance[found] = TripGeometry().haversine(
+            lat[found], lng[found], self.lat[best[found]], self.lng[best[found]]
+        )
+
+        return pd.DataFrame(
+            {
+                "id": self.ids.take(best, allow_fill=True),
+                "distance_meters": distance,
+            }
+        )
+
+    def save(self, path):
+        """Write the points to an .npz file or file object, see load."""
+        ids = self.ids.to_numpy()
+        if ids.dtype == object:
+            ids = ids.astype(str)
+
+        np.savez(
+            path,
+            lat=self.lat,
+            lng=self.lng,
+            ids=ids,
+            cell_meters=self.cell_meters,
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                data["lat"], data["lng"], data["ids"], float(data["cell_meters"])
+            )
+
+
+class SpatialIndexCache(object):
+    """Keep the GridIndex of each dataset for as long as the fingerprint of the
+    dataset does not change, see FingerprintStore.
+
+    With a directory, indexes are also saved there as .npz files named after
+    the fingerprint, so the next run does not rebuild them either.
+    """
+
+    # Key of the index built while the fingerprint of a dataset is unknown, it
+    # is kept in memory only
+    UNKNOWN = "unknown"
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._indexes = {}
+
+    def _path(self, dataset, fingerprint):
+        name = f"{dataset}-{fingerprint['row_count']}-{fingerprint['checksum']}.npz"
+        return os.path.join(self.directory, name)
+
+    def get(self, dataset, fingerprint, build):
+        """Return the index of dataset for fingerprint.
+
+        Input:
+        dataset STR: Dataset name, e.g. "parking_areas".
+        fingerprint DICT: Current fingerprint of the dataset, None if unknown;
+        the index is then kept under UNKNOWN until a fingerprint is known.
+        build CALLABLE: Reads the dataset and returns the fingerprint of the
+        rows it read and their GridIndex, None if there are no points. The
+        index is kept under that fingerprint, so it is never saved under the
+        name of an older one when the dataset changes in between.
+
+        Output:
+        GridIndex, or None when the dataset has no points
+        """
+        key = self.UNKNOWN if fingerprint is None else fingerprint
+
+        with self._lock:
+            cached = self._indexes.get(dataset)
+            if cached is not None and cached[0] == key:
+                return cached[1]
+
+            path = (
+                self._path(dataset, fingerprint)
+                if self.directory and fingerprint is not None
+                else None
+            )
+
+            if path is not None and os.path.exists(path):
+                index = GridIndex.load(path)
+            else:
+                built, index = build()
+
+                if fingerprint is not None:
+                    key = built
+                    path = self._path(dataset, built) if self.directory else None
+
+                if path is not None and index is not None:
+                    os.makedirs(self.directory, exist_ok=True)
+
+                    # A crash mid-write must not leave a truncated index behind
+                    with open(f"{path}.tmp", "wb") as f:
+                        index.save(f)
+                    os.replace(f"{path}.tmp", path)
+
+            self._indexes[dataset] = (key, index)
+
+            return index
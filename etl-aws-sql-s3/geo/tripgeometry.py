@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+
+# Mean Earth radius (IUGG), in meters
+EARTH_RADIUS_METERS = 6371008.8
+
+FEATURES = [
+    "straight_line_meters",
+    "bearing_degrees",
+    "straight_line_ratio",
+    "speed_mps",
+]
+
+
+class TripGeometry(object):
+    """Geometry features of trips from their start and end GPS points, computed
+    with NumPy instead of PostGIS on the replica.
+
+    Trips are processed in batches of batch_size rows so the temporaries stay
+    bounded whatever the number of trips. In float32 mode every array, the
+    temporaries and the features take half the memory; the coordinates are
+    then rounded to about a meter, which the benchmark measures.
+    """
+
+    def __init__(
+        self, dtype="float64", batch_size=1_000_000, earth_radius=EARTH_RADIUS_METERS
+    ):
+        """
+        Input:
+        dtype STR: "float64" or "float32", type of the computation and features.
+        batch_size INT: Maximum number of trips per vectorized batch.
+        earth_radius FLOAT: Radius of the spherical Earth, in meters.
+        """
+        if dtype not in ("float64", "float32"):
+            raise ValueError(f"Unknown dtype {dtype}, expected float64 or float32")
+
+        self.dtype = np.dtype(dtype)
+        self.batch_size = batch_size
+        self.earth_radius = earth_radius
+
+    def _radians(self, *degrees):
+        return [np.radians(np.asarray(d, dtype=self.dtype)) for d in degrees]
+
+    def haversine(self, lat1, lng1, lat2, lng2):
+        """Great-circle distance in meters between two arrays of points, in degrees."""
+        lat1, lng1, lat2, lng2 = self._radians(lat1, lng1, lat2, lng2)
+
+        a = (
+            np.sin((lat2 - lat1) / 2) ** 2
+            + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+        )
+
+        # Rounding can push a just above 1 for antipodal points
+        return (2 * self.earth_radius) * np.arcsin(np.sqrt(np.minimum(a, 1)))
+
+    def bearing(self, lat1, lng1, lat2, lng2):
+        """Initial bearing in degrees clockwise from north, in [0, 360), from
+        the first points to the second ones."""
+        lat1, lng1, lat2, lng2 = self._radians(lat1, lng1, lat2, lng2)
+        dlng = lng2 - lng1
+
+        y = np.sin(dlng) * np.cos(lat2)
+        x = np.cos(lat1) * np.sin(lat2) - np.sin(lat1) * np.cos(lat2) * np.cos(dlng)
+
+        return np.degrees(np.arctan2(y, x)) % 360
+
+    def _ratio(self, numerator, denominator):
+        # NaN where the denominator is 0 or missing instead of inf
+        numerator = np.asarray(numerator, dtype=self.dtype)
+        denominator = np.asarray(denominator, dtype=self.dtype)
+
+        out = np.full(len(numerator), np.nan, dtype=self.dtype)
+        return np.divide(numerator, denominator, out=out, where=denominator > 0)
+
+    def features(self, trips):
+        """Compute the geometry features of trips.
+
+        Input:
+        trips DataFrame: start_gps_lat, start_gps_lng, end_gps_lat, end_gps_lng
+        in degrees, trip_distance_meters and trip_duration_seconds as reported.
+
+        Output:
+        DataFrame: On the index of trips, of dtype
+        straight_line_meters: Great-circle distance from the start to the end point.
+        bearing_degrees: Initial bearing from the start to the end point.
+        straight_line_ratio: straight_line_meters / trip_distance_meters, 1 for
+        a trip in a straight line, NaN when no distance is reported.
+        speed_mps: trip_distance_meters / trip_duration_seconds.
+        """
+        rows = len(trips)
+        out = {name: np.empty(rows, dtype=self.dtype) for name in FEATURES}
+
+        columns = [
+            trips[name].to_numpy(dtype=self.dtype, na_value=np.nan)
+            for name in (
+                "start_gps_lat",
+                "start_gps_lng",
+                "end_gps_lat",
+                "end_gps_lng",
+                "trip_distance_meters",
+                "trip_duration_seconds",
+            )
+        ]
+
+        for start in range(0, rows, self.batch_size):
+            batch = slice(start, start + self.batch_size)
+            lat1, lng1, lat2, lng2, distance, duration = (c[batch] for c in columns)
+
+            straight_line = self.haversine(lat1, lng1, lat2, lng2)
+
+            out["straight_line_meters"][batch] = straight_line
+            out["bearing_degrees"][batch] = self.bearing(lat1, lng1, lat2, lng2)
+            out["straight_line_ratio"][batch] = self._ratio(straight_line, distance)
+            out["speed_mps"][batch] = self._ratio(distance, duration)
+
+        return pd.DataFrame(out, index=trips.index)
+
+    def add_features(self, trips):
+        """Return trips with the columns of features added."""
+        return pd.concat([trips, self.features(trips)], axis=1)
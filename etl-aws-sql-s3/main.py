@@ -1,19 +1,53 @@
+import datetime
+import functools
+import logging
+import sys
 from booking.bookingsingestion import BookingsIngestion
 from customer.customersingestion import CustomersIngestion
+from runner import DagRunner
 from vehicle.vehiclesingestion import VehiclesIngestion
 
 
 if __name__ == "__main__":
     ci = CustomersIngestion()
-    vi = VehiclesIngestion()
-    bi = BookingsIngestion()
-
-    # ci.customersDf_full_s3Load()
-    ci.customersDf_delta_s3Load()
-    # vi.parkingAreasDf_full_s3Load()
-    vi.parkingAreasDf_delta_s3Load()
-    # vi.vehiclesDf_full_s3Load()
-    vi.vehiclesDf_delta_s3Load()
-    vi.vehicleEventsDf_delta_s3Load()
-    # bi.bookingsDf_full_s3Load()
-    bi.bookingsDf_delta_s3Load()
+
+    # One connection pool and one S3 client for the whole run
+    vi = VehiclesIngestion(resources=ci.resources)
+    bi = BookingsIngestion(resources=ci.resources)
+
+    # The datasets share no data, load them in parallel while capping the
+    # load on the replica and on S3
+    runner = DagRunner(ci.resources, max_workers=5, limits={"postgres": 3, "s3": 2})
+
+    # runner.add_task("customers", ci.customersDf_full_s3Load)
+    runner.add_task("customers", ci.customersDf_delta_s3Load)
+    # runner.add_task("parking_areas", vi.parkingAreasDf_full_s3Load)
+    runner.add_task("parking_areas", vi.parkingAreasDf_delta_s3Load)
+    # runner.add_task("vehicles", vi.vehiclesDf_full_s3Load)
+    runner.add_task("vehicles", vi.vehiclesDf_delta_s3Load)
+    runner.add_task("vehicle_events", vi.vehicleEventsDf_delta_s3Load)
+    # runner.add_task("bookings", bi.bookingsDf_full_s3Load)
+    runner.add_task("bookings", bi.bookingsDf_delta_s3Load)
+
+    # Yesterday's partitions are closed, merge their small delta files
+    yesterday = datetime.date.today() - datetime.timedelta(days=1)
+    for dataset in [
+        "customers",
+        "parking_areas",
+        "vehicles",
+        "vehicle_events",
+        "bookings",
+    ]:
+        runner.add_task(
+            f"compact_{dataset}",
+            functools.partial(ci.dataset_writer.compact, dataset, yesterday),
+            depends_on=[dataset],
+        )
+
+    results = runner.run()
+
+    logging.warning(f"Connection pool usage: {ci.resources.metrics()}")
+    ci.resources.close()
+
+    if any(result["status"] != "succeeded" for result in results.values()):
+        sys.exit(1)
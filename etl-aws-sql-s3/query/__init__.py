@@ -0,0 +1 @@
+from .queryregistry import QueryRegistry
@@ -0,0 +1,415 @@
+"""SQL of every dataset, by query name and variant.
+
+Values are passed as psycopg2 named parameters (%(name)s), never formatted
+into the SQL, so the planner sees typed values it can match against indexes.
+"""
+
+# created_on is the last booking created of each vehicle, the watermark of
+# the dataset is the latest of them
+BOOKINGS = """SELECT
+        vehicles.vehicle_id,
+        vehicles.vehicle_type,
+        COUNT(bookings.booking_id) AS total_bookings,
+        SUM(bookings.duration) AS total_duration,
+        AVG(bookings.duration) AS avg_duration,
+        MIN(bookings.start_time) AS earliest_booking,
+        MAX(bookings.end_time) AS latest_booking,
+        SUM(CASE WHEN bookings.is_cancelled THEN 1 ELSE 0 END) AS total_cancelled_bookings,
+        ROUND(SUM(CASE WHEN bookings.is_cancelled THEN 1 ELSE 0 END) / COUNT(bookings.booking_id) * 100, 2) AS cancellation_rate,
+        MAX(bookings.created_on) AS created_on
+    FROM
+        bookings
+    JOIN
+        vehicles
+    ON
+        bookings.vehicle_id = vehicles.vehicle_id
+    WHERE
+        vehicles.vehicle_type = 'micromobility'
+    GROUP BY
+        vehicles.vehicle_id,
+        vehicles.vehicle_type
+    ORDER BY
+        total_bookings DESC
+    ;"""
+
+# Trips started after the high-water mark %(since)s, "-infinity" for the full
+# load: first and last route point of each trip, then the trip itself, joined
+# on the trip id
+TRIPS_DELTA_START_POINTS = """SELECT DISTINCT ON (vehicle_trip_id) created_on as start_trip_date,
+            vehicle_trip_id,
+            gps_lat as start_gps_lat,
+            gps_lng as start_gps_lng
+
+    FROM mobility.opendata.vehicle_trip_route_point
+
+    WHERE created_on > %(since)s
+
+    ORDER BY vehicle_trip_id, created_on asc
+    ;"""
+
+TRIPS_DELTA_END_POINTS = """SELECT DISTINCT ON (vehicle_trip_id) created_on as end_trip_date,
+            vehicle_trip_id as vehicle_trip_id2,
+            gps_lat as end_gps_lat,
+            gps_lng as end_gps_lng
+
+    FROM mobility.opendata.vehicle_trip_route_point
+
+    WHERE created_on > %(since)s
+
+    ORDER BY vehicle_trip_id, created_on desc
+    ;"""
+
+TRIPS_DELTA_TRIPS = """SELECT id as vehicle_trip_id3, vehicle_type,
+            vehicle_id, provider_id, propulsion_type,
+            trip_duration_seconds, trip_distance_meters,
+            end_time, initial_odometer_km,
+            current_odometer_km, trip_id
+
+    FROM mobility.opendata.vehicle_trip
+
+    WHERE start_time > %(since)s
+
+    ORDER BY id
+    ;"""
+
+TRIP_COLUMNS = """
+        t.vehicle_type, t.vehicle_id, t.provider_id, t.propulsion_type,
+        t.trip_duration_seconds, t.trip_distance_meters,
+        t.end_time, t.initial_odometer_km,
+        t.current_odometer_km, t.trip_id"""
+
+# The same rows in a single query: one pass over the route points, joined to
+# the trips in Postgres. "default" takes the first and last point of each trip
+# with window functions over one sort of the delta.
+TRIPS_DELTA = f"""WITH route_points AS (
+        SELECT
+            vehicle_trip_id,
+            ROW_NUMBER() OVER w AS point_num,
+            FIRST_VALUE(created_on) OVER w AS start_trip_date,
+            FIRST_VALUE(gps_lat) OVER w AS start_gps_lat,
+            FIRST_VALUE(gps_lng) OVER w AS start_gps_lng,
+            LAST_VALUE(created_on) OVER w AS end_trip_date,
+            LAST_VALUE(gps_lat) OVER w AS end_gps_lat,
+            LAST_VALUE(gps_lng) OVER w AS end_gps_lng
+        FROM mobility.opendata.vehicle_trip_route_point
+        WHERE created_on > %(since)s
+        WINDOW w AS (
+            PARTITION BY vehicle_trip_id ORDER BY created_on
+            ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING
+        )
+    )
+
+    SELECT
+        p.vehicle_trip_id,
+        p.start_trip_date, p.start_gps_lat, p.start_gps_lng,
+        p.end_trip_date, p.end_gps_lat, p.end_gps_lng,{TRIP_COLUMNS}
+    FROM route_points p
+
+    INNER JOIN mobility.opendata.vehicle_trip t
+
+    ON t.id = p.vehicle_trip_id
+
+    WHERE p.point_num = 1
+    AND t.start_time > %(since)s
+
+    ORDER BY p.vehicle_trip_id
+    ;"""
+
+# "min_max" hash-aggregates the bounds of each trip without sorting the delta,
+# then fetches the two bounding points of each trip through the
+# (vehicle_trip_id, created_on) index. Each point is a single row, so its
+# latitude and longitude match even when several points share a timestamp.
+TRIPS_DELTA_MIN_MAX = f"""WITH bounds AS (
+        SELECT
+            vehicle_trip_id,
+            MIN(created_on) AS start_trip_date,
+            MAX(created_on) AS end_trip_date
+        FROM mobility.opendata.vehicle_trip_route_point
+        WHERE created_on > %(since)s
+        GROUP BY vehicle_trip_id
+    )
+
+    SELECT
+        b.vehicle_trip_id,
+        b.start_trip_date, s.gps_lat AS start_gps_lat, s.gps_lng AS start_gps_lng,
+        b.end_trip_date, e.gps_lat AS end_gps_lat, e.gps_lng AS end_gps_lng,{TRIP_COLUMNS}
+    FROM bounds b
+
+    CROSS JOIN LATERAL (
+        SELECT r.gps_lat, r.gps_lng
+        FROM mobility.opendata.vehicle_trip_route_point r
+        WHERE r.vehicle_trip_id = b.vehicle_trip_id
+        AND r.created_on = b.start_trip_date
+        LIMIT 1
+    ) s
+
+    CROSS JOIN LATERAL (
+        SELECT r.gps_lat, r.gps_lng
+        FROM mobility.opendata.vehicle_trip_route_point r
+        WHERE r.vehicle_trip_id = b.vehicle_trip_id
+        AND r.created_on = b.end_trip_date
+        LIMIT 1
+    ) e
+
+    INNER JOIN mobility.opendata.vehicle_trip t
+
+    ON t.id = b.vehicle_trip_id
+
+    WHERE t.start_time > %(since)s
+
+    ORDER BY b.vehicle_trip_id
+    ;"""
+
+PARKING_AREAS = """SELECT *
+    FROM generic.parking_area
+    ;"""
+
+# Points of the nearest-parking index of the trips, see GridIndex, with the
+# fingerprint of the rows read computed in the same statement the way
+# FingerprintStore.compute does, so the index is kept under the fingerprint of
+# exactly the points it holds
+PARKING_AREA_LOCATIONS = """SELECT
+        id, gps_lat, gps_lng,
+        count(*) OVER () AS row_count,
+        coalesce(sum(hashtext(locations::text)) OVER (), 0) AS checksum
+    FROM (SELECT id, gps_lat, gps_lng FROM generic.parking_area) AS locations
+    ;"""
+
+# Delta loads of the vehicle datasets take the rows created between
+# %(yesterday)s and %(today)s
+PARKING_AREAS_DELTA = """WITH parking_cte AS (
+        SELECT
+            area_id,
+            SUM(CASE WHEN status = 'occupied' THEN 1 ELSE 0 END) AS occupied_spaces,
+            SUM(CASE WHEN status = 'available' THEN 1 ELSE 0 END) AS available_spaces,
+            SUM(CASE WHEN status = 'reserved' THEN 1 ELSE 0 END) AS reserved_spaces,
+            COUNT(*) AS total_spaces
+        FROM generic-parking-areas
+        WHERE created_on <= %(today)s
+        AND created_on >= %(yesterday)s
+        GROUP BY area_id
+    )
+
+    SELECT
+        area_id,
+        occupied_spaces,
+        available_spaces,
+        reserved_spaces,
+        total_spaces,
+        ROUND(occupied_spaces / total_spaces::float, 2) AS occupancy_rate,
+        ROUND((available_spaces + reserved_spaces) / total_spaces::float, 2) AS availability_rate
+    FROM generic-parking
+    ORDER BY occupancy_rate DESC
+    ;"""
+
+# created_on is the watermark of the vehicle_events dataset
+VEHICLE_EVENTS = """SELECT
+    vehicle_id,
+    created_on,
+    event_time,
+    event_type,
+    event_location,
+    EXTRACT(MONTH FROM event_time) AS event_month,
+    EXTRACT(YEAR FROM event_time) AS event_year,
+    ROW_NUMBER() OVER (PARTITION BY vehicle_id ORDER BY event_time) AS event_num
+    FROM generic-vehicle-events;"""
+
+VEHICLE_EVENTS_DELTA = """WITH data_cte AS (
+        SELECT
+            vehicle_id,
+            event_time,
+            event_type,
+            event_location,
+            EXTRACT(MONTH FROM event_time) AS event_month,
+            EXTRACT(YEAR FROM event_time) AS event_year,
+            ROW_NUMBER() OVER (PARTITION BY vehicle_id ORDER BY event_time) AS event_num,
+            created_on
+        FROM generic-vehicle-events
+        WHERE created_on <= %(today)s
+        AND created_on >= %(yesterday)s
+    )
+
+    SELECT
+        vehicle_id,
+        event_type,
+        event_location,
+        event_month,
+        event_year,
+        COUNT(DISTINCT event_num) AS total_events,
+        COUNT(DISTINCT event_location) AS unique_locations,
+        COUNT(CASE WHEN event_type = 'maintenance' THEN 1 ELSE NULL END) AS maintenance_events,
+        AVG(TIMESTAMPDIFF(SECOND, LAG(event_time) OVER (PARTITION BY vehicle_id ORDER BY event_time), event_time)) AS avg_time_between_events,
+        MAX(created_on) AS created_on
+    FROM data_cte
+    GROUP BY vehicle_id, event_month, event_year
+    ;"""
+
+VEHICLES = """WITH data_cte AS (
+        SELECT
+            motorcycle_id,
+            purchase_date,
+            warranty_expiration_date,
+            DATEDIFF(day, purchase_date, warranty_expiration_date) AS warranty_duration,
+            ROUND(DATEDIFF(day, purchase_date, NOW())/365.25, 2) AS age_in_years,
+            (CASE
+                WHEN age_in_years > warranty_duration THEN 'out of warranty'
+                WHEN age_in_years <= warranty_duration THEN 'in warranty'
+                ELSE 'N/A'
+            END) AS warranty_status
+        FROM generic-vehicles
+    )
+
+    SELECT
+        motorcycle_id,
+        purchase_date,
+        warranty_expiration_date,
+        warranty_duration,
+        age_in_years,
+        warranty_status,
+        COUNT(*) OVER (PARTITION BY warranty_status) AS total_by_warranty_status
+    FROM data_cte
+    ORDER BY age_in_years DESC
+    ;"""
+
+VEHICLES_DELTA = """WITH data_cte AS (
+        SELECT
+            motorcycle_id,
+            purchase_date,
+            warranty_expiration_date,
+            DATEDIFF(day, purchase_date, warranty_expiration_date) AS warranty_duration,
+            ROUND(DATEDIFF(day, purchase_date, NOW())/365.25, 2) AS age_in_years,
+            (CASE
+                WHEN age_in_years > warranty_duration THEN 'out of warranty'
+                WHEN age_in_years <= warranty_duration THEN 'in warranty'
+                ELSE 'N/A'
+            END) AS warranty_status
+        FROM generic-vehicles
+        WHERE created_on <= %(today)s
+        AND created_on >= %(yesterday)s
+    )
+
+    SELECT
+        motorcycle_id,
+        purchase_date,
+        warranty_expiration_date,
+        warranty_duration,
+        age_in_years,
+        warranty_status,
+        COUNT(*) OVER (PARTITION BY warranty_status) AS total_by_warranty_status
+    FROM data_cte
+    ORDER BY age_in_years DESC
+    ;"""
+
+CUSTOMER_COLUMNS = """
+        u.id as user_id, u.locale, u.marketing_accepted,
+        u.privacy_accepted, u.created_on, u.updated_on,
+        p.city, p.street, p.postal_code, p.status, p.birth_date,
+        p.card_status as credit_card_status"""
+
+# Users and deleted users in one query, Postgres sets the deleted_user flag
+CUSTOMERS = f"""SELECT{CUSTOMER_COLUMNS},
+        FALSE as deleted_user
+    FROM
+        mobility.users.user u
+
+    INNER JOIN  mobility.users.profile p
+
+    ON u.id = p.user_id
+
+    UNION ALL
+
+    SELECT{CUSTOMER_COLUMNS},
+        TRUE as deleted_user
+    FROM
+        mobility.users.deleted_user u
+
+    INNER JOIN  mobility.users.deleted_profile p
+
+    ON u.id = p.user_id
+    ;"""
+
+# The same rows with one query per table, flagged in pandas
+CUSTOMERS_USERS = f"""SELECT{CUSTOMER_COLUMNS}
+    FROM
+        mobility.users.user u
+
+    INNER JOIN  mobility.users.profile p
+
+    ON u.id = p.user_id
+    ;"""
+
+CUSTOMERS_DELETED_USERS = f"""SELECT{CUSTOMER_COLUMNS}
+    FROM
+        mobility.users.deleted_user u
+
+    INNER JOIN  mobility.users.deleted_profile p
+
+    ON u.id = p.user_id
+    ;"""
+
+CUSTOMERS_DELTA_EVENTS = """WITH data_cte AS (
+        SELECT
+            user_id,
+            event_date,
+            event_type,
+            event_amount,
+            DATE_TRUNC('month', event_date) AS month,
+            DATE_TRUNC('year', event_date) AS year
+        FROM events
+    )
+
+    SELECT
+        user_id,
+        month,
+        year,
+        event_type,
+        SUM(event_amount) AS event_amount_sum,
+        COUNT(DISTINCT event_date) AS event_count,
+        AVG(event_amount) AS event_amount_avg
+    FROM data_cte
+    GROUP BY ROLLUP (user_id, month, year, event_type);"""
+
+CUSTOMERS_DELTA_PURCHASES = """WITH data_cte AS (
+        SELECT
+            user_id,
+            event_date,
+            event_type,
+            CASE
+                WHEN event_type = 'purchase' THEN event_amount
+                ELSE 0
+            END AS purchase_amount,
+            CASE
+                WHEN event_type = 'refund' THEN event_amount
+                ELSE 0
+            END AS refund_amount
+        FROM events
+    )
+    SELECT
+        user_id,
+        SUM(purchase_amount) - SUM(refund_amount) AS net_purchases,
+        SUM(CASE WHEN event_type = 'purchase' THEN 1 ELSE 0 END) AS total_purchases,
+        SUM(CASE WHEN event_type = 'refund' THEN 1 ELSE 0 END) AS total_refunds
+    FROM data_cte
+    GROUP BY user_id"""
+
+# Query name -> variant -> SQL. Every query has a "default" variant, the one
+# the ingestion classes run.
+QUERIES = {
+    "bookings": {"default": BOOKINGS},
+    "trips_delta_start_points": {"default": TRIPS_DELTA_START_POINTS},
+    "trips_delta_end_points": {"default": TRIPS_DELTA_END_POINTS},
+    "trips_delta_trips": {"default": TRIPS_DELTA_TRIPS},
+    "trips_delta": {"default": TRIPS_DELTA, "min_max": TRIPS_DELTA_MIN_MAX},
+    "parking_areas": {"default": PARKING_AREAS},
+    "parking_area_locations": {"default": PARKING_AREA_LOCATIONS},
+    "parking_areas_delta": {"default": PARKING_AREAS_DELTA},
+    "vehicle_events": {"default": VEHICLE_EVENTS},
+    "vehicle_events_delta": {"default": VEHICLE_EVENTS_DELTA},
+    "vehicles": {"default": VEHICLES},
+    "vehicles_delta": {"default": VEHICLES_DELTA},
+    "customers": {"default": CUSTOMERS},
+    "customers_users": {"default": CUSTOMERS_USERS},
+    "customers_deleted_users": {"default": CUSTOMERS_DELETED_USERS},
+    "customers_delta_events": {"default": CUSTOMERS_DELTA_EVENTS},
+    "customers_delta_purchases": {"default": CUSTOMERS_DELTA_PURCHASES},
+}
@@ -0,0 +1,67 @@
+import json
+from .queries import QUERIES
+
+
+class QueryRegistry(object):
+    """SQL of every dataset by query name, each with one or more named
+    variants: alternative SQL returning the same rows, compared with explain."""
+
+    def __init__(self, queries=None):
+        """
+        Input:
+        queries DICT: Query name -> variant -> SQL, QUERIES if None.
+        """
+        self.queries = QUERIES if queries is None else queries
+
+    def names(self):
+        return list(self.queries)
+
+    def variants(self, name):
+        """Return the variant names of the query name."""
+        if name not in self.queries:
+            raise ValueError(f"Unknown query {name}, expected one of {self.names()}")
+
+        return list(self.queries[name])
+
+    def sql(self, name, variant="default"):
+        """Return the SQL of a query variant, with %(name)s placeholders to be
+        passed as params to read_sql or iter_batches, never formatted in."""
+        variants = self.variants(name)
+
+        if variant not in variants:
+            raise ValueError(
+                f"Unknown variant {variant} of {name}, expected one of {variants}"
+            )
+
+        return self.queries[name][variant]
+
+    def explain(self, conn, name, variant="default", params=None, analyze=True):
+        """Run EXPLAIN on a query variant.
+
+        Input:
+        conn psycopg2 connection: The transaction is rolled back afterwards,
+        EXPLAIN ANALYZE executes the query.
+        name STR: Query name.
+        variant STR: Variant name.
+        params DICT: Values of the query placeholders.
+        analyze BOOL: Execute the query and report actual times and buffers,
+        otherwise only the estimated plan.
+
+        Output:
+        DICT: The JSON plan, with "Plan", "Planning Time" and "Execution Time"
+        (milliseconds) keys; the shared buffer counts are in "Plan".
+        """
+        options = "ANALYZE, BUFFERS, FORMAT JSON" if analyze else "FORMAT JSON"
+
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(f"EXPLAIN ({options}) {self.sql(name, variant)}", params)
+                plan = cursor.fetchone()[0]
+        finally:
+            conn.rollback()
+
+        # psycopg2 parses json columns, some servers return the plan as text
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+
+        return plan[0]
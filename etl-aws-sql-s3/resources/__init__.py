@@ -0,0 +1 @@
+from .resourceregistry import ResourceRegistry
@@ -0,0 +1,179 @@
+import contextlib
+import threading
+import time
+import urllib.parse
+import boto3
+from botocore.config import Config as BotoConfig
+from psycopg2.pool import ThreadedConnectionPool
+
+
+class ResourceRegistry(object):
+    """Process-wide Postgres connection pool and S3 client.
+
+    Every ingestion class gets its connections and its S3 client from the
+    same registry, so a run opens at most max_connections connections and a
+    single S3 client whatever the number of datasets being loaded.
+    """
+
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(
+        self,
+        connection_params,
+        s3_params,
+        min_connections=1,
+        max_connections=4,
+        max_pool_connections=32,
+    ):
+        self.connection_params = connection_params
+        self.s3_params = s3_params
+        self.min_connections = min_connections
+        self.max_connections = max_connections
+        self.max_pool_connections = max_pool_connections
+
+        self._lock = threading.Lock()
+        self._pool = None
+        self._s3c = None
+
+        # ThreadedConnectionPool raises when it is exhausted, callers wait here instead
+        self._connection_slots = threading.BoundedSemaphore(max_connections)
+
+        # Optional per-source concurrency caps, e.g. {"postgres": 3, "s3": 2}
+        self._limits = {}
+
+        self._metrics = {"in_use": 0}
+        self.reset_metrics()
+
+    @classmethod
+    def default(cls, *args, **kwargs):
+        """Return the registry of the process, creating it on the first call.
+        Arguments are ignored once it exists.
+        """
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls(*args, **kwargs)
+
+            return cls._default
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadedConnectionPool(
+                    self.min_connections, self.max_connections, **self.connection_params
+                )
+
+            return self._pool
+
+    def set_limit(self, source, max_concurrent):
+        """Allow at most max_concurrent concurrent uses of source ("postgres",
+        "s3", ...). Set limits before work starts, not while it runs.
+        """
+        self._limits[source] = threading.BoundedSemaphore(max_concurrent)
+
+    @contextlib.contextmanager
+    def limit(self, source):
+        """Hold one of the slots of source for the duration of the block."""
+        semaphore = self._limits.get(source)
+
+        if semaphore is None:
+            yield
+        else:
+            with semaphore:
+                yield
+
+    @contextlib.contextmanager
+    def connection(self):
+        """Check a connection out of the pool for the duration of the block."""
+        with self.limit("postgres"), self._checkout() as conn:
+            yield conn
+
+    @contextlib.contextmanager
+    def connection_slot(self):
+        """Hold a connection slot for the duration of the block, for a
+        connection opened outside of the pool (e.g. by an Arrow-native driver),
+        so it still counts against max_connections and the "postgres" limit.
+        """
+        with self.limit("postgres"):
+            self._connection_slots.acquire()
+            try:
+                yield
+            finally:
+                self._connection_slots.release()
+
+    def connection_uri(self):
+        """Return the connection parameters as a postgresql:// URI."""
+        params = self.connection_params
+        quote = urllib.parse.quote
+
+        return (
+            f"postgresql://{quote(str(params['user']), safe='')}"
+            f":{quote(str(params['password']), safe='')}"
+            f"@{params['host']}:{params['port']}/{params['database']}"
+        )
+
+    @contextlib.contextmanager
+    def _checkout(self):
+        started = time.perf_counter()
+        self._connection_slots.acquire()
+
+        conn = None
+        try:
+            conn = self._get_pool().getconn()
+
+            waited = time.perf_counter() - started
+            with self._lock:
+                self._metrics["checkouts"] += 1
+                self._metrics["wait_seconds"] += waited
+                self._metrics["max_wait_seconds"] = max(
+                    self._metrics["max_wait_seconds"], waited
+                )
+                self._metrics["in_use"] += 1
+                self._metrics["max_in_use"] = max(
+                    self._metrics["max_in_use"], self._metrics["in_use"]
+                )
+
+            yield conn
+        finally:
+            if conn is not None:
+                # putconn rolls back whatever transaction was left open
+                self._get_pool().putconn(conn)
+                with self._lock:
+                    self._metrics["in_use"] -= 1
+            self._connection_slots.release()
+
+    def s3_client(self):
+        """Return the shared S3 client. boto3 clients are thread safe, the pool
+        is sized so concurrent uploads do not wait for an HTTP connection.
+        """
+        with self._lock:
+            if self._s3c is None:
+                self._s3c = boto3.session.Session().client(
+                    "s3",
+                    config=BotoConfig(max_pool_connections=self.max_pool_connections),
+                    **self.s3_params,
+                )
+
+            return self._s3c
+
+    def metrics(self):
+        with self._lock:
+            return dict(self._metrics)
+
+    def reset_metrics(self):
+        """Start a new run. Connections still checked out stay counted."""
+        with self._lock:
+            self._metrics.update(
+                {
+                    "checkouts": 0,
+                    "wait_seconds": 0.0,
+                    "max_wait_seconds": 0.0,
+                    "max_in_use": self._metrics["in_use"],
+                }
+            )
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.closeall()
+                self._pool = None
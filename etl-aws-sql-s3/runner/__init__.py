@@ -0,0 +1 @@
+from .dagrunner import DagRunner
@@ -0,0 +1,133 @@
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class DagRunner(object):
+    """Run dataset loads as a task graph on a thread pool.
+
+    A task starts as soon as all of its dependencies succeeded. When a task
+    fails, only the tasks depending on it (directly or not) are skipped, the
+    rest of the graph keeps running.
+
+    Per-source limits are enforced by the resource registry: every query holds
+    a "postgres" slot and every upload an "s3" slot, whatever task runs them.
+    """
+
+    def __init__(self, resources=None, max_workers=4, limits=None):
+        self.resources = resources
+        self.max_workers = max_workers
+        self.tasks = {}
+
+        for source, max_concurrent in (limits or {}).items():
+            resources.set_limit(source, max_concurrent)
+
+    def add_task(self, name, fn, depends_on=()):
+        """Register a task.
+
+        Input:
+        name STR: Unique task name.
+        fn CALLABLE: Called without arguments. It may return the dict of
+        DatasetWriter (rows and bytes are then reported) or None.
+        depends_on LIST: Names of the tasks that must succeed first.
+        """
+        if name in self.tasks:
+            raise ValueError(f"Task {name} is already registered")
+
+        self.tasks[name] = {"fn": fn, "depends_on": list(depends_on)}
+
+    def _check_graph(self):
+        for name, task in self.tasks.items():
+            for dependency in task["depends_on"]:
+                if dependency not in self.tasks:
+                    raise ValueError(
+                        f"Task {name} depends on unknown task {dependency}"
+                    )
+
+        # Kahn's algorithm, whatever is left has a cycle
+        remaining = {name: set(task["depends_on"]) for name, task in self.tasks.items()}
+        while remaining:
+            ready = [name for name, deps in remaining.items() if not deps]
+            if not ready:
+                raise ValueError(f"Dependency cycle between tasks {sorted(remaining)}")
+            for name in ready:
+                del remaining[name]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+
+    def _run_task(self, name):
+        started = time.perf_counter()
+
+        try:
+            output = self.tasks[name]["fn"]()
+        except Exception as error:
+            logging.exception(f"Task {name} failed")
+            return {
+                "status": "failed",
+                "wall_seconds": time.perf_counter() - started,
+                "error": repr(error),
+            }
+
+        output = output if isinstance(output, dict) else {}
+
+        return {
+            "status": "succeeded",
+            "wall_seconds": time.perf_counter() - started,
+            "rows": output.get("rows"),
+            "bytes": output.get("bytes"),
+        }
+
+    def _skip_dependents(self, failed, results):
+        for name, task in self.tasks.items():
+            if failed in task["depends_on"] and name not in results:
+                results[name] = {
+                    "status": "skipped",
+                    "error": f"{failed} did not succeed",
+                }
+                self._skip_dependents(name, results)
+
+    def run(self):
+        """Run every task and return {task name: result}.
+
+        A result has a status ("succeeded", "failed" or "skipped") and, for
+        tasks that ran, the wall time, rows, bytes and error if any.
+        """
+        self._check_graph()
+
+        results, running = {}, {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while len(results) < len(self.tasks):
+                for name, task in self.tasks.items():
+                    if name in results or name in running.values():
+                        continue
+                    if all(
+                        results.get(dependency, {}).get("status") == "succeeded"
+                        for dependency in task["depends_on"]
+                    ):
+                        running[executor.submit(self._run_task, name)] = name
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    name = running.pop(future)
+                    results[name] = future.result()
+
+                    if results[name]["status"] == "failed":
+                        self._skip_dependents(name, results)
+
+        self._report(results)
+
+        return results
+
+    def _report(self, results):
+        for name, result in results.items():
+            logging.warning(
+                f"{name}: {result['status']}"
+                f" wall={result.get('wall_seconds', 0):.1f}s"
+                f" rows={result.get('rows')} bytes={result.get('bytes')}"
+                + (f" error={result['error']}" if "error" in result else "")
+            )
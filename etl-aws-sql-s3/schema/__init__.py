@@ -0,0 +1 @@
+from .schemaregistry import DatasetSchema, SchemaRegistry
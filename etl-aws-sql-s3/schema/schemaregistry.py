@@ -0,0 +1,198 @@
+import numpy as np
+import pandas as pd
+import pyarrow
+
+# Declared type -> Arrow type. Timestamps keep the time zone of the source.
+ARROW_TYPES = {
+    "category": pyarrow.dictionary(pyarrow.int32(), pyarrow.string()),
+    "int32": pyarrow.int32(),
+    "float32": pyarrow.float32(),
+    "timestamp": pyarrow.timestamp("us"),
+}
+
+# Columns of each dataset whose default type wastes memory: low-cardinality
+# strings, small counts and ratios. Ids, amounts and GPS coordinates keep their
+# 64-bit types, float32 would round them.
+DATASET_SCHEMAS = {
+    "bookings": {
+        "vehicle_type": "category",
+        "total_bookings": "int32",
+        "avg_duration": "float32",
+        "earliest_booking": "timestamp",
+        "latest_booking": "timestamp",
+        "total_cancelled_bookings": "int32",
+        "cancellation_rate": "float32",
+        "created_on": "timestamp",
+    },
+    "customers": {
+        "locale": "category",
+        "city": "category",
+        "status": "category",
+        "credit_card_status": "category",
+        "created_on": "timestamp",
+        "updated_on": "timestamp",
+        "event_type": "category",
+        "month": "timestamp",
+        "year": "timestamp",
+        "event_count": "int32",
+        "total_purchases": "int32",
+        "total_refunds": "int32",
+    },
+    "trips": {
+        "start_trip_date": "timestamp",
+        "end_trip_date": "timestamp",
+        "end_time": "timestamp",
+        "vehicle_type": "category",
+        "propulsion_type": "category",
+        "trip_duration_seconds": "int32",
+        "trip_distance_meters": "float32",
+        "initial_odometer_km": "float32",
+        "current_odometer_km": "float32",
+        "straight_line_meters": "float32",
+        "bearing_degrees": "float32",
+        "straight_line_ratio": "float32",
+        "speed_mps": "float32",
+        "end_parking_distance_meters": "float32",
+    },
+    "vehicle_events": {
+        "event_time": "timestamp",
+        "event_type": "category",
+        "event_month": "int32",
+        "event_year": "int32",
+        "event_num": "int32",
+        "total_events": "int32",
+        "unique_locations": "int32",
+        "maintenance_events": "int32",
+        "avg_time_between_events": "float32",
+        "created_on": "timestamp",
+    },
+    "vehicles": {
+        "warranty_duration": "int32",
+        "age_in_years": "float32",
+        "warranty_status": "category",
+        "total_by_warranty_status": "int32",
+    },
+    "parking_areas": {
+        "status": "category",
+        "occupied_spaces": "int32",
+        "available_spaces": "int32",
+        "reserved_spaces": "int32",
+        "total_spaces": "int32",
+        "occupancy_rate": "float32",
+        "availability_rate": "float32",
+    },
+}
+
+
+class DatasetSchema(object):
+    """Target types of some columns of a dataset.
+
+    Columns are declared as "category" (pandas category, Parquet dictionary),
+    "int32", "float32" or "timestamp" (microseconds, time zone of the source).
+    Columns that are not declared, or not in the data, are left as they are,
+    so one schema covers the full and the delta queries of a dataset.
+    """
+
+    def __init__(self, columns):
+        unknown = set(columns.values()) - set(ARROW_TYPES)
+        if unknown:
+            raise ValueError(f"Unknown column types {unknown}")
+
+        self.columns = dict(columns)
+
+    def _int32(self, name, column):
+        values = column.dropna()
+        info = np.iinfo(np.int32)
+        if len(values) and (values.min() < info.min or values.max() > info.max):
+            raise ValueError(f"Column {name} does not fit in int32")
+
+        return column.astype("Int32" if len(values) < len(column) else "int32")
+
+    @staticmethod
+    def _timestamp(column):
+        try:
+            column = pd.to_datetime(column)
+        except ValueError:
+            # Offsets that differ from row to row, e.g. across a DST change
+            column = pd.to_datetime(column, utc=True)
+
+        tz = column.dt.tz
+        return column.astype(f"datetime64[us, {tz}]" if tz else "datetime64[us]")
+
+    def apply(self, df):
+        """Convert the declared columns of df in place.
+
+        Input:
+        df DataFrame: Rows as extracted, e.g. by read_sql.
+
+        Output:
+        DataFrame: df, with the declared dtypes.
+        """
+        for name, column_type in self.columns.items():
+            if name not in df.columns:
+                continue
+
+            column = df[name]
+            if column_type == "category":
+                df[name] = column.astype("category")
+            elif column_type == "int32":
+                df[name] = self._int32(name, column)
+            elif column_type == "float32":
+                df[name] = column.astype("float32")
+            else:
+                df[name] = self._timestamp(column)
+
+        return df
+
+    def arrow_schema(self, schema):
+        """Return the Arrow schema with the declared types substituted."""
+        fields = []
+        for field in schema:
+            column_type = self.columns.get(field.name)
+
+            if column_type is None:
+                fields.append(field)
+            elif column_type == "timestamp" and pyarrow.types.is_timestamp(field.type):
+                fields.append(
+                    field.with_type(pyarrow.timestamp("us", tz=field.type.tz))
+                )
+            else:
+                fields.append(field.with_type(ARROW_TYPES[column_type]))
+
+        return pyarrow.schema(fields, metadata=schema.metadata)
+
+    def apply_arrow(self, data):
+        """Cast a pyarrow Table or RecordBatch to the declared types."""
+        schema = self.arrow_schema(data.schema)
+
+        if schema.equals(data.schema):
+            return data
+
+        return data.cast(schema)
+
+
+class SchemaRegistry(object):
+    """Schemas of the datasets, by dataset name. A dataset without a schema
+    keeps the types it is extracted with.
+    """
+
+    def __init__(self, schemas=None):
+        self.schemas = {
+            dataset: DatasetSchema(columns)
+            for dataset, columns in (
+                DATASET_SCHEMAS if schemas is None else schemas
+            ).items()
+        }
+
+    def get(self, dataset):
+        return self.schemas.get(dataset)
+
+    def apply(self, dataset, df):
+        """Apply the schema of dataset to a DataFrame, see DatasetSchema.apply."""
+        schema = self.get(dataset)
+        return df if schema is None else schema.apply(df)
+
+    def apply_arrow(self, dataset, data):
+        """Cast a Table or RecordBatch to the schema of dataset."""
+        schema = self.get(dataset)
+        return data if schema is None else schema.apply_arrow(data)
@@ -0,0 +1,3 @@
+from .datasetwriter import DatasetWriter
+from .parquetoptions import ParquetOptions
+from .s3sink import S3MultipartSink
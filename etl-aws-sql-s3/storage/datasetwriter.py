@@ -0,0 +1,379 @@
+import contextlib
+import datetime
+import io
+import logging
+import re
+import pandas as pd
+import pyarrow
+import pyarrow.parquet as pq
+from .parquetoptions import ParquetOptions
+from .s3sink import S3MultipartSink
+
+
+class DatasetWriter(object):
+    """Append-only, Hive-style partitioned Parquet datasets on S3.
+
+    Every load lands as a new file under
+    {prefix}/dataset={dataset}/date=YYYY-MM-DD/part-NNNN.parquet, so the cost of
+    a write only depends on the size of the load, not on what is already stored.
+    """
+
+    PART_PATTERN = re.compile(r"part-(\d+)\.parquet$")
+
+    def __init__(
+        self,
+        s3c,
+        bucket,
+        prefix,
+        compaction_target_bytes=128 * 1024**2,
+        part_size=8 * 1024**2,
+        max_parts_in_flight=4,
+        upload_slot=None,
+        schemas=None,
+        parquet_options=None,
+    ):
+        self.s3c = s3c
+        self.bucket = bucket
+        self.prefix = prefix.rstrip("/")
+        self.compaction_target_bytes = compaction_target_bytes
+        self.part_size = part_size
+        self.max_parts_in_flight = max_parts_in_flight
+
+        # Callable returning a context manager held while a file is uploaded,
+        # used to cap the number of concurrent uploads
+        self.upload_slot = upload_slot or contextlib.nullcontext
+
+        # SchemaRegistry, every file of a dataset is written with its declared
+        # types so part files written by different loads can be read together
+        self.schemas = schemas
+
+        self.parquet_options = parquet_options or ParquetOptions()
+
+    def _dataset_prefix(self, dataset):
+        return f"{self.prefix}/dataset={dataset}/"
+
+    def _partition_prefix(self, dataset, partition_date):
+        return f"{self._dataset_prefix(dataset)}date={partition_date:%F}/"
+
+    def _list_objects(self, prefix):
+        paginator = self.s3c.get_paginator("list_objects_v2")
+
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            for obj in page.get("Contents", []):
+                if self.PART_PATTERN.search(obj["Key"]):
+                    yield obj
+
+    def _next_part_key(self, partition_prefix):
+        part_numbers = [
+            int(self.PART_PATTERN.search(obj["Key"]).group(1))
+            for obj in self._list_objects(partition_prefix)
+        ]
+
+        return f"{partition_prefix}part-{max(part_numbers, default=-1) + 1:04d}.parquet"
+
+    def _delete_keys(self, keys):
+        # delete_objects accepts at most 1000 keys per call
+        for i in range(0, len(keys), 1000):
+            self.s3c.delete_objects(
+                Bucket=self.bucket,
+                Delete={"Objects": [{"Key": key} for key in keys[i : i + 1000]]},
+            )
+
+    def _sink(self, key):
+        return S3MultipartSink(
+            self.s3c,
+            self.bucket,
+            key,
+            part_size=self.part_size,
+            max_in_flight=self.max_parts_in_flight,
+        )
+
+    @staticmethod
+    def _with_metadata(schema, metadata):
+        # Key-value metadata lands in the Parquet footer, next to the schema
+        if not metadata:
+            return schema
+
+        return schema.with_metadata({**(schema.metadata or {}), **metadata})
+
+    def _cast(self, dataset, data):
+        if self.schemas is None:
+            return data
+
+        return self.schemas.apply_arrow(dataset, data)
+
+    def _put_table(self, key, table, metadata=None):
+        table = table.replace_schema_metadata(
+            self._with_metadata(table.schema, metadata).metadata
+        )
+
+        with self.upload_slot(), self._sink(key) as sink:
+            pq.write_table(
+                table,
+                sink,
+                row_group_size=self.parquet_options.row_group_size,
+                **self.parquet_options.writer_kwargs(),
+            )
+
+        return sink.tell()
+
+    def _put_batches(self, key, batches, metadata=None):
+        # Row groups go straight into the multipart upload as they are encoded
+        with self.upload_slot(), self._sink(key) as sink:
+            writer, rows = None, 0
+            for batch in batches:
+                if writer is None:
+                    writer = pq.ParquetWriter(
+                        sink,
+                        self._with_metadata(batch.schema, metadata),
+                        **self.parquet_options.writer_kwargs(),
+                    )
+                writer.write_batch(
+                    batch, row_group_size=self.parquet_options.row_group_size
+                )
+                rows += batch.num_rows
+
+            if writer is None:
+                raise ValueError(f"No record batches to write to {key}")
+            writer.close()
+
+        return rows, sink.tell()
+
+    def partitions(self, dataset):
+        """List the partition dates of a dataset.
+
+        Input:
+        dataset STR: Dataset name, e.g. "trips".
+
+        Output:
+        List: datetime.date of every partition, oldest first.
+        """
+        paginator = self.s3c.get_paginator("list_objects_v2")
+
+        dates = []
+        for page in paginator.paginate(
+            Bucket=self.bucket, Prefix=self._dataset_prefix(dataset), Delimiter="/"
+        ):
+            for common_prefix in page.get("CommonPrefixes", []):
+                partition = common_prefix["Prefix"].rstrip("/").rsplit("date=", 1)[-1]
+                dates.append(datetime.date.fromisoformat(partition))
+
+        return sorted(dates)
+
+    def append(self, dataset, df, partition_date=None, metadata=None):
+        """Write df as a new part file of the partition_date partition.
+
+        Input:
+        dataset STR: Dataset name, e.g. "trips".
+        df DataFrame: Rows to append.
+        partition_date DATE: Partition to write into, today by default.
+        metadata DICT: Optional str -> str key-value metadata for the file footer.
+
+        Output:
+        Dict: S3 key, number of rows and bytes written.
+        """
+        partition_date = partition_date or datetime.date.today()
+
+        key = self._next_part_key(self._partition_prefix(dataset, partition_date))
+
+        table = self._cast(dataset, pyarrow.Table.from_pandas(df, preserve_index=None))
+
+        written_bytes = self._put_table(key, table, metadata)
+
+        logging.info(f"Appended {len(df)} rows ({written_bytes} bytes) to {key}")
+
+        return {"key": key, "rows": len(df), "bytes": written_bytes}
+
+    def append_batches(self, dataset, batches, partition_date=None, metadata=None):
+        """Stream Arrow record batches into a new part file, one row group per
+        batch. Same as append otherwise.
+        """
+        partition_date = partition_date or datetime.date.today()
+
+        key = self._next_part_key(self._partition_prefix(dataset, partition_date))
+
+        rows, written_bytes = self._put_batches(
+            key, (self._cast(dataset, batch) for batch in batches), metadata
+        )
+
+        logging.info(f"Appended {rows} rows ({written_bytes} bytes) to {key}")
+
+        return {"key": key, "rows": rows, "bytes": written_bytes}
+
+    def _replace(self, dataset, write):
+        stale_keys = [
+            obj["Key"] for obj in self._list_objects(self._dataset_prefix(dataset))
+        ]
+
+        result = write()
+
+        self._delete_keys([key for key in stale_keys if key != result["key"]])
+
+        return result
+
+    def overwrite(self, dataset, df, partition_date=None, metadata=None):
+        """Replace the whole dataset with df. Meant for full loads."""
+        return self._replace(
+            dataset, lambda: self.append(dataset, df, partition_date, metadata)
+        )
+
+    def overwrite_batches(self, dataset, batches, partition_date=None, metadata=None):
+        """Replace the whole dataset with the streamed record batches."""
+        return self._replace(
+            dataset,
+            lambda: self.append_batches(dataset, batches, partition_date, metadata),
+        )
+
+    def read(self, dataset, columns=None, partition_date=None):
+        """Read every part file of a dataset, or of one of its partitions, into
+        a single DataFrame."""
+        prefix = (
+            self._dataset_prefix(dataset)
+            if partition_date is None
+            else self._partition_prefix(dataset, partition_date)
+        )
+
+        tables = []
+        for obj in self._list_objects(prefix):
+            body = self.s3c.get_object(Bucket=self.bucket, Key=obj["Key"])["Body"]
+            tables.append(
+                self._cast(
+                    dataset, pq.read_table(io.BytesIO(body.read()), columns=columns)
+                )
+            )
+
+        if not tables:
+            return pd.DataFrame(columns=columns)
+
+        return pyarrow.concat_tables(tables).to_pandas()
+
+    def read_latest(self, dataset, columns=None):
+        """Read the newest partition of a dataset, where the last load landed.
+
+        Input:
+        dataset STR: Dataset name, e.g. "trips".
+        columns LIST: Columns to read, all if None.
+
+        Output:
+        DataFrame: Rows of the newest partition, empty if the dataset has none.
+        """
+        partitions = self.partitions(dataset)
+
+        if not partitions:
+            return pd.DataFrame(columns=columns)
+
+        return self.read(dataset, columns, partitions[-1])
+
+    def read_metadata(self, dataset):
+        """Return the key-value metadata of the newest part file of a dataset.
+
+        Only the Parquet footer is downloaded, with two ranged GETs.
+
+        Input:
+        dataset STR: Dataset name, e.g. "trips".
+
+        Output:
+        Dict: str -> str metadata, empty if the dataset has no file.
+        """
+        # date=YYYY-MM-DD/part-NNNN keys sort in write order
+        newest = max(
+            (obj["Key"] for obj in self._list_objects(self._dataset_prefix(dataset))),
+            default=None,
+        )
+
+        if newest is None:
+            return {}
+
+        def _tail(length):
+            return self.s3c.get_object(
+                Bucket=self.bucket, Key=newest, Range=f"bytes=-{length}"
+            )["Body"].read()
+
+        # A Parquet file ends with <footer><footer length, 4 bytes LE>PAR1
+        footer_length = int.from_bytes(_tail(8)[:4], "little")
+        footer = pq.read_metadata(
+            pyarrow.BufferReader(b"PAR1" + _tail(footer_length + 8))
+        )
+
+        return {
+            key.decode(): value.decode()
+            for key, value in (footer.metadata or {}).items()
+            if key != b"ARROW:schema"
+        }
+
+    def compact(self, dataset, partition_date):
+        """Merge the small files of a partition into files of about
+        compaction_target_bytes each.
+
+        New files are written before the small ones are deleted, so a reader
+        can see duplicated rows while compaction runs but never missing ones.
+
+        Input:
+        dataset STR: Dataset name, e.g. "trips".
+        partition_date DATE: Partition to compact.
+
+        Output:
+        Int: Number of files that have been merged.
+        """
+        partition_prefix = self._partition_prefix(dataset, partition_date)
+
+        small_files = [
+            obj
+            for obj in self._list_objects(partition_prefix)
+            if obj["Size"] < self.compaction_target_bytes
+        ]
+
+        if len(small_files) < 2:
+            return 0
+
+        # Group the small files in batches that add up to the target size
+        batches, batch, batch_size = [], [], 0
+        for obj in sorted(small_files, key=lambda obj: obj["Key"]):
+            if batch and batch_size + obj["Size"] > self.compaction_target_bytes:
+                batches.append(batch)
+                batch, batch_size = [], 0
+            batch.append(obj)
+            batch_size += obj["Size"]
+        batches.append(batch)
+
+        merged_keys = []
+        for batch in batches:
+            if len(batch) < 2:
+                continue
+
+            # Files written before a schema change are cast to the current one
+            tables = [
+                self._cast(
+                    dataset,
+                    pq.read_table(
+                        io.BytesIO(
+                            self.s3c.get_object(Bucket=self.bucket, Key=obj["Key"])[
+                                "Body"
+                            ].read()
+                        )
+                    ),
+                )
+                for obj in batch
+            ]
+
+            # Keep the metadata of the newest file, read_metadata relies on it
+            merged = pyarrow.concat_tables(tables).replace_schema_metadata(
+                tables[-1].schema.metadata
+            )
+
+            self._put_table(self._next_part_key(partition_prefix), merged)
+            merged_keys.extend(obj["Key"] for obj in batch)
+
+        self._delete_keys(merged_keys)
+
+        logging.info(f"Compacted {len(merged_keys)} files in {partition_prefix}")
+
+        return len(merged_keys)
+
+    def compact_before(self, dataset, before):
+        """Compact every partition older than before, e.g. all closed days."""
+        return sum(
+            self.compact(dataset, partition_date)
+            for partition_date in self.partitions(dataset)
+            if partition_date < before
+        )
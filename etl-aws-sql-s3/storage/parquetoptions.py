@@ -0,0 +1,46 @@
+import pyarrow
+
+
+class ParquetOptions(object):
+    """Encoding settings shared by every Parquet file the ingestion writes.
+
+    zstd compresses about as well as gzip at several times its encode and
+    decode speed; snappy and lz4 are faster still but larger. Row groups are
+    the unit readers skip with the page statistics and decode in parallel.
+    """
+
+    def __init__(
+        self,
+        compression="zstd",
+        compression_level=None,
+        row_group_size=1_000_000,
+        use_dictionary=True,
+        write_statistics=True,
+    ):
+        """
+        Input:
+        compression STR: "zstd", "snappy", "gzip", "lz4", "brotli" or "none".
+        compression_level INT: Codec level, None for the codec default.
+        row_group_size INT: Maximum number of rows per row group.
+        use_dictionary BOOL or LIST: Dictionary-encode every column, or only
+        the listed ones.
+        write_statistics BOOL or LIST: Write min/max page statistics for every
+        column, or only the listed ones.
+        """
+        if compression != "none" and not pyarrow.Codec.is_available(compression):
+            raise ValueError(f"Parquet compression {compression} is not available")
+
+        self.compression = compression
+        self.compression_level = compression_level
+        self.row_group_size = row_group_size
+        self.use_dictionary = use_dictionary
+        self.write_statistics = write_statistics
+
+    def writer_kwargs(self):
+        """Keyword arguments of pyarrow.parquet.ParquetWriter and write_table."""
+        return dict(
+            compression=self.compression,
+            compression_level=self.compression_level,
+            use_dictionary=self.use_dictionary,
+            write_statistics=self.write_statistics,
+        )
@@ -0,0 +1,174 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from botocore.exceptions import BotoCoreError, ClientError
+
+
+class S3MultipartSink(object):
+    """Writable file-like object streaming its content into an S3 multipart
+    upload, e.g. as the target of pyarrow.parquet.ParquetWriter.
+
+    Data is cut in parts of part_size bytes that are uploaded on a thread pool
+    while the writer keeps producing, with at most max_in_flight parts being
+    uploaded (and held in memory) at once. Failed parts are retried with an
+    exponential backoff. If the upload cannot complete it is aborted, so no
+    orphan parts are left behind. Objects smaller than one part are sent with
+    a single put_object.
+    """
+
+    MIN_PART_SIZE = 5 * 1024**2
+
+    def __init__(
+        self,
+        s3c,
+        bucket,
+        key,
+        part_size=8 * 1024**2,
+        max_in_flight=4,
+        max_retries=3,
+        retry_backoff=0.5,
+    ):
+        if part_size < self.MIN_PART_SIZE:
+            raise ValueError("S3 multipart parts must be at least 5 MiB")
+
+        self.s3c = s3c
+        self.bucket = bucket
+        self.key = key
+        self.part_size = part_size
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+        self.closed = False
+        self._buffer = bytearray()
+        self._position = 0
+        self._upload_id = None
+        self._parts = {}
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def writable(self):
+        return True
+
+    def seekable(self):
+        return False
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def write(self, data):
+        if self.closed:
+            raise ValueError("I/O operation on closed sink")
+
+        self._buffer += data
+        self._position += len(data)
+
+        while len(self._buffer) >= self.part_size:
+            self._submit_part(bytes(self._buffer[: self.part_size]))
+            del self._buffer[: self.part_size]
+
+        return len(data)
+
+    def _raise_failed_parts(self):
+        for future in self._parts.values():
+            if future.done() and future.exception() is not None:
+                raise future.exception()
+
+    def _submit_part(self, body):
+        if self._upload_id is None:
+            self._upload_id = self.s3c.create_multipart_upload(
+                Bucket=self.bucket, Key=self.key
+            )["UploadId"]
+
+        # Stop feeding parts as soon as one of them failed for good
+        self._raise_failed_parts()
+
+        # Blocks the writer while max_in_flight parts are being uploaded
+        self._slots.acquire()
+
+        part_number = len(self._parts) + 1
+        future = self._executor.submit(self._upload_part, part_number, body)
+        future.add_done_callback(lambda _: self._slots.release())
+
+        self._parts[part_number] = future
+
+    def _upload_part(self, part_number, body):
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                response = self.s3c.upload_part(
+                    Bucket=self.bucket,
+                    Key=self.key,
+                    UploadId=self._upload_id,
+                    PartNumber=part_number,
+                    Body=body,
+                )
+                return {"PartNumber": part_number, "ETag": response["ETag"]}
+            except (BotoCoreError, ClientError) as error:
+                if attempt == self.max_retries:
+                    raise
+
+                logging.warning(
+                    f"Retrying part {part_number} of s3://{self.bucket}/{self.key} after: {error}"
+                )
+                time.sleep(self.retry_backoff * 2 ** (attempt - 1))
+
+    def close(self):
+        if self.closed:
+            return
+
+        try:
+            if self._upload_id is None:
+                self.s3c.put_object(
+                    Bucket=self.bucket, Key=self.key, Body=bytes(self._buffer)
+                )
+            else:
+                if self._buffer:
+                    self._submit_part(bytes(self._buffer))
+
+                parts = [self._parts[number].result() for number in sorted(self._parts)]
+
+                self.s3c.complete_multipart_upload(
+                    Bucket=self.bucket,
+                    Key=self.key,
+                    UploadId=self._upload_id,
+                    MultipartUpload={"Parts": parts},
+                )
+        except BaseException:
+            self.abort()
+            raise
+        finally:
+            self._buffer = bytearray()
+            self.closed = True
+            self._executor.shutdown(wait=False)
+
+    def abort(self):
+        """Drop everything written so far. Safe to call more than once."""
+        self.closed = True
+        self._buffer = bytearray()
+
+        for future in self._parts.values():
+            future.cancel()
+        wait(list(self._parts.values()))
+        self._executor.shutdown(wait=False)
+
+        if self._upload_id is not None:
+            upload_id, self._upload_id = self._upload_id, None
+
+            self.s3c.abort_multipart_upload(
+                Bucket=self.bucket, Key=self.key, UploadId=upload_id
+            )
+            logging.warning(
+                f"Aborted multipart upload of s3://{self.bucket}/{self.key}"
+            )
@@ -0,0 +1,90 @@
+import datetime
+import unittest
+from moto import mock_aws
+from booking.bookingsingestion import BookingsIngestion
+from query import QueryRegistry
+from test.helpers import make_ingestion, query_frame
+
+
+class TestBookingsIngestion(unittest.TestCase):
+    """This test file tests the bookings loads
+    on moto's S3, the replica replaced by
+    frames with the columns of the queries.
+
+    test_full_load() checks a full load writes
+    the dataset and commits the latest
+    created_on as the watermark.
+
+    test_reload() checks a second full load
+    restarts the total row count of the
+    watermark.
+
+    test_delta_load() checks a delta load
+    replaces the snapshot instead of adding
+    a copy of it.
+
+    test_bootstrap() checks a delta load
+    without watermark starts from the newest
+    partition of the dataset.
+    """
+
+    def setUp(self):
+        self.aws = mock_aws()
+        self.aws.start()
+
+        self.frame = query_frame(QueryRegistry().sql("bookings"), "bookings", 5)
+        self.ingestion = make_ingestion(
+            BookingsIngestion, lambda query, params: self.frame
+        )
+
+    def tearDown(self):
+        self.aws.stop()
+
+    def test_full_load(self):
+        result = self.ingestion.bookingsDf_full_s3Load()
+
+        self.assertEqual(result["rows"], 5)
+        self.assertEqual(len(self.ingestion.dataset_writer.read("bookings")), 5)
+        self.assertEqual(
+            self.ingestion.watermarks.high_water_mark("bookings"),
+            "2026-01-01 04:00:00.000000",
+        )
+
+    def test_reload(self):
+        self.ingestion.bookingsDf_full_s3Load()
+        self.ingestion.bookingsDf_full_s3Load()
+
+        self.assertEqual(len(self.ingestion.dataset_writer.read("bookings")), 5)
+        self.assertEqual(self.ingestion.watermarks.get("bookings")["total_rows"], 5)
+
+    def test_delta_load(self):
+        self.ingestion.bookingsDf_full_s3Load()
+
+        self.frame = query_frame(
+            QueryRegistry().sql("bookings"), "bookings", 6, start="2026-01-02"
+        )
+        result = self.ingestion.bookingsDf_delta_s3Load()
+
+        self.assertEqual(result["rows"], 6)
+        self.assertEqual(len(self.ingestion.dataset_writer.read("bookings")), 6)
+        self.assertEqual(
+            self.ingestion.watermarks.high_water_mark("bookings"),
+            "2026-01-02 05:00:00.000000",
+        )
+
+    def test_bootstrap(self):
+        with self.assertRaises(ValueError):
+            self.ingestion._get_current_last_datetime()
+
+        # The last load landed in the newest partition, whatever its dates
+        writer = self.ingestion.dataset_writer
+        writer.append("bookings", self.frame, datetime.date(2026, 1, 1))
+        writer.append("bookings", self.frame.head(2), datetime.date(2026, 1, 2))
+
+        self.assertEqual(
+            self.ingestion._get_current_last_datetime(), "2026-01-01 01:00:00.000000"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
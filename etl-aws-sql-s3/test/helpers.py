@@ -0,0 +1,93 @@
+import os
+import re
+import numpy as np
+import pandas as pd
+import pyarrow
+from resources import ResourceRegistry
+from schema.schemaregistry import DATASET_SCHEMAS
+
+# moto only needs credentials to be set, never used against AWS
+for name in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"):
+    os.environ.setdefault(name, "testing")
+
+TOKENS = re.compile(r"\(|\)|,|\w+|[^\s\w(),]+")
+
+
+def query_columns(sql):
+    """Column names returned by a query: the select list of its last
+    top-level SELECT, so CTEs and UNION ALL branches are skipped"""
+    depth, select, columns, current = 0, None, [], []
+
+    for match in TOKENS.finditer(sql):
+        token = match.group()
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth -= 1
+        elif depth == 0 and token.upper() == "SELECT":
+            select, columns, current = match, [], []
+            continue
+        elif depth == 0 and token.upper() == "FROM" and select is not None:
+            columns.append(current)
+            select = None
+            continue
+        elif depth == 0 and token == "," and select is not None:
+            columns.append(current)
+            current = []
+            continue
+
+        if select is not None:
+            current.append(token)
+
+    # The alias, else the column itself: "t.trip_id" -> "trip_id"
+    return [tokens[-1] for tokens in columns if tokens]
+
+
+def query_frame(sql, dataset, rows, start="2026-01-01"):
+    """Frame with the columns of a query, as read_sql would return it:
+    timestamps for the declared timestamp columns, strings for the category
+    ones and numbers otherwise"""
+    schema = DATASET_SCHEMAS.get(dataset, {})
+    data = {}
+
+    for name in query_columns(sql):
+        declared = schema.get(name)
+        if declared == "timestamp" or name.endswith(("_date", "_on", "_time")):
+            data[name] = pd.date_range(start, periods=rows, freq="h")
+        elif declared == "category":
+            data[name] = pd.Series([f"{name}{i % 3}" for i in range(rows)], dtype=str)
+        else:
+            data[name] = np.arange(rows, dtype="int64")
+
+    return pd.DataFrame(data)
+
+
+def make_ingestion(cls, read_sql, batch_size=2):
+    """Ingestion class on moto's S3 with read_sql(query, params) replacing the
+    replica, for read_sql and for the extractors. Call it inside mock_aws."""
+    resources = ResourceRegistry(
+        connection_params=dict(user="", password="", host="", port="", database=""),
+        s3_params=dict(region_name="us-east-1"),
+    )
+    ingestion = cls(resources)
+    ingestion.s3c.create_bucket(Bucket=ingestion.BUCKET_NAME)
+
+    ingestion.read_sql = lambda query, params=None, dataset=None: (
+        ingestion.schemas.apply(dataset, read_sql(query, params).copy())
+    )
+    ingestion.fingerprints.read_sql = ingestion.read_sql
+
+    def iter_batches(query, params=None, schema=None):
+        table = pyarrow.Table.from_pandas(read_sql(query, params), preserve_index=False)
+
+        # Like the extractors, a query without rows yields one empty batch
+        batches = table.to_batches(batch_size) or [
+            pyarrow.RecordBatch.from_pylist([], schema=table.schema)
+        ]
+        for batch in batches:
+            yield batch if schema is None else schema.apply_arrow(batch)
+
+    ingestion.extractor.iter_batches = iter_batches
+    ingestion.arrow_extractor.iter_batches = iter_batches
+
+    return ingestion
@@ -0,0 +1,149 @@
+import unittest
+import numpy as np
+import pandas as pd
+from geo import GridIndex, TripGeometry
+
+# (start lat, lng, end lat, lng, earth radius in meters, distance in meters,
+# bearing in degrees, None when the source gives none)
+REFERENCE_VALUES = [
+    # Nashville to Los Angeles, Rosetta Code "Haversine formula"
+    (36.12, -86.67, 33.94, -118.40, 6372800.0, 2887259.9506071106, None),
+    # Valparaiso to Shanghai, Wikipedia "Great-circle navigation": 168.56 deg
+    # of arc, initial course -94.41 deg
+    (
+        -33.0,
+        -71.6,
+        31.4,
+        121.8,
+        6371008.8,
+        np.radians(168.56) * 6371008.8,
+        360 - 94.41,
+    ),
+    # One degree of meridian and the four cardinal directions
+    (0.0, 0.0, 1.0, 0.0, 6371008.8, np.pi * 6371008.8 / 180, 0.0),
+    (0.0, 0.0, 0.0, 1.0, 6371008.8, np.pi * 6371008.8 / 180, 90.0),
+    (0.0, 0.0, -1.0, 0.0, 6371008.8, np.pi * 6371008.8 / 180, 180.0),
+    (0.0, 0.0, 0.0, -1.0, 6371008.8, np.pi * 6371008.8 / 180, 270.0),
+]
+
+# Relative tolerance of the distances in each dtype
+RTOL = {"float64": 1e-4, "float32": 1e-3}
+
+
+class TestTripGeometry(unittest.TestCase):
+    """This test file tests the trip geometry
+    features and the nearest parking index.
+
+    test_haversine() checks the distances
+    against published reference values in
+    float64 and float32.
+
+    test_bearing() checks the bearings against
+    the same references.
+
+    test_features() checks the ratio and speed
+    of a known trip and the NaN of a trip
+    without distance or duration.
+
+    test_batches() checks the features do not
+    depend on the batch size.
+
+    test_nearest() checks GridIndex finds the
+    same parking areas as a brute force search.
+    """
+
+    def test_haversine(self):
+        for lat1, lng1, lat2, lng2, radius, distance, _ in REFERENCE_VALUES:
+            for dtype, rtol in RTOL.items():
+                geometry = TripGeometry(dtype, earth_radius=radius)
+
+                computed = geometry.haversine([lat1], [lng1], [lat2], [lng2])[0]
+                self.assertTrue(
+                    np.isclose(computed, distance, rtol=rtol), (dtype, computed)
+                )
+
+    def test_bearing(self):
+        for lat1, lng1, lat2, lng2, radius, _, bearing in REFERENCE_VALUES:
+            if bearing is None:
+                continue
+
+            for dtype in RTOL:
+                geometry = TripGeometry(dtype, earth_radius=radius)
+
+                computed = geometry.bearing([lat1], [lng1], [lat2], [lng2])[0]
+                self.assertAlmostEqual(computed, bearing, delta=0.01, msg=dtype)
+
+    def test_features(self):
+        meridian_degree = np.pi * 6371008.8 / 180
+        trips = pd.DataFrame(
+            {
+                "start_gps_lat": [0.0, 41.38],
+                "start_gps_lng": [0.0, 2.17],
+                "end_gps_lat": [1.0, 41.39],
+                "end_gps_lng": [0.0, 2.17],
+                "trip_distance_meters": [2 * meridian_degree, 0],
+                "trip_duration_seconds": [1000, 0],
+            }
+        )
+
+        for dtype, rtol in RTOL.items():
+            features = TripGeometry(dtype).features(trips)
+
+            self.assertEqual(features["speed_mps"].dtype, dtype)
+            np.testing.assert_allclose(
+                features.iloc[0],
+                [meridian_degree, 0.0, 0.5, meridian_degree / 500],
+                rtol=rtol,
+            )
+            self.assertTrue(features["straight_line_ratio"].isna().iloc[1])
+            self.assertTrue(features["speed_mps"].isna().iloc[1])
+
+    def test_batches(self):
+        rng = np.random.default_rng(0)
+        trips = pd.DataFrame(
+            {
+                "start_gps_lat": 41.32 + rng.random(1000) * 0.14,
+                "start_gps_lng": 2.07 + rng.random(1000) * 0.16,
+                "end_gps_lat": 41.32 + rng.random(1000) * 0.14,
+                "end_gps_lng": 2.07 + rng.random(1000) * 0.16,
+                "trip_distance_meters": rng.random(1000) * 5000,
+                "trip_duration_seconds": rng.integers(0, 3600, 1000),
+            }
+        )
+
+        pd.testing.assert_frame_equal(
+            TripGeometry(batch_size=7).features(trips),
+            TripGeometry().features(trips),
+        )
+
+    def test_nearest(self):
+        rng = np.random.default_rng(0)
+        parking_lat = 41.32 + rng.random(500) * 0.14
+        parking_lng = 2.07 + rng.random(500) * 0.16
+        lat = np.append(41.30 + rng.random(2000) * 0.18, np.nan)
+        lng = np.append(2.05 + rng.random(2000) * 0.20, 2.17)
+
+        # Haversine distance of every end point to every parking area
+        distances = TripGeometry().haversine(
+            lat[:-1, None], lng[:-1, None], parking_lat, parking_lng
+        )
+
+        # Ties within the tolerance are broken differently by the projection
+        closest = np.partition(distances, 1, axis=1)
+        unique = closest[:, 1] - closest[:, 0] > 0.1
+
+        for cell_meters in (100, 250, 1000):
+            index = GridIndex(parking_lat, parking_lng, np.arange(500) + 1, cell_meters)
+            nearest = index.nearest(lat, lng)
+
+            np.testing.assert_allclose(
+                nearest["distance_meters"][:-1], distances.min(axis=1), atol=0.1
+            )
+            np.testing.assert_array_equal(
+                nearest["id"][:-1][unique], distances.argmin(axis=1)[unique] + 1
+            )
+            self.assertTrue(nearest.iloc[-1].isna().all())
+
+
+if __name__ == "__main__":
+    unittest.main()
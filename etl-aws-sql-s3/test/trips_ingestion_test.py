@@ -0,0 +1,139 @@
+import unittest
+import pandas as pd
+from moto import mock_aws
+from query import QueryRegistry
+from test.helpers import make_ingestion, query_frame
+from trip.tripsingestion import TripsIngestion
+
+
+def parking_frame(lat, lng, checksum):
+    """Rows of parking_area_locations, with their fingerprint"""
+    return pd.DataFrame(
+        {
+            "id": range(1, len(lat) + 1),
+            "gps_lat": lat,
+            "gps_lng": lng,
+            "row_count": len(lat),
+            "checksum": checksum,
+        }
+    )
+
+
+class TestTripsIngestion(unittest.TestCase):
+    """This test file tests the trips loads
+    on moto's S3, the replica replaced by
+    frames with the columns of the queries.
+
+    test_full_load() checks a full load writes
+    every trip with its nearest parking area
+    and commits the latest start_trip_date
+    as the watermark.
+
+    test_empty_delta() checks a run without
+    new trips warns and writes nothing.
+
+    test_no_parking_areas() checks a delta
+    is loaded with null nearest parking
+    columns when there are no parking areas.
+
+    test_parking_index() checks the index is
+    kept while the fingerprint of the parking
+    area locations is unchanged and rebuilt
+    when an area moves.
+    """
+
+    def setUp(self):
+        self.aws = mock_aws()
+        self.aws.start()
+
+        self.queries = QueryRegistry()
+        self.frames = {
+            self.queries.sql("trips_delta"): query_frame(
+                self.queries.sql("trips_delta"), "trips", 0
+            ),
+            self.queries.sql("parking_area_locations"): parking_frame(
+                [41.38, 41.40], [2.17, 2.15], 7
+            ),
+        }
+        self.ingestion = make_ingestion(TripsIngestion, self.read_sql)
+        self.ingestion.watermarks.commit("trips", "2026-01-01 00:00:00.000000", 0)
+
+    def tearDown(self):
+        self.aws.stop()
+
+    def read_sql(self, query, params):
+        if query in self.frames:
+            return self.frames[query]
+
+        # FingerprintStore.compute of the parking area locations
+        parking_areas = self.frames[self.queries.sql("parking_area_locations")]
+        return pd.DataFrame(
+            {
+                "row_count": [len(parking_areas)],
+                "checksum": [parking_areas.checksum.iloc[:1].sum()],
+            }
+        )
+
+    def test_full_load(self):
+        self.frames[self.queries.sql("trips_delta")] = query_frame(
+            self.queries.sql("trips_delta"), "trips", 4
+        )
+
+        result = self.ingestion.tripsDf_full_s3Load()
+
+        self.assertEqual(result["rows"], 4)
+        trips = self.ingestion.dataset_writer.read("trips")
+        self.assertEqual(len(trips), 4)
+        self.assertTrue(trips.end_parking_area_id.isin([1, 2]).all())
+        self.assertEqual(
+            self.ingestion.watermarks.get("trips")["high_water_mark"],
+            "2026-01-01 03:00:00.000000",
+        )
+        self.assertEqual(self.ingestion.watermarks.get("trips")["total_rows"], 4)
+
+    def test_empty_delta(self):
+        with self.assertLogs(level="WARNING"):
+            self.assertIsNone(self.ingestion.tripsDf_delta_s3Load())
+
+        self.assertEqual(self.ingestion.dataset_writer.partitions("trips"), [])
+        self.assertEqual(
+            self.ingestion.watermarks.high_water_mark("trips"),
+            "2026-01-01 00:00:00.000000",
+        )
+
+    def test_no_parking_areas(self):
+        self.frames[self.queries.sql("trips_delta")] = query_frame(
+            self.queries.sql("trips_delta"), "trips", 3, start="2026-01-02"
+        )
+        self.frames[self.queries.sql("parking_area_locations")] = parking_frame(
+            [], [], 0
+        )
+
+        result = self.ingestion.tripsDf_delta_s3Load()
+
+        self.assertEqual(result["rows"], 3)
+        trips = self.ingestion.dataset_writer.read("trips")
+        self.assertTrue(trips.end_parking_area_id.isna().all())
+        self.assertTrue(trips.end_parking_distance_meters.isna().all())
+        self.assertEqual(
+            self.ingestion.watermarks.high_water_mark("trips"),
+            "2026-01-02 02:00:00.000000",
+        )
+
+    def test_parking_index(self):
+        index = self.ingestion._parking_index()
+
+        self.assertIs(self.ingestion._parking_index(), index)
+
+        # The second area moves next to the first one
+        self.frames[self.queries.sql("parking_area_locations")] = parking_frame(
+            [41.38, 41.381], [2.17, 2.17], 8
+        )
+        moved = self.ingestion._parking_index()
+
+        self.assertIsNot(moved, index)
+        self.assertEqual(moved.nearest([41.3811], [2.17])["id"].iloc[0], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+from moto import mock_aws
+from query import QueryRegistry
+from test.helpers import make_ingestion, query_frame
+from vehicle.vehiclesingestion import VehiclesIngestion
+
+
+class TestVehiclesIngestion(unittest.TestCase):
+    """This test file tests the vehicle events
+    loads on moto's S3, the replica replaced
+    by frames with the columns of the queries.
+
+    test_full_load() checks the streamed full
+    load writes every batch, returns its
+    result and commits the latest created_on.
+
+    test_empty_full_load() checks a full load
+    without rows warns and commits no
+    watermark.
+
+    test_delta_load() checks a delta load
+    appends the rows after the full load.
+    """
+
+    def setUp(self):
+        self.aws = mock_aws()
+        self.aws.start()
+
+        queries = QueryRegistry()
+        self.frames = {
+            queries.sql("vehicle_events"): query_frame(
+                queries.sql("vehicle_events"), "vehicle_events", 5
+            ),
+            queries.sql("vehicle_events_delta"): query_frame(
+                queries.sql("vehicle_events_delta"),
+                "vehicle_events",
+                3,
+                start="2026-02-01",
+            ),
+        }
+        self.ingestion = make_ingestion(
+            VehiclesIngestion, lambda query, params: self.frames[query]
+        )
+
+    def tearDown(self):
+        self.aws.stop()
+
+    def test_full_load(self):
+        result = self.ingestion.vehicleEventsDf_full_s3Load()
+
+        self.assertEqual(result["rows"], 5)
+        self.assertGreater(result["bytes"], 0)
+        self.assertEqual(len(self.ingestion.dataset_writer.read("vehicle_events")), 5)
+        self.assertEqual(
+            self.ingestion.watermarks.high_water_mark("vehicle_events"),
+            "2026-01-01 04:00:00.000000",
+        )
+
+    def test_empty_full_load(self):
+        queries = QueryRegistry()
+        self.frames[queries.sql("vehicle_events")] = query_frame(
+            queries.sql("vehicle_events"), "vehicle_events", 0
+        )
+
+        with self.assertLogs(level="WARNING"):
+            result = self.ingestion.vehicleEventsDf_full_s3Load()
+
+        self.assertEqual(result["rows"], 0)
+        self.assertIsNone(self.ingestion.watermarks.get("vehicle_events"))
+
+    def test_delta_load(self):
+        self.ingestion.vehicleEventsDf_full_s3Load()
+        result = self.ingestion.vehicleEventsDf_delta_s3Load()
+
+        self.assertEqual(result["rows"], 3)
+        self.assertEqual(
+            self.ingestion.watermarks.high_water_mark("vehicle_events"),
+            "2026-02-01 02:00:00.000000",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
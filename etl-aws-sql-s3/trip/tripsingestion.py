@@ -1,15 +1,40 @@
+import numpy as np
 import pandas as pd
-import pandas.io.sql as psql
-import boto3
-import io
 import logging
 import pyarrow
 from configuration import Configuration
+from geo import GridIndex, SpatialIndexCache, TripGeometry
 
 
 class TripsIngestion(Configuration):
-    def __init__(self):
-        super().__init__()
+    # Fingerprinted like the parking_areas dataset, see VehiclesIngestion
+    PARKING_AREAS_FINGERPRINT_SOURCE = (
+        "SELECT id, gps_lat, gps_lng FROM generic.parking_area"
+    )
+
+    # "single" reads the delta with one query joined in Postgres, "split" the
+    # former three queries joined in pandas
+    QUERY_MODES = ("single", "split")
+
+    def __init__(self, resources=None):
+        super().__init__(resources)
+
+        # Distance, bearing and speed of each trip are computed here rather
+        # than with PostGIS on the replica, "float32" halves their memory
+        self.GEOMETRY_DTYPE = "float64"
+        self.geometry = TripGeometry(self.GEOMETRY_DTYPE)
+
+        # Nearest parking area of each trip end point, from an index kept until
+        # the fingerprint of the parking area locations changes. Set
+        # PARKING_INDEX_DIR to keep it on local disk between runs.
+        self.PARKING_INDEX_CELL_METERS = 250
+        self.PARKING_INDEX_DIR = ""
+
+        self.parking_indexes = SpatialIndexCache(self.PARKING_INDEX_DIR or None)
+
+        # Lower bound of the full load, which reads the trips with the delta
+        # queries
+        self.FULL_LOAD_SINCE = "-infinity"
 
     def _get_last_datetime(self, trips_dataset):
         return (
@@ -18,188 +43,176 @@ class TripsIngestion(Configuration):
             .strftime("%F %H:%M:%S.%f%z")
         )
 
-    def tripsDf_full_s3Load(self):
-        df1 = psql.read_sql(
-            """WITH geospatial_data AS (
-                    SELECT 
-                        id,
-                        ST_GeomFromText(geometry) AS geometry,
-                        properties
-                    FROM 
-                        raw_data
-                ),
+    def tripsDf_full_s3Load(self, query_mode="single"):
+        # Every trip since the first route point, with the columns of the delta
+        df = self._read_delta(self.FULL_LOAD_SINCE, query_mode)
 
-                aggregated_data AS (
-                    SELECT 
-                        ST_Centroid(geometry) AS centroid,
-                        ST_Area(geometry) AS area,
-                        ST_Length(geometry) AS perimeter,
-                        COUNT(*) as count
-                    FROM 
-                        geospatial_data
-                    GROUP BY 
-                        centroid,
-                        area,
-                        perimeter
-                )
+        if df.empty:
+            logging.warning("db has not been replicated yet, there is no trip to load")
+            return None
 
-                SELECT 
-                    id,
-                    centroid,
-                    area,
-                    perimeter,
-                    count,
-                    properties
-                FROM 
-                    aggregated_data
-                JOIN 
-                    geospatial_data
-                ON 
-                    geospatial_data.id = aggregated_data.id;""",
-            self.conn,
-        )
+        df = self._add_nearest_parking(self.geometry.add_features(df))
 
-        df2 = psql.read_sql(
-            """WITH geospatial_data AS (
-                    SELECT 
-                        id, 
-                        location, 
-                        ST_Distance(location, ST_MakePoint(longitude, latitude)) as distance 
-                    FROM 
-                        table_name
-                    WHERE 
-                        ST_DWithin(location, ST_MakePoint(longitude, latitude), radius)
-                )
+        result = self.dataset_writer.overwrite("trips", df)
 
-                SELECT 
-                    id, 
-                    location, 
-                    distance, 
-                    ROW_NUMBER() OVER (PARTITION BY id ORDER BY distance) as rank 
-                FROM 
-                    generic-geospatial_data
-                WHERE 
-                    rank = 1;""",
-            self.conn,
+        self.watermarks.commit(
+            "trips", self._get_last_datetime(df), len(df), reset=True
         )
 
-        df3 = psql.read_sql(
-            """WITH data_cte AS (
-                    SELECT 
-                        user_id, 
-                        event_date, 
-                        event_type, 
-                        ROW_NUMBER() OVER (PARTITION BY user_id, event_type ORDER BY event_date) AS event_num
-                    FROM generic-events
-                )
+        return result
 
-                SELECT 
-                    user_id, 
-                    event_type, 
-                    event_date, 
-                    LAG(event_date, 1) OVER (PARTITION BY user_id, event_type ORDER BY event_date) AS prev_event_date,
-                    DATEDIFF(day, LAG(event_date, 1) OVER (PARTITION BY user_id, event_type ORDER BY event_date), event_date) AS days_since_prev_event
-                FROM generic-data_cte
-                WHERE event_num = 1;""",
-            self.conn,
-        )
+    def _get_current_last_datetime(self):
+        current_last_datetime = self.watermarks.high_water_mark("trips")
 
-        df1.set_index("vehicle_trip_id", inplace=True)
-        df2.set_index("vehicle_trip_id2", inplace=True)
-        df3.set_index("vehicle_trip_id3", inplace=True)
-
-        df = pd.concat([df1, df2, df3], axis=1, join="inner")
-        df.index.set_names("vehicle_trip_id", inplace=True)
-
-        parquet_buffer, bucket = io.BytesIO(), "generic-bucket"
+        if current_last_datetime is None:
+            # No watermark yet, bootstrap it once from the newest partition
+            trips_data = self.dataset_writer.read_latest(
+                "trips", columns=["start_trip_date"]
+            )
 
-        df.to_parquet(parquet_buffer, compression="gzip")
+            if trips_data.empty:
+                raise ValueError(
+                    "No trips watermark nor data to bootstrap it from, run the full load first"
+                )
 
-        s3_resource = boto3.resource("s3")
-        s3_resource.Object(bucket, f"generic/generic{self.today.year}.parquet").put(
-            Body=parquet_buffer.getvalue()
-        )
+            current_last_datetime = self._get_last_datetime(trips_data)
 
-    def tripsDf_delta_s3Load(self):
+            del trips_data
 
-        trips_data = self.s3c.get_object(Bucket=self.BUCKET_NAME, Key=self.TRIPS)
+        return current_last_datetime
 
-        trips_data = pd.read_parquet(
-            io.BytesIO(trips_data["Body"].read()), engine="pyarrow"
-        )
+    def _parking_index(self):
+        """Return the GridIndex of the parking areas, rebuilt from the replica
+        only when the fingerprint of their locations changes. None when there
+        are no parking areas."""
 
-        current_last_datetime = self._get_last_datetime(trips_data)
+        def build():
+            parking_areas = self.read_sql(self.queries.sql("parking_area_locations"))
 
-        del trips_data
+            fingerprint = {
+                "row_count": len(parking_areas),
+                "checksum": (
+                    int(parking_areas.checksum.iloc[0]) if len(parking_areas) else 0
+                ),
+            }
 
-        delta1 = psql.read_sql(
-            f"""SELECT DISTINCT ON (vehicle_trip_id) created_on as start_trip_date, 
-                                            vehicle_trip_id, 
-                                            gps_lat as start_gps_lat,
-                                            gps_lng as start_gps_lng
+            parking_areas = parking_areas.dropna(subset=["gps_lat", "gps_lng"])
 
-                                    FROM mobility.opendata.vehicle_trip_route_point
+            if parking_areas.empty:
+                return fingerprint, None
 
-                                    WHERE created_on > {current_last_datetime}
+            return fingerprint, GridIndex(
+                parking_areas.gps_lat,
+                parking_areas.gps_lng,
+                parking_areas.id,
+                self.PARKING_INDEX_CELL_METERS,
+            )
 
-                                    ORDER BY vehicle_trip_id, created_on asc
-                                    ;""",
-            self.conn,
+        return self.parking_indexes.get(
+            "parking_areas",
+            self.fingerprints.compute(self.PARKING_AREAS_FINGERPRINT_SOURCE),
+            build,
         )
 
-        delta2 = psql.read_sql(
-            """SELECT DISTINCT ON (vehicle_trip_id) created_on as end_trip_date, 
-                                            vehicle_trip_id as vehicle_trip_id2, 
-                                            gps_lat as end_gps_lat, 
-                                            gps_lng as end_gps_lng
-
-                                    FROM mobility.opendata.vehicle_trip_route_point
+    def _add_nearest_parking(self, trips):
+        """Return trips with the id of the parking area nearest to their end
+        point, end_parking_area_id, and the distance to it in meters,
+        end_parking_distance_meters, both missing when there are no parking
+        areas."""
+        index = self._parking_index()
 
-                                    WHERE created_on > {current_last_datetime}
+        if index is None:
+            nearest = pd.DataFrame(
+                {"id": np.nan, "distance_meters": np.nan}, index=trips.index
+            )
+        else:
+            nearest = index.nearest(trips.end_gps_lat, trips.end_gps_lng)
+            nearest.index = trips.index
 
-                                    ORDER BY vehicle_trip_id, created_on desc
-                                ;""",
-            self.conn,
+        return trips.assign(
+            end_parking_area_id=nearest["id"],
+            end_parking_distance_meters=nearest["distance_meters"],
         )
 
-        delta3 = psql.read_sql(
-            """SELECT id as vehicle_trip_id3, vehicle_type,
-                                            vehicle_id, provider_id, propulsion_type,
-                                            trip_duration_seconds, trip_distance_meters,
-                                            end_time, initial_odometer_km,
-                                            current_odometer_km, trip_id
-
-                                    FROM mobility.opendata.vehicle_trip
-
-                                    WHERE start_time > {current_last_datetime}
+    @staticmethod
+    def _join_delta(start_points, end_points, trips):
+        """Join the results of the three queries of the "split" mode.
+
+        Input:
+        start_points DataFrame: First route point of each trip, by vehicle_trip_id.
+        end_points DataFrame: Last route point of each trip, by vehicle_trip_id2.
+        trips DataFrame: Trips, by vehicle_trip_id3.
+
+        Output:
+        DataFrame: The trips found in all three, indexed by vehicle_trip_id.
+        """
+        start_points = start_points.set_index("vehicle_trip_id")
+        end_points = end_points.set_index("vehicle_trip_id2")
+        trips = trips.set_index("vehicle_trip_id3")
+
+        deltadf = pd.concat([start_points, end_points, trips], axis=1, join="inner")
+        deltadf.index.set_names("vehicle_trip_id", inplace=True)
+
+        return deltadf
+
+    def _read_delta(self, since, query_mode="single", variant="default"):
+        """Read the trips started after since with their first and last route
+        points.
+
+        Input:
+        since STR: High-water mark of the trips dataset.
+        query_mode STR: "single" runs one query, which scans the route points
+        once and joins them to the trips in Postgres, "split" runs one query
+        per side and joins them in pandas.
+        variant STR: Variant of the trips_delta query in "single" mode.
+
+        Output:
+        DataFrame: The delta indexed by vehicle_trip_id, with the dtypes
+        declared for the trips dataset.
+        """
+        params = {"since": since}
+
+        if query_mode == "single":
+            return self.read_sql(
+                self.queries.sql("trips_delta", variant),
+                params=params,
+                dataset="trips",
+            ).set_index("vehicle_trip_id")
+
+        if query_mode == "split":
+            return self._join_delta(
+                *(
+                    self.read_sql(
+                        self.queries.sql(name), params=params, dataset="trips"
+                    )
+                    for name in (
+                        "trips_delta_start_points",
+                        "trips_delta_end_points",
+                        "trips_delta_trips",
+                    )
+                )
+            )
 
-                                    ORDER BY id
-                                ;""",
-            self.conn,
+        raise ValueError(
+            f"Unknown query_mode {query_mode}, expected one of {self.QUERY_MODES}"
         )
 
-        delta1.set_index("vehicle_trip_id", inplace=True)
-        delta2.set_index("vehicle_trip_id2", inplace=True)
-        delta3.set_index("vehicle_trip_id3", inplace=True)
+    def tripsDf_delta_s3Load(self, query_mode="single"):
 
-        deltadf = pd.concat([delta1, delta2, delta3], axis=1, join="inner")
-        del delta1
-        del delta2
-        del delta3
+        current_last_datetime = self._get_current_last_datetime()
 
-        if current_last_datetime == self._get_last_datetime(deltadf):
+        deltadf = self._read_delta(current_last_datetime, query_mode)
+
+        if deltadf.empty:
             logging.warning(
                 f"db has not been replicated yet or there is no delta rows since {current_last_datetime}"
             )
+            return None
 
-        else:
-            deltadf.index.set_names("vehicle_trip_id", inplace=True)
+        deltadf = self._add_nearest_parking(self.geometry.add_features(deltadf))
 
-            parquet_buffer, bucket = io.BytesIO(), "generic-bucket"
+        result = self.dataset_writer.append("trips", deltadf)
 
-            deltadf.to_parquet(parquet_buffer, compression="gzip")
+        self.watermarks.commit("trips", self._get_last_datetime(deltadf), len(deltadf))
 
-            s3_resource = boto3.resource("s3")
-            s3_resource.Object(bucket, f"generic/generic{self.today.year}.parquet").put(
-                Body=parquet_buffer.getvalue()
-            )
+        return result
@@ -1,16 +1,20 @@
 import pandas as pd
-import pandas.io.sql as psql
-import boto3
-import io
 import logging
 import pyarrow
 from datetime import date, timedelta
 from configuration import Configuration
+from extraction import BatchMaxTracker
 
 
 class VehiclesIngestion(Configuration):
-    def __init__(self):
-        super().__init__()
+    # Ids each dataset is made of, fingerprinted to detect changes
+    PARKING_AREAS_FINGERPRINT_SOURCE = (
+        "SELECT id, gps_lat, gps_lng FROM generic.parking_area"
+    )
+    VEHICLES_FINGERPRINT_SOURCE = "SELECT motorcycle_id FROM generic-vehicles"
+
+    def __init__(self, resources=None):
+        super().__init__(resources)
         self.yesterday = date.today() - timedelta(days=1)
         self.today = date.today()
 
@@ -22,238 +26,162 @@ class VehiclesIngestion(Configuration):
         )
 
     def parkingAreasDf_full_s3Load(self):
-        dft1 = psql.read_sql(
-            """SELECT *
-                FROM generic.parking_area
-                ;""",
-            self.conn,
+        fingerprint = self.fingerprints.compute(self.PARKING_AREAS_FINGERPRINT_SOURCE)
+
+        batches = self.arrow_extractor.iter_batches(
+            self.queries.sql("parking_areas"),
+            schema=self.schemas.get("parking_areas"),
         )
 
-        parquet_buffer, bucket = io.BytesIO(), "generic-name"
+        result = self.dataset_writer.overwrite_batches(
+            "parking_areas", batches, metadata=self.fingerprints.metadata(fingerprint)
+        )
 
-        dft1.to_parquet(parquet_buffer, compression="gzip")
+        self.fingerprints.record("parking_areas", fingerprint)
 
-        s3_resource = boto3.resource("s3")
-        s3_resource.Object(bucket, self.PARKINGS).put(Body=parquet_buffer.getvalue())
+        return result
 
     def parkingAreasDf_delta_s3Load(self):
-        parkings_data = self.s3c.get_object(Bucket=self.BUCKET_NAME, Key=self.PARKINGS)
-
-        parkings_data = pd.read_parquet(
-            io.BytesIO(parkings_data["Body"].read()), engine="pyarrow"
+        changed, fingerprint = self.fingerprints.changed(
+            "parking_areas", self.PARKING_AREAS_FINGERPRINT_SOURCE
         )
 
-        dft1 = psql.read_sql(
-            f"""WITH parking_cte AS (
-                SELECT 
-                    area_id,
-                    SUM(CASE WHEN status = 'occupied' THEN 1 ELSE 0 END) AS occupied_spaces,
-                    SUM(CASE WHEN status = 'available' THEN 1 ELSE 0 END) AS available_spaces,
-                    SUM(CASE WHEN status = 'reserved' THEN 1 ELSE 0 END) AS reserved_spaces,
-                    COUNT(*) AS total_spaces
-                FROM generic-parking-areas
-                WHERE created_on <= '{self.today.strftime("%F %H:%M:%S.%f%z")}'
-                AND created_on >= '{self.yesterday.strftime("%F %H:%M:%S.%f%z")}'
-                GROUP BY area_id
+        if not changed:
+            logging.warning(
+                "Parking Area dataset is up to date or replica is not updated"
             )
+            return None
+
+        dft1 = self.read_sql(
+            self.queries.sql("parking_areas_delta"),
+            params={"today": self.today, "yesterday": self.yesterday},
+            dataset="parking_areas",
+        )
+
+        # The delta is an aggregate per parking area, a snapshot that replaces
+        # the dataset
+        result = self.dataset_writer.overwrite(
+            "parking_areas", dft1, metadata=self.fingerprints.metadata(fingerprint)
+        )
 
-            SELECT 
-                area_id,
-                occupied_spaces,
-                available_spaces,
-                reserved_spaces,
-                total_spaces,
-                ROUND(occupied_spaces / total_spaces::float, 2) AS occupancy_rate,
-                ROUND((available_spaces + reserved_spaces) / total_spaces::float, 2) AS availability_rate
-            FROM generic-parking
-            ORDER BY occupancy_rate DESC
-            ;""",
-            self.conn,
+        self.fingerprints.record("parking_areas", fingerprint)
+
+        return result
+
+    def vehicleEventsDf_full_s3Load(self):
+        batches = BatchMaxTracker(
+            self.arrow_extractor.iter_batches(
+                self.queries.sql("vehicle_events"),
+                schema=self.schemas.get("vehicle_events"),
+            ),
+            "created_on",
         )
 
-        if len(set(parkings_data.id)) == len(set(dft1.id)):
+        result = self.dataset_writer.overwrite_batches("vehicle_events", batches)
+
+        if batches.max is None:
             logging.warning(
-                "Parking Area dataset is up to date or replica is not updated"
+                "db has not been replicated yet, there is no vehicle event to load"
             )
-            return None
-        else:
-            parquet_buffer, bucket = io.BytesIO(), "generic-name"
+            return result
+
+        self.watermarks.commit(
+            "vehicle_events",
+            batches.max.strftime("%F %H:%M:%S.%f%z"),
+            result["rows"],
+            reset=True,
+        )
+
+        return result
 
-            dft1.to_parquet(parquet_buffer, compression="gzip")
+    def _get_current_last_datetime(self, dataset):
+        current_last_datetime = self.watermarks.high_water_mark(dataset)
 
-            s3_resource = boto3.resource("s3")
-            s3_resource.Object(bucket, self.PARKINGS).put(
-                Body=parquet_buffer.getvalue()
+        if current_last_datetime is None:
+            # No watermark yet, bootstrap it once from the newest partition
+            vehicles_data = self.dataset_writer.read_latest(
+                dataset, columns=["created_on"]
             )
-            return None
 
-    def vehicleEventsDf_full_s3Load(self):
-        dft1 = psql.read_sql(
-            """SELECT 
-            vehicle_id, 
-            event_time, 
-            event_type, 
-            event_location,
-            EXTRACT(MONTH FROM event_time) AS event_month,
-            EXTRACT(YEAR FROM event_time) AS event_year,
-            ROW_NUMBER() OVER (PARTITION BY vehicle_id ORDER BY event_time) AS event_num
-            FROM generic-vehicle-events;""",
-            self.conn,
-        )
+            if vehicles_data.empty:
+                raise ValueError(
+                    f"No {dataset} watermark nor data to bootstrap it from, run the full load first"
+                )
 
-        parquet_buffer, bucket = io.BytesIO(), "generic-name"
+            current_last_datetime = self._get_last_datetime(vehicles_data)
 
-        dft1.to_parquet(parquet_buffer, compression="gzip")
+            del vehicles_data
 
-        s3_resource = boto3.resource("s3")
-        s3_resource.Object(bucket, self.VEVENTS).put(Body=parquet_buffer.getvalue())
+        return current_last_datetime
 
     def vehicleEventsDf_delta_s3Load(self):
-        vEvents_data = self.s3c.get_object(Bucket=self.BUCKET_NAME, Key=self.VEVENTS)
+        current_last_datetime = self._get_current_last_datetime("vehicle_events")
 
-        vEvents_data = pd.read_parquet(
-            io.BytesIO(vEvents_data["Body"].read()), engine="pyarrow"
+        dft1 = self.read_sql(
+            self.queries.sql("vehicle_events_delta"),
+            params={"today": self.today, "yesterday": self.yesterday},
+            dataset="vehicle_events",
         )
 
-        current_last_datetime = self._get_last_datetime(vEvents_data)
-
-        del vEvents_data
-
-        dft1 = psql.read_sql(
-            f"""WITH data_cte AS (
-                SELECT 
-                    vehicle_id, 
-                    event_time, 
-                    event_type, 
-                    event_location,
-                    EXTRACT(MONTH FROM event_time) AS event_month,
-                    EXTRACT(YEAR FROM event_time) AS event_year,
-                    ROW_NUMBER() OVER (PARTITION BY vehicle_id ORDER BY event_time) AS event_num
-                FROM generic-vehicle-events
-                WHERE created_on <= '{self.today.strftime("%F %H:%M:%S.%f%z")}'
-                AND created_on >= '{self.yesterday.strftime("%F %H:%M:%S.%f%z")}'
-            ) 
-
-            SELECT 
-                vehicle_id, 
-                event_type, 
-                event_location,
-                event_month,
-                event_year,
-                COUNT(DISTINCT event_num) AS total_events,
-                COUNT(DISTINCT event_location) AS unique_locations,
-                COUNT(CASE WHEN event_type = 'maintenance' THEN 1 ELSE NULL END) AS maintenance_events,
-                AVG(TIMESTAMPDIFF(SECOND, LAG(event_time) OVER (PARTITION BY vehicle_id ORDER BY event_time), event_time)) AS avg_time_between_events
-            FROM data_cte
-            GROUP BY vehicle_id, event_month, event_year
-            ;""",
-            self.conn,
-        )
+        if dft1.empty:
+            logging.warning(
+                f"db has not been replicated yet or there is no delta rows since {current_last_datetime}"
+            )
+            return None
 
-        if current_last_datetime == self._get_last_datetime(dft1):
+        delta_last_datetime = self._get_last_datetime(dft1)
+
+        if current_last_datetime == delta_last_datetime:
             logging.warning(
                 f"db has not been replicated yet or there is no delta rows since {current_last_datetime}"
             )
 
         else:
-            parquet_buffer, bucket = io.BytesIO(), "generic-name"
+            result = self.dataset_writer.append("vehicle_events", dft1)
 
-            dft1.to_parquet(parquet_buffer, compression="gzip")
+            self.watermarks.commit("vehicle_events", delta_last_datetime, len(dft1))
 
-            s3_resource = boto3.resource("s3")
-            s3_resource.Object(bucket, self.VEVENTS).put(Body=parquet_buffer.getvalue())
+            return result
 
     def vehiclesDf_full_s3Load(self):
-        dft1 = psql.read_sql(
-            """WITH data_cte AS (
-                SELECT 
-                    motorcycle_id, 
-                    purchase_date, 
-                    warranty_expiration_date,
-                    DATEDIFF(day, purchase_date, warranty_expiration_date) AS warranty_duration,
-                    ROUND(DATEDIFF(day, purchase_date, NOW())/365.25, 2) AS age_in_years,
-                    (CASE 
-                        WHEN age_in_years > warranty_duration THEN 'out of warranty'
-                        WHEN age_in_years <= warranty_duration THEN 'in warranty'
-                        ELSE 'N/A'
-                    END) AS warranty_status
-                FROM generic-vehicles
-            )
+        fingerprint = self.fingerprints.compute(self.VEHICLES_FINGERPRINT_SOURCE)
 
-            SELECT 
-                motorcycle_id, 
-                purchase_date, 
-                warranty_expiration_date,
-                warranty_duration,
-                age_in_years,
-                warranty_status,
-                COUNT(*) OVER (PARTITION BY warranty_status) AS total_by_warranty_status
-            FROM data_cte
-            ORDER BY age_in_years DESC
-            ;""",
-            self.conn,
+        batches = self.extractor.iter_batches(
+            self.queries.sql("vehicles"),
+            schema=self.schemas.get("vehicles"),
         )
 
-        parquet_buffer, bucket = io.BytesIO(), "generic-name"
+        result = self.dataset_writer.overwrite_batches(
+            "vehicles", batches, metadata=self.fingerprints.metadata(fingerprint)
+        )
 
-        dft1.to_parquet(parquet_buffer, compression="gzip")
+        self.fingerprints.record("vehicles", fingerprint)
 
-        s3_resource = boto3.resource("s3")
-        s3_resource.Object(bucket, self.VEHICLES).put(Body=parquet_buffer.getvalue())
+        return result
 
     def vehiclesDf_delta_s3Load(self):
-        vehicles_data = self.s3c.get_object(Bucket=self.BUCKET_NAME, Key=self.VEHICLES)
-
-        vehicles_data = pd.read_parquet(
-            io.BytesIO(vehicles_data["Body"].read()), engine="pyarrow"
+        changed, fingerprint = self.fingerprints.changed(
+            "vehicles", self.VEHICLES_FINGERPRINT_SOURCE
         )
 
-        current_vehicle_ids = set(vehicles_data.vehicle_id)
-
-        del vehicles_data
-
-        dft1 = psql.read_sql(
-            f"""WITH data_cte AS (
-                SELECT 
-                    motorcycle_id, 
-                    purchase_date, 
-                    warranty_expiration_date,
-                    DATEDIFF(day, purchase_date, warranty_expiration_date) AS warranty_duration,
-                    ROUND(DATEDIFF(day, purchase_date, NOW())/365.25, 2) AS age_in_years,
-                    (CASE 
-                        WHEN age_in_years > warranty_duration THEN 'out of warranty'
-                        WHEN age_in_years <= warranty_duration THEN 'in warranty'
-                        ELSE 'N/A'
-                    END) AS warranty_status
-                FROM generic-vehicles
-                WHERE created_on <= '{self.today.strftime("%F %H:%M:%S.%f%z")}'
-                AND created_on >= '{self.yesterday.strftime("%F %H:%M:%S.%f%z")}'
+        if not changed:
+            logging.warning(
+                f" db has not been replicated yet or there is no new vehicles current number of vehicles: {fingerprint['row_count']}"
             )
+            return None
 
-            SELECT 
-                motorcycle_id, 
-                purchase_date, 
-                warranty_expiration_date,
-                warranty_duration,
-                age_in_years,
-                warranty_status,
-                COUNT(*) OVER (PARTITION BY warranty_status) AS total_by_warranty_status
-            FROM data_cte
-            ORDER BY age_in_years DESC
-            ;""",
-            self.conn,
+        dft1 = self.read_sql(
+            self.queries.sql("vehicles_delta"),
+            params={"today": self.today, "yesterday": self.yesterday},
+            dataset="vehicles",
         )
 
-        if set(dft1.vehicle_id) == current_vehicle_ids:
-            logging.warning(
-                f" db has not been replicated yet or there is no new vehicles current number of vehicles: {len(current_vehicle_ids)}"
-            )
-        else:
-            parquet_buffer, bucket = io.BytesIO(), "generic-name"
+        # The delta ranks every vehicle of the window, a snapshot that replaces
+        # the dataset
+        result = self.dataset_writer.overwrite(
+            "vehicles", dft1, metadata=self.fingerprints.metadata(fingerprint)
+        )
 
-            dft1.to_parquet(parquet_buffer, compression="gzip")
+        self.fingerprints.record("vehicles", fingerprint)
 
-            s3_resource = boto3.resource("s3")
-            s3_resource.Object(bucket, self.VEHICLES).put(
-                Body=parquet_buffer.getvalue()
-            )
+        return result
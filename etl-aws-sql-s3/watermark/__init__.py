@@ -0,0 +1,6 @@
+from .watermarkstore import (
+    WatermarkBackend,
+    LocalWatermarkBackend,
+    S3WatermarkBackend,
+    WatermarkStore,
+)
@@ -0,0 +1,136 @@
+import datetime
+import json
+import os
+
+
+class WatermarkBackend(object):
+    """Storage for the per-dataset watermark state.
+
+    Backends only move small JSON documents around, so a delta run never
+    needs to touch the dataset itself to know where the last load stopped.
+    """
+
+    def read(self, dataset):
+        raise NotImplementedError
+
+    def write(self, dataset, state):
+        raise NotImplementedError
+
+
+class LocalWatermarkBackend(WatermarkBackend):
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _path(self, dataset):
+        return os.path.join(self.directory, f"{dataset}.json")
+
+    def read(self, dataset):
+        try:
+            with open(self._path(dataset)) as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+
+    def write(self, dataset, state):
+        os.makedirs(self.directory, exist_ok=True)
+
+        # Write to a temporary file first so a crash never leaves half a state
+        tmp_path = self._path(dataset) + ".tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(state, file)
+        os.replace(tmp_path, self._path(dataset))
+
+
+class S3WatermarkBackend(WatermarkBackend):
+    def __init__(self, s3c, bucket, prefix):
+        self.s3c = s3c
+        self.bucket = bucket
+        self.prefix = prefix.rstrip("/")
+
+    def _key(self, dataset):
+        return f"{self.prefix}/{dataset}.json"
+
+    def read(self, dataset):
+        try:
+            state = self.s3c.get_object(Bucket=self.bucket, Key=self._key(dataset))
+        except self.s3c.exceptions.NoSuchKey:
+            return None
+
+        return json.loads(state["Body"].read())
+
+    def write(self, dataset, state):
+        self.s3c.put_object(
+            Bucket=self.bucket,
+            Key=self._key(dataset),
+            Body=json.dumps(state).encode("utf-8"),
+            ContentType="application/json",
+        )
+
+
+class WatermarkStore(object):
+    def __init__(self, backend):
+        self.backend = backend
+
+    def get(self, dataset):
+        """Return the stored state of a dataset.
+
+        Input:
+        dataset STR: Dataset name, e.g. "trips".
+
+        Output:
+        Dict: Last committed state, None if the dataset was never loaded.
+        """
+        return self.backend.read(dataset)
+
+    def high_water_mark(self, dataset):
+        state = self.get(dataset)
+
+        return None if state is None else state.get("high_water_mark")
+
+    def commit(self, dataset, high_water_mark, row_count, reset=False, **extra):
+        """Record a successful load. Call it only after the upload succeeded.
+
+        Input:
+        dataset STR: Dataset name, e.g. "trips".
+        high_water_mark STR: Last loaded timestamp, "%F %H:%M:%S.%f%z" formatted.
+        row_count INT: Number of rows written by this load.
+        reset BOOL: True when the load replaced the whole dataset, total_rows
+        then restarts from row_count.
+        extra: Any additional JSON serializable values to keep in the state.
+
+        Output:
+        Dict: The state that has been written.
+        """
+        previous = self.get(dataset) or {}
+        total_rows = 0 if reset else int(previous.get("total_rows", 0))
+
+        state = dict(previous)
+        state.update(extra)
+        state.update(
+            {
+                "dataset": dataset,
+                "high_water_mark": high_water_mark,
+                "row_count": int(row_count),
+                "total_rows": total_rows + int(row_count),
+                "updated_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            }
+        )
+
+        self.backend.write(dataset, state)
+
+        return state
+
+    def update(self, dataset, **values):
+        """Merge values into the state of a dataset without touching its
+        high-water mark or row counters, e.g. to keep a fingerprint.
+
+        Output:
+        Dict: The state that has been written.
+        """
+        state = dict(self.get(dataset) or {"dataset": dataset})
+        state.update(values)
+        state["updated_at"] = datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+        self.backend.write(dataset, state)
+
+        return state
@@ -1,3 +1,6 @@
+import os
+
+
 class Config:
     def __init__(self):
         self.raw_data_folder = "data/raw/raw_data_folder"
@@ -7,3 +10,42 @@ class Config:
         self.bigquery_dataset_id = "my-dataset-id"
         self.bigquery_table_name_1 = "processed_data_file1"
         self.bigquery_table_name_2 = "processed_data_file2"
+        self.raw_data_file1 = os.path.join(self.raw_data_folder, "raw_data_file1.json")
+        self.raw_data_file2 = os.path.join(self.raw_data_folder, "raw_data_file2.json")
+        # Directory, glob pattern or list of raw files run_etl processes
+        self.raw_data_files = os.path.join(self.raw_data_folder, "*.json")
+        # Worker processes ingesting and transforming files, None for one per CPU
+        self.workers = None
+        # Record the stages each raw file went through, reruns then only
+        # process new or changed files
+        self.incremental = True
+        self.manifest_file = "data/manifest.json"
+        # Format of the files handed over between stages: "parquet", "arrow"
+        # (Arrow IPC, memory-mapped by the next stage), "feather" or "json"
+        self.intermediate_format = "parquet"
+        # None uses zstd for Parquet and no compression for Arrow files
+        self.intermediate_compression = None
+        self.chunk_size = 50_000
+        # GeoJSON file of the service areas checked at ingestion, None for the
+        # Barcelona boundaries; "exclude" drops the points inside them,
+        # "include" keeps only those and "tag" keeps all, with a zone_id column
+        self.geofence_file = None
+        self.geofence_mode = "exclude"
+        # "load" submits batch load jobs, "stream" uses insert_rows for small,
+        # low-latency batches
+        self.bigquery_load_mode = "load"
+        self.bigquery_write_disposition = "WRITE_APPEND"
+        self.bigquery_partition_field = None
+
+    def intermediate_data_file(self, name):
+        return os.path.join(
+            self.intermediate_data_folder, f"{name}.{self.intermediate_format}"
+        )
+
+    def processed_data_file(self, name):
+        return os.path.join(
+            self.processed_data_folder, f"{name}.{self.intermediate_format}"
+        )
+
+
+config = Config()
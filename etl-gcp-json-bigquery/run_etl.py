@@ -1,22 +1,290 @@
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from src.data_ingestion import data_ingestion
 from src.data_transformation import data_transformation
+from src.data_transformation.coordinate_validation import RULES
 from src.data_loading import data_loading
+from src.manifest import Manifest, file_hash
 from config import config
 
 
-def run_etl():
-    # Extract raw data
-    raw_data1 = data_ingestion.ingest_raw_data(config.raw_data_file1)
-    raw_data2 = data_ingestion.ingest_raw_data(config.raw_data_file2)
+def resolve_raw_data_files(raw_data_files):
+    """Return the raw files to process, sorted
 
-    # Transform data
-    intermediate_data1 = data_transformation.transform_data(raw_data1)
-    intermediate_data2 = data_transformation.transform_data(raw_data2)
+    Args:
+        raw_data_files (str or list): Directory (every .json file in it), glob
+            pattern, file path, or a list of those
 
-    # Load data to BigQuery
-    data_loading.load_data_to_bigquery(intermediate_data1, config.bigquery_table_name_1)
-    data_loading.load_data_to_bigquery(intermediate_data2, config.bigquery_table_name_2)
+    Raises:
+        FileNotFoundError: Nothing matches raw_data_files
+    """
+    if isinstance(raw_data_files, str):
+        raw_data_files = [raw_data_files]
+
+    paths = []
+    for pattern in raw_data_files:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "*.json")
+        paths.extend(glob.glob(pattern))
+
+    if not paths:
+        raise FileNotFoundError(f"No raw data files match {raw_data_files}")
+
+    return sorted(set(paths))
+
+
+def process_file(
+    raw_data_file,
+    intermediate_data_file,
+    processed_data_file,
+    chunk_size,
+    compression,
+    geofence_file=None,
+    geofence_mode="exclude",
+    done=(),
+):
+    """Ingest and transform one raw file, run in a worker process
+
+    Only paths and counts go back to the parent process: the processed data
+    itself stays in a Parquet or Arrow file the loader reads directly. An
+    error is returned rather than raised, so the stages done before it are
+    still recorded.
+
+    Args:
+        geofence_file (str): See ingest_raw_data
+        geofence_mode (str): See ingest_raw_data
+        done (iterable): Stages already done for this file, skipped
+
+    Returns:
+        dict: raw_data_file, processed_data_file, rows read, bytes read,
+            seconds, stages done as {stage: rows}, rows rejected by the
+            coordinates validation per rule, sha256 of the raw file and error
+            (None on success)
+    """
+    start = time.perf_counter()
+    result = {
+        "raw_data_file": raw_data_file,
+        "processed_data_file": processed_data_file,
+        "rows": 0,
+        "bytes": os.path.getsize(raw_data_file),
+        "stages": {},
+        "rejections": dict.fromkeys(RULES, 0),
+        "sha256": file_hash(raw_data_file),
+        "error": None,
+    }
+
+    try:
+        if "ingested" not in done:
+            result["rows"] = data_ingestion.ingest_raw_data(
+                raw_data_file,
+                intermediate_data_file,
+                chunk_size,
+                compression,
+                geofence_file,
+                geofence_mode,
+            )
+            result["stages"]["ingested"] = result["rows"]
+        if "transformed" not in done:
+            result["stages"]["transformed"] = data_transformation.transform_file(
+                intermediate_data_file,
+                processed_data_file,
+                chunk_size,
+                compression,
+                rejections=result["rejections"],
+            )
+    except Exception as exception:
+        result["error"] = f"{type(exception).__name__}: {exception}"
+
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def report(result):
+    if result["error"] is not None:
+        print(f"{result['raw_data_file']}: failed, {result['error']}")
+        return
+    if not result["stages"]:
+        print(f"{result['raw_data_file']}: unchanged, skipped")
+        return
+
+    seconds = max(result["seconds"], 1e-9)
+    print(
+        f"{result['raw_data_file']}: {result['rows']} rows in {seconds:.2f}s"
+        f" ({result['bytes'] / 1024**2 / seconds:.1f} MiB/s,"
+        f" {result['rows'] / seconds:.0f} rows/s)"
+    )
+
+    rejected = {rule: count for rule, count in result["rejections"].items() if count}
+    if rejected:
+        print(f"{result['raw_data_file']}: rejected {rejected}")
+
+
+def _record(manifest, task, result):
+    report(result)
+
+    if manifest is None:
+        return
+
+    stage_files = {"ingested": task[1], "transformed": task[2]}
+    for stage, rows in result["stages"].items():
+        manifest.record(
+            result["raw_data_file"], stage, stage_files[stage], rows, result["sha256"]
+        )
+
+
+def process_files(raw_data_files, workers=None, manifest=None):
+    """Ingest and transform raw files, one file per worker process
+
+    Args:
+        raw_data_files (str or list): See resolve_raw_data_files
+        workers (int): Number of worker processes, None for one per CPU, 1 to
+            run in the current process
+        manifest (Manifest): Stages already done, files already transformed
+            are skipped and a file that failed resumes at the failed stage.
+            None processes every file
+
+    Returns:
+        list: Results of process_file, in the order of the raw files, with
+            "loaded" True for the files already loaded
+    """
+    tasks, results = [], {}
+    for raw_data_file in resolve_raw_data_files(raw_data_files):
+        name = os.path.splitext(os.path.basename(raw_data_file))[0]
+        # raw_data_file1.json -> intermediate_data_file1, processed_data_file1
+        name = name[len("raw_") :] if name.startswith("raw_") else name
+        done = {} if manifest is None else manifest.stages(raw_data_file)
+        task = (
+            raw_data_file,
+            config.intermediate_data_file(f"intermediate_{name}"),
+            config.processed_data_file(f"processed_{name}"),
+            config.chunk_size,
+            config.intermediate_compression,
+            config.geofence_file,
+            config.geofence_mode,
+            list(done),
+        )
+
+        if "transformed" in done:
+            results[raw_data_file] = {
+                "raw_data_file": raw_data_file,
+                "processed_data_file": done["transformed"]["file"],
+                "rows": 0,
+                "stages": {},
+                "error": None,
+            }
+            report(results[raw_data_file])
+        else:
+            tasks.append(task)
+
+    workers = min(workers or os.cpu_count() or 1, max(len(tasks), 1))
+
+    if workers == 1:
+        for task in tasks:
+            results[task[0]] = process_file(*task)
+            _record(manifest, task, results[task[0]])
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(process_file, *task): task for task in tasks}
+            for future in as_completed(futures):
+                task = futures[future]
+                results[task[0]] = future.result()
+                _record(manifest, task, results[task[0]])
+
+    for raw_data_file, result in results.items():
+        stages = {} if manifest is None else manifest.stages(raw_data_file)
+        result["loaded"] = "loaded" in stages
+
+    return [results[raw_data_file] for raw_data_file in sorted(results)]
+
+
+def run_etl(raw_data_files=None, workers=None, incremental=None):
+    """Run the pipeline over raw files
+
+    Args:
+        raw_data_files (str or list): See resolve_raw_data_files, default
+            config.raw_data_files
+        workers (int): See process_files, default config.workers
+        incremental (bool): Skip files already processed according to the
+            manifest file, default config.incremental
+
+    Raises:
+        RuntimeError: Some files failed, the others are loaded all the same
+            and a rerun resumes the failed files only. Or files changed since
+            they were loaded, which WRITE_APPEND would duplicate and are not
+            loaded. Or BigQuery rejected rows, the files are then not recorded
+            as loaded
+    """
+    raw_data_files = raw_data_files or config.raw_data_files
+    workers = workers or config.workers
+    incremental = config.incremental if incremental is None else incremental
+    manifest = Manifest(config.manifest_file) if incremental else None
+
+    start = time.perf_counter()
+    results = process_files(raw_data_files, workers, manifest)
+    seconds = time.perf_counter() - start
+    print(
+        f"Processed {len(results)} files,"
+        f" {sum(result['rows'] for result in results)} rows in {seconds:.2f}s"
+    )
+
+    # Truncating the table drops what earlier runs loaded, load everything again
+    truncate = config.bigquery_write_disposition == "WRITE_TRUNCATE"
+    to_load = [
+        result
+        for result in results
+        if result["error"] is None and (truncate or not result["loaded"])
+    ]
+
+    # Appending a file changed since it was loaded would keep the rows of its
+    # previous content next to the new ones, only a truncating load replaces them
+    changed = []
+    if manifest is not None and not truncate:
+        changed = [
+            result
+            for result in to_load
+            if manifest.replaces(result["raw_data_file"]) is not None
+        ]
+        to_load = [result for result in to_load if result not in changed]
+
+    # Load data to BigQuery, a single loader for every processed file
+    load_errors = []
+    if to_load:
+        loaded = data_loading.load_data_to_bigquery(
+            *[result["processed_data_file"] for result in to_load],
+            mode=config.bigquery_load_mode,
+            write_disposition=config.bigquery_write_disposition,
+            partition_field=config.bigquery_partition_field,
+        )
+        load_errors = loaded["errors"]
+        if manifest is not None and not load_errors:
+            for result in to_load:
+                manifest.record(
+                    result["raw_data_file"],
+                    "loaded",
+                    result["processed_data_file"],
+                    manifest.stages(result["raw_data_file"])["transformed"]["rows"],
+                )
+    else:
+        print("No new data to load.")
+
+    failed = [result["raw_data_file"] for result in results if result["error"]]
+    if failed:
+        raise RuntimeError(f"Failed to process {failed}, rerun to resume")
+    if changed:
+        raise RuntimeError(
+            f"{[result['raw_data_file'] for result in changed]} changed since they"
+            " were loaded, appending them would duplicate their rows: rerun with"
+            " bigquery_write_disposition WRITE_TRUNCATE"
+        )
+    if load_errors:
+        raise RuntimeError(
+            f"BigQuery rejected rows of {[result['raw_data_file'] for result in to_load]}:"
+            f" {load_errors[:10]}"
+        )
 
 
 if __name__ == "__main__":
-    run_etl()
+    run_etl(sys.argv[1:] or None)
@@ -0,0 +1,156 @@
+import numpy as np
+import pandas as pd
+import pyarrow
+import pyarrow.compute as pc
+
+# Patterns are matched by Arrow's RE2 engine, on a whole column at once
+_NUMBER = r"-?\d{1,3}(?:\.\d+)?"
+
+
+def _degrees_minutes_seconds(name):
+    return (
+        rf"(?P<{name}_degrees>-?\d{{1,3}})\s*°\s*(?P<{name}_minutes>\d{{1,2}}(?:\.\d+)?)\s*'\s*"
+        rf"(?:(?P<{name}_seconds>\d{{1,2}}(?:\.\d+)?)\s*(?:\"|'')\s*)?"
+    )
+
+
+# "41.38,2.17"
+DECIMAL_PATTERN = rf"^\s*(?P<latitude>{_NUMBER})\s*,\s*(?P<longitude>{_NUMBER})\s*$"
+
+# "41.38 N, 2.17 E"
+HEMISPHERE_PATTERN = (
+    rf"^\s*(?P<latitude>{_NUMBER})\s*(?P<latitude_direction>[NSns])\s*,"
+    rf"\s*(?P<longitude>{_NUMBER})\s*(?P<longitude_direction>[EWew])\s*$"
+)
+
+# "41°22'48.5\"N, 2°10'12.3\"E", seconds are optional: "41°22.808'N, 2°10.205'E"
+DMS_PATTERN = (
+    rf"^\s*{_degrees_minutes_seconds('latitude')}(?P<latitude_direction>[NSns])\s*,"
+    rf"\s*{_degrees_minutes_seconds('longitude')}(?P<longitude_direction>[EWew])\s*$"
+)
+
+
+def _number(matches, group):
+    values = matches.field(group)
+    # An optional group that did not match is an empty string
+    values = pc.if_else(pc.equal(values, ""), None, values)
+    return pc.cast(values, pyarrow.float64()).to_numpy(zero_copy_only=False)
+
+
+def _sign(matches, group, negative):
+    is_negative = pc.equal(pc.utf8_upper(matches.field(group)), negative)
+    return np.where(is_negative.to_numpy(zero_copy_only=False), -1.0, 1.0)
+
+
+def _from_decimal(matches):
+    return _number(matches, "latitude"), _number(matches, "longitude")
+
+
+def _from_hemisphere(matches):
+    return (
+        _number(matches, "latitude") * _sign(matches, "latitude_direction", "S"),
+        _number(matches, "longitude") * _sign(matches, "longitude_direction", "W"),
+    )
+
+
+def _from_dms(matches):
+    def _degrees(name):
+        degrees = _number(matches, f"{name}_degrees")
+        magnitude = (
+            np.abs(degrees)
+            + _number(matches, f"{name}_minutes") / 60
+            + np.nan_to_num(_number(matches, f"{name}_seconds")) / 3600
+        )
+        # The sign of the degrees applies to the minutes and seconds too
+        return np.copysign(magnitude, degrees)
+
+    return (
+        _degrees("latitude") * _sign(matches, "latitude_direction", "S"),
+        _degrees("longitude") * _sign(matches, "longitude_direction", "W"),
+    )
+
+
+FORMATS = [
+    (DECIMAL_PATTERN, _from_decimal),
+    (HEMISPHERE_PATTERN, _from_hemisphere),
+    (DMS_PATTERN, _from_dms),
+]
+
+
+def parse_coordinates(coords, errors="raise"):
+    """Parse "latitude, longitude" strings to decimal degrees, for a whole column at once
+
+    Each format is matched with a single vectorized regex extraction over the
+    rows that are not parsed yet, the matched groups are then converted with
+    NumPy arithmetic.
+
+    Args:
+        coords (pandas.Series): Coordinates in decimal degrees ("41.38,2.17"),
+            decimal degrees with hemisphere ("41.38 N, 2.17 E") or degrees,
+            minutes and optional seconds ("41°22'48.5\"N, 2°10'12.3\"E")
+        errors (str): "raise" or "coerce", whether an unparseable value raises
+            or becomes NaN. Missing values are always NaN
+
+    Raises:
+        ValueError: Invalid coordinates format if errors is "raise"
+
+    Returns:
+        pandas.dataframe: float64 latitude and longitude columns, same index as coords
+    """
+    if errors not in ["raise", "coerce"]:
+        raise ValueError("Invalid errors")
+
+    latitude = np.full(len(coords), np.nan)
+    longitude = np.full(len(coords), np.nan)
+
+    positions = np.flatnonzero(coords.notna().to_numpy())
+    remaining = pyarrow.array(coords.iloc[positions].astype(str))
+
+    for pattern, convert in FORMATS:
+        if len(remaining) == 0:
+            break
+
+        matches = pc.extract_regex(remaining, pattern)
+        matched = matches.is_valid().to_numpy(zero_copy_only=False)
+
+        if matched.any():
+            (
+                latitude[positions[matched]],
+                longitude[positions[matched]],
+            ) = convert(matches.filter(matched))
+
+        positions = positions[~matched]
+        remaining = remaining.filter(~matched)
+
+    if len(remaining) and errors == "raise":
+        raise ValueError(
+            f"Invalid coordinates format: {remaining[0].as_py()!r} ({len(remaining)} rows)"
+        )
+
+    return pd.DataFrame(
+        {"latitude": latitude, "longitude": longitude}, index=coords.index
+    )
+
+
+def to_decimal_degrees(coords, coord_type, errors="raise"):
+    """Return one component of a coordinates column as float decimal degrees
+
+    Args:
+        coords (pandas.Series): Coordinates strings, see parse_coordinates, or
+            numbers already in decimal degrees
+        coord_type (str): "latitude" or "longitude"
+        errors (str): "raise" or "coerce", see parse_coordinates
+
+    Raises:
+        ValueError: Invalid coord_type if coord_type is not "latitude" or "longitude"
+
+    Returns:
+        pandas.Series: float64 decimal degrees
+    """
+    if coord_type not in ["latitude", "longitude"]:
+        raise ValueError("Invalid coord_type")
+
+    if pd.api.types.is_numeric_dtype(coords):
+        return coords.astype("float64")
+
+    return parse_coordinates(coords, errors)[coord_type]
@@ -0,0 +1,145 @@
+import os
+from src.data_ingestion.coordinate_parser import to_decimal_degrees
+from src.data_ingestion.geofence import BARCELONA, Geofence
+from src.data_ingestion.json_reader import CHUNK_SIZE, iter_chunks
+from src.intermediate_files import ChunkWriter
+
+DEFAULT_GEOFENCE = Geofence(BARCELONA)
+
+
+def data_ingestion():
+    """Read raw data files, perform data cleaning and validation, and save intermediate data files"""
+    for raw_data_file, intermediate_data_file in [
+        ("raw_data_file1.json", "intermediate_data_file1.json"),
+        ("raw_data_file2.json", "intermediate_data_file2.json"),
+    ]:
+        ingest_raw_data(
+            os.path.join("data/raw/raw_data_folder", raw_data_file),
+            os.path.join(
+                "data/intermediate/intermediate_data_folder", intermediate_data_file
+            ),
+        )
+
+
+def ingest_raw_data(
+    raw_data_file,
+    intermediate_data_file,
+    chunk_size=CHUNK_SIZE,
+    compression=None,
+    geofence_file=None,
+    geofence_mode="exclude",
+):
+    """Clean and validate a raw data file chunk by chunk, so memory use does not
+    depend on the size of the file
+
+    Args:
+        raw_data_file (str): Line-delimited JSON, JSON array or {"data": [...]} file
+        intermediate_data_file (str): .parquet, .arrow/.feather or .json file to write
+        chunk_size (int): Number of records processed at a time
+        compression (str): Compression of the intermediate file, None for the
+            default of its format
+        geofence_file (str): GeoJSON file of the zones, None for Barcelona
+        geofence_mode (str): "exclude", "include" or "tag", see Geofence.filter
+
+    Returns:
+        int: Number of rows written
+    """
+    geofence = None if geofence_file is None else Geofence.from_geojson(geofence_file)
+
+    with ChunkWriter(intermediate_data_file, compression) as writer:
+        for chunk in iter_chunks(raw_data_file, chunk_size, records_key="data"):
+            writer.write(clean_validate_data(chunk, geofence, geofence_mode))
+
+    return writer.rows
+
+
+def clean_validate_data(df, geofence=None, mode="exclude"):
+    """parse and convert GPS coordinates to decimal degrees format
+
+    Args:
+        df (pandas.dataframe): Pandas dataframe ingested from raw data file
+        geofence (Geofence): Zones the GPS points are checked against, None
+            for Barcelona
+        mode (str): "exclude" drops the points inside a zone, "include" keeps
+            only them and "tag" keeps every point, see Geofence.filter
+
+    Returns:
+        pandas.dataframe: Pandas dataframe with cleaned and validated data
+    """
+    # Perform data cleaning and validation
+    # Remove rows with missing values
+    df = df.dropna()
+    # Convert GPS coordinates to decimal degrees format, as floats so the
+    # geofence compares numbers
+    df["latitude"] = to_decimal_degrees(df["latitude"], "latitude")
+    df["longitude"] = to_decimal_degrees(df["longitude"], "longitude")
+
+    # By default drop GPS points within the boundaries of Barcelona
+    geofence = DEFAULT_GEOFENCE if geofence is None else geofence
+
+    return geofence.filter(df, mode)
+
+
+def convert_to_decimal_degrees(coord, coord_type):
+    """Convert GPS coordinates to decimal degrees format, one value at a time.
+    clean_validate_data uses the vectorized to_decimal_degrees instead
+
+    Args:
+        coord (int or float): GPS coordinates
+        coord_type (str): GPS coordinates type
+
+    Raises:
+        ValueError: Invalid coord_type if coord_type is not "latitude" or "longitude"
+        ValueError: Invalid coordinates format if coord is not in the expected format
+
+    Returns:
+        str: GPS coordinates in decimal degrees format
+    """
+    import re
+
+    if coord_type not in ["latitude", "longitude"]:
+        raise ValueError("Invalid coord_type")
+    if re.match("^-?\d{1,3}\.\d+,-?\d{1,3}\.\d+$", coord):
+        # Coordinates in decimal degrees format
+        return coord
+    elif re.match("^-?\d{1,3}\.\d+\s[NS],\s-?\d{1,3}\.\d+\s[EW]$", coord):
+        # Coordinates in decimal minutes format
+        coord = coord.split(",")
+        lat = coord[0].strip()
+        lon = coord[1].strip()
+        lat_dir = lat[-1]
+        lon_dir = lon[-1]
+        lat = float(lat[:-1])
+        lon = float(lon[:-1])
+        lat = lat if lat_dir in ["N", "n"] else -lat
+        lon = lon if lon_dir in ["E", "e"] else -lon
+        return f"{lat},{lon}"
+    elif re.match(
+        "^-?\d{1,3}°\d{1,2}'\d{1,2}\.\d+\"[NS],\s-?\d{1,3}°\d{1,2}'\d{1,2}\.\d+\"[EW]$",
+        coord,
+    ):
+        # Coordinates in degrees, minutes and seconds format
+        coord = coord.split(",")
+        lat = coord[0].strip()
+        lon = coord[1].strip()
+        lat_dir = lat[-1]
+        lon_dir = lon[-1]
+        lat = lat[:-1].split("°")
+        lon = lon[:-1].split("°")
+        lat_deg = float(lat[0])
+        lon_deg = float(lon[0])
+        lat_min = float(lat[1][:-1])
+        lon_min = float(lon[1][:-1])
+        lat_sec = float(lat[2][:-1])
+        lon_sec = float(lon[2][:-1])
+        lat = lat_deg + lat_min / 60 + lat_sec / 3600
+        lon = lon_deg + lon_min / 60 + lon_sec / 3600
+        lat = lat if lat_dir in ["N", "n"] else -lat
+        lon = lon if lon_dir in ["E", "e"] else -lon
+        return f"{lat},{lon}"
+    else:
+        raise ValueError("Invalid coordinates format")
+
+
+if __name__ == "__main__":
+    data_ingestion()
@@ -0,0 +1,190 @@
+import json
+import numpy as np
+import pandas as pd
+
+# "exclude" drops the points inside a zone, "include" keeps only them and
+# "tag" keeps every point; the kept points get the zone_id column
+MODES = ["exclude", "include", "tag"]
+
+# The rectangle clean_validate_data used to hard-code, (latitude, longitude)
+BARCELONA = {"barcelona": [[(41.5, 2.0), (41.5, 2.2), (41.2, 2.2), (41.2, 2.0)]]}
+
+
+class _Zone:
+    """Bounding box and non-horizontal edges of the rings of one zone"""
+
+    def __init__(self, rings):
+        edges = []
+        for ring in rings:
+            ring = np.asarray(ring, dtype=np.float64)
+            # Closed or not, the last vertex connects to the first one
+            if len(ring) > 1 and np.array_equal(ring[0], ring[-1]):
+                ring = ring[:-1]
+            if len(ring) < 3:
+                raise ValueError(f"A ring needs at least 3 vertices, got {len(ring)}")
+            edges.append(np.hstack([ring, np.roll(ring, -1, axis=0)]))
+
+        # latitude1, longitude1, latitude2, longitude2; a horizontal edge is
+        # never crossed by a horizontal ray
+        edges = np.vstack(edges)
+        self.edges = edges[edges[:, 0] != edges[:, 2]]
+
+        vertices = np.vstack([np.asarray(ring, dtype=np.float64) for ring in rings])
+        self.south, self.west = vertices.min(axis=0)
+        self.north, self.east = vertices.max(axis=0)
+
+    def contains(self, latitude, longitude):
+        """Ray casting: a point is inside when a ray going east from it crosses
+        the rings an odd number of times, so holes and disjoint parts work too.
+
+        Points are sorted by latitude once; the points an edge can cross are
+        then the slice between its two latitudes, found with searchsorted, so
+        each edge only touches the points level with it.
+        """
+        inside = np.zeros(len(latitude), dtype=bool)
+
+        # Bounding box prefilter, NaN compares False and is never inside
+        candidates = np.flatnonzero(
+            (latitude >= self.south)
+            & (latitude <= self.north)
+            & (longitude >= self.west)
+            & (longitude <= self.east)
+        )
+        if not len(candidates):
+            return inside
+
+        order = candidates[np.argsort(latitude[candidates], kind="stable")]
+        y = latitude[order]
+        x = longitude[order]
+        crossings = np.zeros(len(order), dtype=bool)
+
+        for latitude1, longitude1, latitude2, longitude2 in self.edges:
+            # An edge counts for the latitudes in [low, high), so a ray through
+            # a vertex is not counted twice
+            start, stop = np.searchsorted(
+                y, [min(latitude1, latitude2), max(latitude1, latitude2)]
+            )
+            if start == stop:
+                continue
+
+            level = slice(start, stop)
+            crossing = longitude1 + (y[level] - latitude1) * (
+                (longitude2 - longitude1) / (latitude2 - latitude1)
+            )
+            crossings[level] ^= x[level] < crossing
+
+        inside[order] = crossings
+        return inside
+
+
+class Geofence:
+    """Set of polygon zones GPS points are located in, vectorized with NumPy"""
+
+    def __init__(self, zones):
+        """
+        Args:
+            zones (dict): Zone id -> list of rings, each a list of (latitude,
+                longitude) vertices. Rings are combined with the even-odd
+                rule: a ring inside another one is a hole
+
+        Raises:
+            ValueError: No zone, or a ring with fewer than 3 vertices
+        """
+        if not zones:
+            raise ValueError("A geofence needs at least one zone")
+
+        self.zone_ids = list(zones)
+        self._zones = [_Zone(rings) for rings in zones.values()]
+        # locate() positions -> zone ids, -1 picks the trailing None
+        self._names = np.array(self.zone_ids + [None], dtype=object)
+
+    @classmethod
+    def from_geojson(cls, path, id_property="zone_id"):
+        """Read the Polygon and MultiPolygon features of a GeoJSON file
+
+        Args:
+            path (str): GeoJSON FeatureCollection, coordinates in [longitude,
+                latitude] order as the format requires
+            id_property (str): Feature property holding the zone id, the
+                feature id or its position when missing. Features with the
+                same zone id make a single zone
+
+        Returns:
+            Geofence: One zone per zone id
+        """
+        with open(path, encoding="utf-8") as file:
+            features = json.load(file)["features"]
+
+        zones = {}
+        for position, feature in enumerate(features):
+            geometry = feature["geometry"]
+            if geometry["type"] == "Polygon":
+                polygons = [geometry["coordinates"]]
+            elif geometry["type"] == "MultiPolygon":
+                polygons = geometry["coordinates"]
+            else:
+                continue
+
+            zone_id = (feature.get("properties") or {}).get(
+                id_property, feature.get("id", position)
+            )
+            zones.setdefault(zone_id, []).extend(
+                [(latitude, longitude) for longitude, latitude, *_ in ring]
+                for polygon in polygons
+                for ring in polygon
+            )
+
+        return cls(zones)
+
+    def locate(self, latitude, longitude):
+        """Find the zone of every point
+
+        Args:
+            latitude (array-like): Latitudes in decimal degrees
+            longitude (array-like): Longitudes in decimal degrees
+
+        Returns:
+            numpy.ndarray: Position in zone_ids of the zone of each point, the
+                first one listed when zones overlap, -1 outside every zone
+        """
+        latitude = np.asarray(latitude, dtype=np.float64)
+        longitude = np.asarray(longitude, dtype=np.float64)
+
+        zones = np.full(len(latitude), -1, dtype=np.int32)
+        for position, zone in enumerate(self._zones):
+            unassigned = np.flatnonzero(zones < 0)
+            inside = zone.contains(latitude[unassigned], longitude[unassigned])
+            zones[unassigned[inside]] = position
+
+        return zones
+
+    def zone_id(self, latitude, longitude):
+        """Return the zone id of every point, None outside every zone"""
+        return self._names[self.locate(latitude, longitude)]
+
+    def filter(self, df, mode="exclude"):
+        """Drop or keep the rows of df by zone
+
+        Args:
+            df (pandas.dataframe): Pandas dataframe with float latitude and
+                longitude columns
+            mode (str): One of MODES
+
+        Raises:
+            ValueError: Unknown mode
+
+        Returns:
+            pandas.dataframe: The rows kept; in "include" and "tag" mode with
+                a zone_id column, missing for the rows outside every zone
+        """
+        if mode not in MODES:
+            raise ValueError(f"Invalid geofence mode {mode}, expected one of {MODES}")
+
+        zones = self.locate(df["latitude"], df["longitude"])
+
+        if mode == "exclude":
+            return df[zones < 0]
+
+        df = df.assign(zone_id=pd.Series(self._names[zones], index=df.index))
+
+        return df[zones >= 0] if mode == "include" else df
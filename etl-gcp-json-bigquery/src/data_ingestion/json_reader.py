@@ -0,0 +1,184 @@
+import itertools
+import json
+import re
+import pandas as pd
+
+BLOCK_SIZE = 1024**2
+CHUNK_SIZE = 50_000
+
+_WHITESPACE = re.compile(r"\s*")
+
+# Characters a number can go on with, e.g. "1" read before ".5"
+_NUMBER_TAIL = set("0123456789.eE+-")
+
+
+class _JsonStream:
+    """Decode JSON values one after another from a file read block by block,
+    so only the current block and the value being decoded are held in memory
+    """
+
+    def __init__(self, file, block_size):
+        self.file = file
+        self.block_size = block_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+
+    def _fill(self):
+        # Drop what has been consumed before reading more
+        block = self.file.read(self.block_size)
+        self.buffer = self.buffer[self.position :] + block
+        self.position = 0
+        self.eof = not block
+        return not self.eof
+
+    def peek(self):
+        """Skip whitespace and return the next character, "" at the end of the file"""
+        while True:
+            self.position = _WHITESPACE.match(self.buffer, self.position).end()
+            if self.position < len(self.buffer) or not self._fill():
+                return self.buffer[self.position : self.position + 1]
+
+    def advance(self):
+        self.position += 1
+
+    def expect(self, character):
+        found = self.peek()
+        if found != character:
+            raise ValueError(f"Expected {character!r} in JSON, got {found!r}")
+        self.advance()
+
+    def decode(self):
+        self.peek()
+
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+
+            # A number cut at the end of the block still decodes, read on to be sure
+            if (
+                end == len(self.buffer) or self.buffer[end] in _NUMBER_TAIL
+            ) and self._fill():
+                continue
+
+            self.position = end
+            return value
+
+    def iter_array(self):
+        """Yield the items of the array whose "[" has just been consumed"""
+        if self.peek() == "]":
+            self.advance()
+            return
+
+        while True:
+            yield self.decode()
+
+            separator = self.peek()
+            self.advance()
+            if separator == "]":
+                return
+            if separator != ",":
+                raise ValueError(
+                    f"Expected ',' or ']' in JSON array, got {separator!r}"
+                )
+
+    def iter_object(self, records_key):
+        """Yield the items of the records_key array of the object whose "{" has
+        just been consumed, or the object itself if it has no such array
+
+        Returns True when the array was found, the rest of the object is unread
+        """
+        members = {}
+
+        if self.peek() == "}":
+            self.advance()
+            yield members
+            return False
+
+        while True:
+            key = self.decode()
+            if not isinstance(key, str):
+                raise ValueError(f"Expected a string key in JSON object, got {key!r}")
+            self.expect(":")
+
+            if key == records_key and self.peek() == "[":
+                self.advance()
+                yield from self.iter_array()
+                return True
+
+            members[key] = self.decode()
+
+            separator = self.peek()
+            self.advance()
+            if separator == "}":
+                yield members
+                return False
+            if separator != ",":
+                raise ValueError(
+                    f"Expected ',' or '}}' in JSON object, got {separator!r}"
+                )
+
+    def iter_values(self):
+        while self.peek():
+            yield self.decode()
+
+
+def iter_records(path, records_key=None, block_size=BLOCK_SIZE):
+    """Yield the records of a JSON file one at a time, without loading the file
+
+    Args:
+        path (str): Line-delimited JSON file (any sequence of JSON values), or a
+            file holding a single JSON array of records
+        records_key (str): If the file starts with an object holding an array
+            under records_key, e.g. {"meta": {...}, "data": [...]}, the records
+            of that array are yielded and the rest of the file is ignored. The
+            members before it are decoded and dropped, an object without it is
+            a line-delimited record
+        block_size (int): Number of characters read at a time
+
+    Returns:
+        generator: Records, in file order
+    """
+    with open(path, encoding="utf-8") as file:
+        stream = _JsonStream(file, block_size)
+
+        if stream.peek() == "[":
+            stream.advance()
+            yield from stream.iter_array()
+        elif records_key is not None and stream.peek() == "{":
+            stream.advance()
+            if not (yield from stream.iter_object(records_key)):
+                yield from stream.iter_values()
+        else:
+            yield from stream.iter_values()
+
+
+def iter_batches(path, batch_size=CHUNK_SIZE, records_key=None):
+    """Yield lists of at most batch_size records, see iter_records"""
+    records = iter_records(path, records_key)
+
+    while True:
+        batch = list(itertools.islice(records, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def iter_chunks(path, chunk_size=CHUNK_SIZE, records_key=None):
+    """Yield pandas dataframes of at most chunk_size records, see iter_records"""
+    for batch in iter_batches(path, chunk_size, records_key):
+        yield pd.DataFrame.from_records(batch)
+
+
+def write_chunk(file, dataframe):
+    """Append a dataframe to an open line-delimited JSON file"""
+    if dataframe.empty:
+        return
+
+    lines = dataframe.to_json(orient="records", lines=True)
+    file.write(lines if lines.endswith("\n") else lines + "\n")
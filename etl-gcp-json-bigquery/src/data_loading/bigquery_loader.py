@@ -0,0 +1,194 @@
+import functools
+import io
+import itertools
+import uuid
+import pyarrow.parquet as pq
+from google.cloud import bigquery
+from src.intermediate_files import file_format, iter_chunks, read_table
+
+# Rows per insert request, the streaming API recommends at most 500
+INSERT_BATCH_SIZE = 500
+
+# Rows per load job, larger inputs are split in several jobs
+LOAD_JOB_ROWS = 5_000_000
+
+# Suffix of the table a load split in several jobs goes through
+STAGING_SUFFIX = "_staging"
+
+
+class BigQueryLoader:
+    """Load stage files into a BigQuery table
+
+    "load" mode submits batch load jobs of Parquet data: free of charge, not
+    size-limited like streaming and atomic. A load split in several jobs fills
+    a staging table first, copied into the destination with a single job.
+    "stream" mode sends rows through insert_rows, for small batches that must
+    be queryable right away.
+    """
+
+    def __init__(
+        self,
+        client,
+        table_id,
+        mode="load",
+        write_disposition=bigquery.WriteDisposition.WRITE_APPEND,
+        partition_field=None,
+        partition_type=bigquery.TimePartitioningType.DAY,
+        max_rows_per_job=LOAD_JOB_ROWS,
+        batch_size=INSERT_BATCH_SIZE,
+    ):
+        """
+        Args:
+            client (bigquery.Client): BigQuery client
+            table_id (str): Destination table, "project.dataset.table"
+            mode (str): "load" or "stream"
+            write_disposition (str): WRITE_APPEND or WRITE_TRUNCATE, applies
+                to the whole load even when it is split in several jobs
+            partition_field (str): Date or timestamp column to partition the
+                destination table on, None for no partitioning
+            partition_type (str): DAY, HOUR, MONTH or YEAR
+            max_rows_per_job (int): Rows above which a file is split in several jobs
+            batch_size (int): Rows per insert_rows request in "stream" mode
+
+        Raises:
+            ValueError: Invalid mode or write_disposition
+        """
+        if mode not in ["load", "stream"]:
+            raise ValueError("Invalid mode")
+        if write_disposition not in [
+            bigquery.WriteDisposition.WRITE_APPEND,
+            bigquery.WriteDisposition.WRITE_TRUNCATE,
+        ]:
+            raise ValueError("Invalid write_disposition")
+
+        self.client = client
+        self.table_id = table_id
+        self.mode = mode
+        self.write_disposition = write_disposition
+        self.partition_field = partition_field
+        self.partition_type = partition_type
+        self.max_rows_per_job = max_rows_per_job
+        self.batch_size = batch_size
+
+    def _job_config(self, write_disposition):
+        job_config = bigquery.LoadJobConfig(
+            source_format=bigquery.SourceFormat.PARQUET,
+            write_disposition=write_disposition,
+        )
+
+        if self.partition_field is not None:
+            job_config.time_partitioning = bigquery.TimePartitioning(
+                type_=self.partition_type, field=self.partition_field
+            )
+
+        return job_config
+
+    def _sources(self, paths):
+        """Yield (open, rows) of Parquet data, one per load job, open returning
+        the file object to upload"""
+        for path in paths:
+            # A Parquet file small enough for one job is uploaded as it is
+            if file_format(path) == "parquet":
+                rows = pq.ParquetFile(path).metadata.num_rows
+                if rows <= self.max_rows_per_job:
+                    if rows:
+                        yield functools.partial(open, path, "rb"), rows
+                    continue
+
+            table = read_table(path)
+            for offset in range(0, table.num_rows, self.max_rows_per_job):
+                chunk = table.slice(offset, self.max_rows_per_job)
+                yield functools.partial(self._encode, chunk), chunk.num_rows
+
+    @staticmethod
+    def _encode(table):
+        buffer = io.BytesIO()
+        pq.write_table(table, buffer, compression="zstd")
+        buffer.seek(0)
+        return buffer
+
+    def _submit(self, source, destination, write_disposition):
+        open_source, _ = source
+        with open_source() as file:
+            return self.client.load_table_from_file(
+                file,
+                destination,
+                job_config=self._job_config(write_disposition),
+            )
+
+    def _load(self, paths):
+        sources = self._sources(paths)
+        first, second = next(sources, None), next(sources, None)
+
+        if first is None:
+            return {"rows": 0, "jobs": [], "errors": []}
+
+        if second is None:
+            job = self._submit(first, self.table_id, self.write_disposition)
+            job.result()
+            return {"rows": first[1], "jobs": [job.job_id], "errors": []}
+
+        # Jobs are atomic one by one only: if one failed after others were
+        # done, their rows would stay in the table and be loaded again by the
+        # next run. They fill a staging table instead, copied into the
+        # destination by a single job once they have all succeeded.
+        staging_id = f"{self.table_id}{STAGING_SUFFIX}_{uuid.uuid4().hex}"
+        jobs, rows = [], 0
+
+        try:
+            for source in itertools.chain([first, second], sources):
+                if not jobs:
+                    # The staging table must exist before anything is appended
+                    job = self._submit(
+                        source, staging_id, bigquery.WriteDisposition.WRITE_TRUNCATE
+                    )
+                    job.result()
+                else:
+                    job = self._submit(
+                        source, staging_id, bigquery.WriteDisposition.WRITE_APPEND
+                    )
+                jobs.append(job)
+                rows += source[1]
+
+            # Appending jobs run concurrently on BigQuery's side
+            for job in jobs[1:]:
+                job.result()
+
+            copy = self.client.copy_table(
+                staging_id,
+                self.table_id,
+                job_config=bigquery.CopyJobConfig(
+                    write_disposition=self.write_disposition
+                ),
+            )
+            copy.result()
+        finally:
+            self.client.delete_table(staging_id, not_found_ok=True)
+
+        return {
+            "rows": rows,
+            "jobs": [job.job_id for job in jobs + [copy]],
+            "errors": [],
+        }
+
+    def _stream(self, paths):
+        table = self.client.get_table(self.table_id)
+        rows, errors = 0, []
+
+        for path in paths:
+            for chunk in iter_chunks(path, self.batch_size):
+                errors.extend(self.client.insert_rows(table, chunk.to_dict("records")))
+                rows += len(chunk)
+
+        return {"rows": rows, "jobs": [], "errors": errors}
+
+    def load_files(self, paths):
+        """Load stage files (.parquet, .arrow/.feather or .json) into the table
+
+        Returns:
+            dict: Number of rows sent, ids of the load jobs and streaming errors
+        """
+        if self.mode == "load":
+            return self._load(paths)
+
+        return self._stream(paths)
@@ -0,0 +1,42 @@
+from google.cloud import bigquery
+from src.data_loading.bigquery_loader import INSERT_BATCH_SIZE, BigQueryLoader
+
+
+def load_data_to_bigquery(
+    *processed_data_files,
+    mode="load",
+    write_disposition=bigquery.WriteDisposition.WRITE_APPEND,
+    partition_field=None,
+    batch_size=INSERT_BATCH_SIZE,
+):
+    """Load data into BigQuery table
+
+    Args:
+        processed_data_files (str): Processed files, .parquet, .arrow/.feather or .json
+        mode (str): "load" for batch load jobs, "stream" for insert_rows
+        write_disposition (str): WRITE_APPEND or WRITE_TRUNCATE ("load" mode)
+        partition_field (str): Column to partition the table on ("load" mode)
+        batch_size (int): Rows per insert_rows request ("stream" mode)
+    """
+    client = bigquery.Client()
+    dataset_id = "my_dataset_id"
+    table_id = "my_table_id"
+
+    loader = BigQueryLoader(
+        client,
+        f"{client.project}.{dataset_id}.{table_id}",
+        mode=mode,
+        write_disposition=write_disposition,
+        partition_field=partition_field,
+        batch_size=batch_size,
+    )
+    result = loader.load_files(processed_data_files)
+
+    if result["errors"] == []:
+        print(f"Data loaded successfully: {result['rows']} rows.")
+    else:
+        print("Errors occurred while loading data:")
+        for error in result["errors"]:
+            print(error)
+
+    return result
@@ -0,0 +1,235 @@
+import json
+import numpy as np
+import pandas as pd
+import pyarrow
+import pyarrow.parquet as pq
+
+# Statistics kept per key, each merges with itself: sums of sums, min of mins...
+STATISTICS = {"sum": "sum", "count": "sum", "min": "min", "max": "max"}
+
+# HyperLogLog registers per key = 2 ** precision, standard error 1.04 / sqrt(registers)
+HLL_PRECISION = 12
+
+METADATA_KEY = b"etl.aggregate"
+
+
+def _leading_zeros(values):
+    """Count the leading zero bits of uint64 values, 64 for 0"""
+    zeros = np.zeros(len(values), dtype=np.uint8)
+    values = values.copy()
+
+    for shift in [32, 16, 8, 4, 2, 1]:
+        top_bits_zero = values < np.uint64(1 << (64 - shift))
+        zeros[top_bits_zero] += shift
+        values[top_bits_zero] <<= np.uint64(shift)
+
+    # Binary search ends at 63 for 0
+    zeros[values == 0] += 1
+    return zeros
+
+
+class PartialAggregate:
+    """Sum, count, min and max of a value column per key, and optionally an
+    approximate count of distinct values of another column (HyperLogLog)
+
+    The state is a partial aggregate: it is updated chunk by chunk, merged
+    with the state of another worker or of a previous run, and saved to a
+    Parquet file, without ever holding more than one row per key, plus the
+    HyperLogLog registers.
+    """
+
+    def __init__(
+        self,
+        keys=("vehicle_id", "year"),
+        value="distance_traveled",
+        distinct=None,
+        precision=HLL_PRECISION,
+    ):
+        """
+        Args:
+            keys (iterable): Columns to group by
+            value (str): Column to sum, count, min and max
+            distinct (str): Column whose distinct values are counted, None for none
+            precision (int): HyperLogLog precision, from 4 to 16
+        """
+        if not 4 <= precision <= 16:
+            raise ValueError("Invalid precision")
+
+        self.keys = list(keys)
+        self.value = value
+        self.distinct = distinct
+        self.precision = precision
+        self.state = None
+        self.registers = None
+
+    def _empty(self):
+        index = pd.MultiIndex.from_arrays([[]] * len(self.keys), names=self.keys)
+        return pd.DataFrame({name: [] for name in STATISTICS}, index=index)
+
+    def _registers(self, chunk):
+        """Return the highest rank seen per key and register, as a Series"""
+        chunk = chunk.dropna(subset=self.keys + [self.distinct])
+        hashes = pd.util.hash_pandas_object(
+            chunk[self.distinct], index=False
+        ).to_numpy()
+
+        rank = _leading_zeros(hashes << np.uint64(self.precision)) + 1
+        rank = np.minimum(rank, 64 - self.precision + 1)
+
+        registers = chunk[self.keys].copy()
+        registers["register"] = (hashes >> np.uint64(64 - self.precision)).astype(
+            np.int32
+        )
+        registers["rank"] = rank
+
+        return registers.groupby(self.keys + ["register"])["rank"].max()
+
+    def update(self, chunk):
+        """Fold a dataframe with the keys and value columns into the state"""
+        partial = PartialAggregate(self.keys, self.value, self.distinct, self.precision)
+        partial.state = chunk.groupby(self.keys)[self.value].agg(list(STATISTICS))
+
+        if self.distinct is not None:
+            partial.registers = self._registers(chunk)
+
+        return self.merge(partial)
+
+    def merge(self, other):
+        """Fold another partial aggregate, e.g. from another worker, into the state
+
+        Raises:
+            ValueError: The aggregates are not over the same columns
+        """
+        if (other.keys, other.value, other.distinct, other.precision) != (
+            self.keys,
+            self.value,
+            self.distinct,
+            self.precision,
+        ):
+            raise ValueError("Cannot merge aggregates over different columns")
+
+        if other.state is None:
+            return self
+
+        if self.state is None:
+            self.state, self.registers = other.state, other.registers
+            return self
+
+        self.state = (
+            pd.concat([self.state, other.state])
+            .groupby(level=self.keys)
+            .agg(STATISTICS)
+        )
+
+        if self.distinct is not None:
+            self.registers = (
+                pd.concat([self.registers, other.registers])
+                .groupby(level=self.keys + ["register"])
+                .max()
+            )
+
+        return self
+
+    def _distinct_counts(self):
+        registers = 2**self.precision
+        alpha = 0.7213 / (1 + 1.079 / registers)
+
+        ranks = self.registers.reset_index()
+        ranks["power"] = np.exp2(-ranks["rank"].astype(np.float64))
+        grouped = ranks.groupby(self.keys).agg(
+            used=("rank", "size"), power=("power", "sum")
+        )
+        grouped = grouped.reindex(self.state.index, fill_value=0)
+
+        empty = registers - grouped["used"]
+        estimate = alpha * registers**2 / (grouped["power"] + empty)
+
+        # Linear counting is more accurate while many registers are empty
+        small = (estimate <= 2.5 * registers) & (empty > 0)
+        estimate[small] = registers * np.log(registers / empty[small])
+
+        return estimate.round().astype(np.int64)
+
+    def result(self, statistics=None):
+        """Return the aggregate as a dataframe with one row per key
+
+        Args:
+            statistics (list): Columns to return among sum, count, min, max,
+                mean and distinct, None for all of them
+
+        Returns:
+            pandas.dataframe: Keys and statistics, sorted by keys
+        """
+        state = self._empty() if self.state is None else self.state.copy()
+        state["mean"] = state["sum"] / state["count"]
+        if self.distinct is not None:
+            state["distinct"] = (
+                self._distinct_counts() if len(state) else pd.Series(dtype="int64")
+            )
+
+        if statistics is not None:
+            state = state[statistics]
+
+        return state.reset_index()
+
+    def save(self, path):
+        """Save the state to a Parquet file, HyperLogLog registers as one
+        binary value per key"""
+        table = self._empty() if self.state is None else self.state
+        table = table.reset_index()
+
+        if self.distinct is not None:
+            dense = np.zeros((len(table), 2**self.precision), dtype=np.uint8)
+            if len(table):
+                rows = self.state.index.get_indexer(
+                    self.registers.index.droplevel("register")
+                )
+                dense[
+                    rows, self.registers.index.get_level_values("register")
+                ] = self.registers.to_numpy()
+            table["registers"] = [row.tobytes() for row in dense]
+
+        table = pyarrow.Table.from_pandas(table, preserve_index=False)
+        settings = {
+            "keys": self.keys,
+            "value": self.value,
+            "distinct": self.distinct,
+            "precision": self.precision,
+        }
+        table = table.replace_schema_metadata(
+            {
+                **(table.schema.metadata or {}),
+                METADATA_KEY: json.dumps(settings),
+            }
+        )
+        pq.write_table(table, path, compression="zstd")
+
+    @classmethod
+    def load(cls, path):
+        """Load a state saved by save"""
+        table = pq.read_table(path)
+        settings = json.loads(table.schema.metadata[METADATA_KEY])
+        aggregate = cls(**settings)
+
+        state = table.to_pandas()
+        registers = state.pop("registers") if aggregate.distinct else None
+        state = state.set_index(aggregate.keys)
+        if state.empty:
+            return aggregate
+
+        aggregate.state = state
+
+        if registers is not None:
+            dense = np.frombuffer(b"".join(registers), dtype=np.uint8).reshape(
+                len(state), -1
+            )
+            rows, register = np.nonzero(dense)
+            index = state.index[rows].to_frame(index=False)
+            index["register"] = register.astype(np.int32)
+            aggregate.registers = pd.Series(
+                dense[rows, register],
+                index=pd.MultiIndex.from_frame(index),
+                name="rank",
+            )
+
+        return aggregate
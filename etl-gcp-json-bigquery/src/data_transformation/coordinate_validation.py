@@ -0,0 +1,83 @@
+import numpy as np
+import pyarrow
+import pyarrow.compute as pc
+from src.data_ingestion.coordinate_parser import parse_coordinates
+
+# Rules in the order they are checked, a rejected row only counts for the first one it fails
+RULES = ["missing", "format", "latitude_range", "longitude_range", "bounding_box"]
+
+_DECIMAL = r"^-?\d{1,3}(?:\.\d+)?$"
+
+
+def _split_decimal(coords):
+    """Split "latitude,longitude" strings once into two float32 arrays, NaN where
+    a part is not a plain decimal number
+    """
+    # Rows without a comma become null, so every split row has both parts
+    coords = pc.if_else(pc.match_substring(coords, ","), coords, None)
+    parts = pc.split_pattern(coords, ",", max_splits=1)
+
+    def _part(index):
+        values = pc.utf8_trim_whitespace(pc.list_element(parts, index))
+        values = pc.if_else(pc.match_substring_regex(values, _DECIMAL), values, None)
+        return pc.cast(values, pyarrow.float32()).to_numpy(zero_copy_only=False)
+
+    return _part(0), _part(1)
+
+
+def validate_coordinates(coords, bounding_box=None):
+    """Validate a column of GPS coordinates with NumPy masks
+
+    Plain "latitude,longitude" rows take the fast path, the other formats
+    supported by the ingestion parser (hemisphere, degrees/minutes/seconds)
+    are parsed for the rows that need it only.
+
+    Args:
+        coords (pandas.Series): GPS coordinates strings
+        bounding_box (dict): Optional north, south, west and east limits the
+            points must lie within
+
+    Returns:
+        tuple: float32 latitude and longitude arrays, boolean mask of the valid
+            rows and a dict with the number of rejected rows per rule
+    """
+    missing = coords.isna().to_numpy()
+
+    latitude, longitude = _split_decimal(
+        pyarrow.array(coords, type=pyarrow.string(), from_pandas=True)
+    )
+
+    other_format = ~missing & (np.isnan(latitude) | np.isnan(longitude))
+    if other_format.any():
+        parsed = parse_coordinates(coords[other_format], errors="coerce")
+        latitude[other_format] = parsed["latitude"].to_numpy(dtype=np.float32)
+        longitude[other_format] = parsed["longitude"].to_numpy(dtype=np.float32)
+
+    checks = [
+        ("missing", missing),
+        ("format", ~missing & (np.isnan(latitude) | np.isnan(longitude))),
+        ("latitude_range", np.abs(latitude) > 90),
+        ("longitude_range", np.abs(longitude) > 180),
+    ]
+
+    if bounding_box is not None:
+        checks.append(
+            (
+                "bounding_box",
+                ~(
+                    (latitude < bounding_box["north"])
+                    & (latitude > bounding_box["south"])
+                    & (longitude > bounding_box["west"])
+                    & (longitude < bounding_box["east"])
+                ),
+            )
+        )
+
+    rejected = np.zeros(len(coords), dtype=bool)
+    rejections = dict.fromkeys(RULES, 0)
+    for rule, failed in checks:
+        failed = failed & ~rejected
+        rejections[rule] = int(failed.sum())
+        rejected |= failed
+
+    return latitude, longitude, ~rejected, rejections
@@ -0,0 +1,130 @@
+import os
+from src.data_ingestion.json_reader import CHUNK_SIZE
+from src.intermediate_files import ChunkWriter, iter_chunks
+from src.data_transformation.aggregation import PartialAggregate
+from src.data_transformation.coordinate_validation import validate_coordinates
+
+
+def clean_validate_data(dataframe, bounding_box=None, rejections=None):
+    """Drop the rows whose GPS coordinates are missing, malformed or out of range
+
+    Args:
+        dataframe (pandas.dataframe): Pandas dataframe with a gps_coordinates column
+        bounding_box (dict): Optional north, south, west and east limits the
+            points must lie within
+        rejections (dict): Rows rejected per rule, see RULES, the counts of
+            this dataframe are added to it
+
+    Returns:
+        pandas.dataframe: Pandas dataframe with the valid rows only
+    """
+    _, _, valid, rejected = validate_coordinates(
+        dataframe["gps_coordinates"], bounding_box
+    )
+
+    if rejections is not None:
+        for rule, count in rejected.items():
+            rejections[rule] = rejections.get(rule, 0) + count
+
+    return dataframe[valid]
+
+
+def aggregate_data(dataframe):
+    """Aggregate data by vehicle_id and year
+
+    Args:
+        dataframe (pandas.dataframe): Pandas dataframe with cleaned and validated data
+
+    Returns:
+        pandas.dataframe: Pandas dataframe with aggregated data
+    """
+    return _distances(PartialAggregate().update(dataframe))
+
+
+def _distances(aggregate):
+    return aggregate.result(["sum"]).rename(columns={"sum": "distance_traveled"})
+
+
+def transform_data(dataframe):
+    """Apply any desired data transformations
+
+    Args:
+        dataframe (pandas.dataframe): Pandas dataframe with aggregated data
+
+    Returns:
+        pandas.dataframe: Pandas dataframe with transformed data
+    """
+    # Apply any desired data transformations
+    dataframe["distance_traveled"] = dataframe["distance_traveled"] * 0.621371
+    return dataframe
+
+
+def process_data(dataframe):
+    dataframe = clean_validate_data(dataframe)
+    dataframe = aggregate_data(dataframe)
+    dataframe = transform_data(dataframe)
+    return dataframe
+
+
+def process_data_chunks(chunks, aggregate=None, rejections=None):
+    """Clean, aggregate and transform a stream of dataframes
+
+    Each chunk is folded into a partial aggregate, so memory use depends on
+    the number of vehicle_id and year groups, not on the number of rows.
+
+    Args:
+        chunks (iterable): Pandas dataframes with the columns of process_data
+        aggregate (PartialAggregate): State to fold the chunks into, e.g. the
+            state of a previous run, None to start from nothing
+        rejections (dict): See clean_validate_data
+
+    Returns:
+        pandas.dataframe: Pandas dataframe with transformed data
+    """
+    aggregate = aggregate or PartialAggregate()
+
+    for chunk in chunks:
+        aggregate.update(clean_validate_data(chunk, rejections=rejections))
+
+    return transform_data(_distances(aggregate))
+
+
+def transform_file(
+    intermediate_data_file,
+    processed_data_file,
+    chunk_size=CHUNK_SIZE,
+    compression=None,
+    state_file=None,
+    rejections=None,
+):
+    """Process an intermediate file chunk by chunk and write the result
+
+    Args:
+        intermediate_data_file (str): .parquet, .arrow/.feather or .json file
+        processed_data_file (str): File to write, same formats
+        chunk_size (int): Number of rows processed at a time
+        compression (str): Compression of the processed file, None for the
+            default of its format
+        state_file (str): Parquet file of the aggregate state: the new data is
+            folded into the state saved by the previous run and the processed
+            file holds the totals of every run. None aggregates this file alone
+        rejections (dict): See clean_validate_data
+
+    Returns:
+        int: Number of rows written
+    """
+    aggregate = PartialAggregate()
+    if state_file is not None and os.path.exists(state_file):
+        aggregate = PartialAggregate.load(state_file)
+
+    dataframe = process_data_chunks(
+        iter_chunks(intermediate_data_file, chunk_size), aggregate, rejections
+    )
+
+    with ChunkWriter(processed_data_file, compression) as writer:
+        writer.write(dataframe)
+
+    if state_file is not None:
+        aggregate.save(state_file)
+
+    return writer.rows
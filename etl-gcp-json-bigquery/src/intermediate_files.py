@@ -0,0 +1,178 @@
+import os
+import pyarrow
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+from src.data_ingestion import json_reader
+
+# File extension -> format of the files handed over between stages
+FORMATS = {
+    ".parquet": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+    ".json": "json",
+}
+
+# Uncompressed Arrow files are memory-mapped without any decode
+DEFAULT_COMPRESSION = {"parquet": "zstd", "arrow": None, "json": None}
+
+
+def file_format(path):
+    """Return the format of a stage file from its extension
+
+    Raises:
+        ValueError: Unsupported intermediate file extension
+    """
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension not in FORMATS:
+        raise ValueError(f"Unsupported intermediate file extension: {path}")
+
+    return FORMATS[extension]
+
+
+class ChunkWriter:
+    """Write pandas dataframes one after another into a single stage file
+
+    Parquet files get one row group per chunk and Arrow IPC (Feather V2) files
+    one record batch per chunk. The file starts with the schema of the first
+    non-empty chunk. A later chunk whose types differ, e.g. a column of None
+    then strings, or ints then floats, widens it: the schemas are unified,
+    null types promoted, and the chunks written so far are rewritten once
+    with the unified schema. Columns missing from a chunk are written as nulls.
+    """
+
+    def __init__(self, path, compression=None):
+        self.path = path
+        self.format = file_format(path)
+        self.compression = compression or DEFAULT_COMPRESSION[self.format]
+        self.rows = 0
+        self.schema = None
+        self._writer = None
+        self._file = None
+
+    def __enter__(self):
+        if self.format == "json":
+            self._file = open(self.path, "w", encoding="utf-8")
+        return self
+
+    def _open(self, schema):
+        if self.format == "parquet":
+            return pq.ParquetWriter(self.path, schema, compression=self.compression)
+
+        return ipc.new_file(
+            self.path, schema, options=ipc.IpcWriteOptions(compression=self.compression)
+        )
+
+    @staticmethod
+    def _conform(table, schema):
+        columns = [
+            (
+                table[field.name].cast(field.type)
+                if field.name in table.column_names
+                else pyarrow.nulls(len(table), field.type)
+            )
+            for field in schema
+        ]
+        return pyarrow.Table.from_arrays(columns, schema=schema)
+
+    def _widen(self, schema):
+        """Rewrite the chunks written so far with schema, then carry on"""
+        self._writer.close()
+
+        root, extension = os.path.splitext(self.path)
+        previous = f"{root}.widening{extension}"
+        os.replace(self.path, previous)
+
+        self.schema = schema
+        self._writer = self._open(schema)
+        for batch in _iter_batches(previous):
+            self._writer.write_table(
+                self._conform(pyarrow.Table.from_batches([batch]), schema)
+            )
+
+        os.remove(previous)
+
+    def write(self, dataframe):
+        if dataframe.empty:
+            return
+
+        if self.format == "json":
+            json_reader.write_chunk(self._file, dataframe)
+        else:
+            table = pyarrow.Table.from_pandas(dataframe, preserve_index=False)
+            if self._writer is None:
+                self.schema = table.schema
+                self._writer = self._open(self.schema)
+            elif not table.schema.equals(self.schema):
+                schema = pyarrow.unify_schemas(
+                    [self.schema, table.schema], promote_options="permissive"
+                )
+                if not schema.equals(self.schema):
+                    self._widen(schema)
+                table = self._conform(table, self.schema)
+            self._writer.write_table(table)
+
+        self.rows += len(dataframe)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._file is not None:
+            self._file.close()
+            return
+
+        # Readers expect a file even when every row has been dropped
+        if self._writer is None:
+            self._writer = self._open(pyarrow.schema([]))
+        self._writer.close()
+
+
+def iter_chunks(path, chunk_size=json_reader.CHUNK_SIZE):
+    """Yield the content of a stage file as pandas dataframes of at most chunk_size rows
+
+    Parquet and Arrow files are memory-mapped: Arrow record batches are read
+    without a copy, Parquet row groups are decoded one batch at a time.
+    """
+    file_type = file_format(path)
+
+    if file_type == "json":
+        yield from json_reader.iter_chunks(path, chunk_size, records_key="data")
+
+    elif file_type == "parquet":
+        parquet_file = pq.ParquetFile(path, memory_map=True)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+
+    else:
+        with pyarrow.memory_map(path) as source:
+            reader = ipc.open_file(source)
+            for index in range(reader.num_record_batches):
+                batch = reader.get_batch(index)
+                for offset in range(0, batch.num_rows, chunk_size):
+                    yield batch.slice(offset, chunk_size).to_pandas()
+
+
+def _iter_batches(path):
+    """Yield the record batches of a Parquet or Arrow stage file"""
+    if file_format(path) == "parquet":
+        yield from pq.ParquetFile(path, memory_map=True).iter_batches()
+        return
+
+    with pyarrow.memory_map(path) as source:
+        reader = ipc.open_file(source)
+        for index in range(reader.num_record_batches):
+            yield reader.get_batch(index)
+
+
+def read_table(path):
+    """Read a whole stage file as a pyarrow.Table, memory-mapped when possible"""
+    file_type = file_format(path)
+
+    if file_type == "parquet":
+        return pq.read_table(path, memory_map=True)
+
+    if file_type == "arrow":
+        with pyarrow.memory_map(path) as source:
+            return ipc.open_file(source).read_all()
+
+    return pyarrow.Table.from_pylist(
+        list(json_reader.iter_records(path, records_key="data"))
+    )
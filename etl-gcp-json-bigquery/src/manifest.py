@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+
+# Pipeline stages, in order, a raw file goes through
+STAGES = ["ingested", "transformed", "loaded"]
+
+
+def file_hash(path, block_size=1024**2):
+    """Return the SHA-256 of a file, read block by block"""
+    sha256 = hashlib.sha256()
+
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(block_size), b""):
+            sha256.update(block)
+
+    return sha256.hexdigest()
+
+
+class Manifest:
+    """Record the stages each raw file has been through, so a rerun only
+    processes new or changed files and resumes a failed file where it stopped
+
+    Entries are keyed by path and hold the size, mtime and SHA-256 of the file
+    when its stages were run. A file whose size and mtime are unchanged is not
+    read again; if only the mtime changed, the hash decides.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as file:
+                self.entries = json.load(file)
+
+    def save(self):
+        # Write then rename, a crash never leaves a truncated manifest
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump(self.entries, file, indent=4, sort_keys=True)
+        os.replace(temporary, self.path)
+
+    def _entry(self, raw_data_file, sha256=None):
+        """Return the entry of a raw file if its content is unchanged, else None"""
+        stat = os.stat(raw_data_file)
+        entry = self.entries.get(os.path.normpath(raw_data_file))
+
+        if entry is None or entry["size"] != stat.st_size:
+            return None
+        if entry["mtime"] != stat.st_mtime_ns:
+            if entry["sha256"] != (sha256 or file_hash(raw_data_file)):
+                return None
+            entry["mtime"] = stat.st_mtime_ns
+
+        return entry
+
+    def stages(self, raw_data_file):
+        """Return the stages already done for the current content of a raw file
+
+        A stage whose output file has gone is done again when the next stage
+        needs that file, e.g. deleting an intermediate file after
+        transformation does not make the raw file run again.
+
+        Returns:
+            dict: Stage -> {"file": output file, "rows": rows}, in STAGES order
+        """
+        entry = self._entry(raw_data_file)
+        stages = {} if entry is None else entry["stages"]
+
+        done = {}
+        for stage in STAGES:
+            if stage not in stages:
+                break
+            done[stage] = stages[stage]
+
+        while 0 < len(done) < len(STAGES):
+            last = STAGES[len(done) - 1]
+            if os.path.exists(done[last]["file"]):
+                break
+            del done[last]
+
+        return done
+
+    def replaces(self, raw_data_file):
+        """Return the load of a previous content of a raw file, whose rows are
+        still in the table, None if the file was not loaded before it changed
+
+        Returns:
+            dict: {"file": file loaded, "rows": rows loaded}
+        """
+        entry = self._entry(raw_data_file)
+        return None if entry is None else entry.get("replaces")
+
+    def record(self, raw_data_file, stage, output_file, rows, sha256=None):
+        """Record a stage as done for the current content of a raw file and save
+
+        Args:
+            raw_data_file (str): Raw file
+            stage (str): One of STAGES
+            output_file (str): File the stage wrote, or loaded for "loaded"
+            rows (int): Number of rows written or loaded
+            sha256 (str): Hash of the raw file if already known
+
+        Raises:
+            ValueError: Invalid stage
+        """
+        if stage not in STAGES:
+            raise ValueError("Invalid stage")
+
+        entry = self._entry(raw_data_file, sha256)
+        if entry is None:
+            previous = self.entries.get(os.path.normpath(raw_data_file), {})
+            stat = os.stat(raw_data_file)
+            entry = {
+                "size": stat.st_size,
+                "mtime": stat.st_mtime_ns,
+                "sha256": sha256 or file_hash(raw_data_file),
+                "stages": {},
+            }
+
+            # The rows loaded from the previous content are still in the table
+            replaces = previous.get("stages", {}).get("loaded") or previous.get(
+                "replaces"
+            )
+            if replaces is not None:
+                entry["replaces"] = replaces
+
+        # Redoing a stage makes the stages after it stale
+        for later in STAGES[STAGES.index(stage) :]:
+            entry["stages"].pop(later, None)
+        entry["stages"][stage] = {"file": output_file, "rows": rows}
+
+        if stage == "loaded":
+            entry.pop("replaces", None)
+
+        self.entries[os.path.normpath(raw_data_file)] = entry
+        self.save()
@@ -0,0 +1,244 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from google.cloud import bigquery
+from src.data_loading.bigquery_loader import BigQueryLoader
+from src.intermediate_files import ChunkWriter
+
+
+class FakeJob:
+    def __init__(self, job_id, client, error=None):
+        self.job_id = job_id
+        self.client = client
+        self.error = error
+        self.done = False
+
+    def result(self):
+        self.client.events.append(("result", self.job_id))
+        if self.error is not None:
+            raise self.error
+        self.done = True
+        return self
+
+
+class FakeClient:
+    """Stand-in for bigquery.Client recording what would be sent"""
+
+    def __init__(self, failing_job=None):
+        self.jobs = []
+        self.events = []
+        self.inserted = []
+        self.failing_job = failing_job
+
+    def load_table_from_file(self, file_obj, destination, job_config=None):
+        job_id = f"job_{len(self.jobs)}"
+        job = FakeJob(
+            job_id,
+            self,
+            RuntimeError("load failed") if job_id == self.failing_job else None,
+        )
+        self.jobs.append(
+            {
+                "job": job,
+                "destination": destination,
+                "job_config": job_config,
+                "table": pq.read_table(file_obj),
+            }
+        )
+        self.events.append(("load", job.job_id, job_config.write_disposition))
+        return job
+
+    def copy_table(self, source, destination, job_config=None):
+        self.events.append(("copy", source, destination, job_config.write_disposition))
+        return FakeJob("copy_job", self)
+
+    def delete_table(self, table_id, not_found_ok=False):
+        self.events.append(("delete", table_id))
+
+    def get_table(self, table_id):
+        return table_id
+
+    def insert_rows(self, table, rows):
+        self.inserted.append(rows)
+        return []
+
+
+class TestBigQueryLoader(unittest.TestCase):
+    """This test file tests loading stage
+    files into BigQuery with a fake client.
+
+    test_single_job() checks a small Parquet
+    file goes in one load job, as it is.
+
+    test_chunked_jobs() checks a large file is
+    split into jobs filling a staging table,
+    copied into the table with one job.
+
+    test_failed_job() checks a failed job
+    leaves the table untouched and drops the
+    staging table.
+
+    test_stream() checks insert_rows still
+    gets batches of batch_size rows.
+    """
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.dataframe = pd.DataFrame(
+            {
+                "vehicle_id": np.arange(1_000) % 7,
+                "distance_traveled": np.linspace(0.0, 100.0, 1_000),
+                "created_at": pd.date_range("2023-01-01", periods=1_000, freq="h"),
+            }
+        )
+        self.client = FakeClient()
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def _write(self, name, dataframe=None):
+        path = os.path.join(self.folder.name, name)
+        with ChunkWriter(path) as writer:
+            writer.write(self.dataframe if dataframe is None else dataframe)
+        return path
+
+    def _loaded(self):
+        return pd.concat(
+            [job["table"].to_pandas() for job in self.client.jobs], ignore_index=True
+        )
+
+    def test_single_job(self):
+        path = self._write("processed.parquet")
+        loader = BigQueryLoader(self.client, "project.dataset.table")
+
+        result = loader.load_files([path])
+
+        self.assertEqual(result, {"rows": 1_000, "jobs": ["job_0"], "errors": []})
+        job = self.client.jobs[0]
+        self.assertEqual(job["destination"], "project.dataset.table")
+        self.assertEqual(job["job_config"].source_format, bigquery.SourceFormat.PARQUET)
+        self.assertIsNone(job["job_config"].time_partitioning)
+        self.assertTrue(job["job"].done)
+        pd.testing.assert_frame_equal(self._loaded(), self.dataframe, check_dtype=False)
+
+    def test_chunked_jobs(self):
+        paths = [self._write("first.arrow"), self._write("second.parquet")]
+        loader = BigQueryLoader(
+            self.client,
+            "project.dataset.table",
+            write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
+            max_rows_per_job=400,
+        )
+
+        result = loader.load_files(paths)
+
+        self.assertEqual(result["rows"], 2_000)
+        self.assertEqual(len(result["jobs"]), 7)
+        self.assertEqual(result["jobs"][-1], "copy_job")
+        self.assertEqual(
+            [len(job["table"]) for job in self.client.jobs],
+            [400, 400, 200, 400, 400, 200],
+        )
+
+        staging_id = self.client.jobs[0]["destination"]
+        self.assertTrue(staging_id.startswith("project.dataset.table_staging_"))
+        self.assertTrue(
+            all(job["destination"] == staging_id for job in self.client.jobs)
+        )
+
+        # Nothing is appended before the staging table is created
+        self.assertEqual(
+            self.client.events[:3],
+            [
+                ("load", "job_0", bigquery.WriteDisposition.WRITE_TRUNCATE),
+                ("result", "job_0"),
+                ("load", "job_1", bigquery.WriteDisposition.WRITE_APPEND),
+            ],
+        )
+        # The table is written by a single copy once every job is done
+        self.assertEqual(
+            self.client.events[-3:],
+            [
+                (
+                    "copy",
+                    staging_id,
+                    "project.dataset.table",
+                    bigquery.WriteDisposition.WRITE_TRUNCATE,
+                ),
+                ("result", "copy_job"),
+                ("delete", staging_id),
+            ],
+        )
+        self.assertTrue(all(job["job"].done for job in self.client.jobs))
+        pd.testing.assert_frame_equal(
+            self._loaded(),
+            pd.concat([self.dataframe, self.dataframe], ignore_index=True),
+            check_dtype=False,
+        )
+
+    def test_failed_job(self):
+        self.client = FakeClient(failing_job="job_2")
+        loader = BigQueryLoader(
+            self.client, "project.dataset.table", max_rows_per_job=400
+        )
+
+        with self.assertRaises(RuntimeError):
+            loader.load_files([self._write("processed.parquet")])
+
+        events = [event[0] for event in self.client.events]
+        self.assertNotIn("copy", events)
+        self.assertEqual(
+            self.client.events[-1], ("delete", self.client.jobs[0]["destination"])
+        )
+
+    def test_partitioning(self):
+        loader = BigQueryLoader(
+            self.client,
+            "project.dataset.table",
+            partition_field="created_at",
+            partition_type=bigquery.TimePartitioningType.MONTH,
+        )
+
+        loader.load_files([self._write("processed.parquet")])
+
+        partitioning = self.client.jobs[0]["job_config"].time_partitioning
+        self.assertEqual(partitioning.field, "created_at")
+        self.assertEqual(partitioning.type_, bigquery.TimePartitioningType.MONTH)
+
+    def test_json_and_empty_files(self):
+        json_path = self._write("processed.json", self.dataframe.iloc[:10, :2])
+        empty_path = self._write("empty.parquet", self.dataframe.iloc[:0])
+        loader = BigQueryLoader(self.client, "project.dataset.table")
+
+        result = loader.load_files([json_path, empty_path])
+
+        self.assertEqual(result["rows"], 10)
+        self.assertEqual(len(self.client.jobs), 1)
+
+    def test_stream(self):
+        loader = BigQueryLoader(
+            self.client, "project.dataset.table", mode="stream", batch_size=300
+        )
+
+        result = loader.load_files([self._write("processed.parquet")])
+
+        self.assertEqual(result, {"rows": 1_000, "jobs": [], "errors": []})
+        self.assertEqual(
+            [len(rows) for rows in self.client.inserted], [300] * 3 + [100]
+        )
+        self.assertEqual(self.client.jobs, [])
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            BigQueryLoader(self.client, "project.dataset.table", mode="copy")
+        with self.assertRaises(ValueError):
+            BigQueryLoader(
+                self.client, "project.dataset.table", write_disposition="WRITE_EMPTY"
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
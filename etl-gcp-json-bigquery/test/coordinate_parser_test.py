@@ -0,0 +1,122 @@
+import time
+import unittest
+import numpy as np
+import pandas as pd
+from src.data_ingestion.coordinate_parser import parse_coordinates, to_decimal_degrees
+from src.data_ingestion.data_ingestion import convert_to_decimal_degrees
+
+
+class TestCoordinateParser(unittest.TestCase):
+    """This test file tests the vectorized GPS
+    coordinates parser of data ingestion.
+
+    test_parse_formats() checks every supported
+    format is converted to float decimal degrees.
+
+    test_benchmark() compares the parser with the
+    former per-row convert_to_decimal_degrees on
+    the same rows and prints both timings. Degrees,
+    minutes and seconds rows are left out of the
+    comparison, the per-row function cannot split
+    them and raises.
+    """
+
+    def test_parse_formats(self):
+        coords = pd.Series(
+            [
+                "40.785091,-73.968285",
+                "40.785091 N, 73.968285 W",
+                "40.785091 s, 73.968285 e",
+                "40°47'6.32752\"N, 73°58'5.82680\"W",
+                "40° 47' 6.32752'' N, 73° 58' 5.82680'' W",
+                "40° 47.10546' N, 73° 58.0971' W",
+            ],
+            index=[10, 11, 12, 13, 14, 15],
+        )
+
+        parsed = parse_coordinates(coords)
+
+        self.assertEqual(list(parsed.index), list(coords.index))
+        self.assertEqual(parsed["latitude"].dtype, np.float64)
+        np.testing.assert_allclose(
+            parsed["latitude"], [40.785091, 40.785091, -40.785091] + [40.785091] * 3
+        )
+        np.testing.assert_allclose(
+            parsed["longitude"],
+            [-73.968285, -73.968285, 73.968285] + [-73.968285] * 3,
+            rtol=1e-7,
+        )
+
+    def test_invalid_and_missing_values(self):
+        coords = pd.Series(["41.38,2.17", None, "somewhere"])
+
+        with self.assertRaises(ValueError):
+            parse_coordinates(coords)
+
+        parsed = parse_coordinates(coords, errors="coerce")
+        self.assertEqual(parsed["latitude"].iloc[0], 41.38)
+        self.assertTrue(parsed.iloc[1:].isna().all().all())
+
+    def test_to_decimal_degrees(self):
+        coords = pd.Series(["41.38 N, 2.17 W"])
+
+        self.assertEqual(to_decimal_degrees(coords, "latitude").iloc[0], 41.38)
+        self.assertEqual(to_decimal_degrees(coords, "longitude").iloc[0], -2.17)
+        self.assertEqual(
+            to_decimal_degrees(pd.Series([41, 42]), "latitude").dtype, np.float64
+        )
+        with self.assertRaises(ValueError):
+            to_decimal_degrees(coords, "altitude")
+
+    def test_benchmark(self):
+        rows = 100_000
+        rng = np.random.default_rng(0)
+        lat = rng.uniform(-89, 89, rows)
+        lon = rng.uniform(-179, 179, rows)
+
+        def _hemisphere(value, positive, negative):
+            return f"{abs(value):.6f} {positive if value >= 0 else negative}"
+
+        def _dms(value, positive, negative):
+            value, direction = abs(value), positive if value >= 0 else negative
+            return f"{int(value)}°{int(value * 60 % 60)}'{value * 3600 % 60:.4f}\"{direction}"
+
+        formats = [
+            lambda la, lo: f"{la:.6f},{lo:.6f}",
+            lambda la, lo: f"{_hemisphere(la, 'N', 'S')}, {_hemisphere(lo, 'E', 'W')}",
+            lambda la, lo: f"{_dms(la, 'N', 'S')}, {_dms(lo, 'E', 'W')}",
+        ]
+        coords = pd.Series(
+            [formats[i % 3](la, lo) for i, (la, lo) in enumerate(zip(lat, lon))]
+        )
+        comparable = coords[np.arange(rows) % 3 != 2]
+
+        started = time.perf_counter()
+        legacy = comparable.apply(lambda x: convert_to_decimal_degrees(x, "latitude"))
+        legacy_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        parsed = parse_coordinates(comparable)
+        vectorized_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        parsed_all = parse_coordinates(coords)
+        all_formats_seconds = time.perf_counter() - started
+
+        print(
+            f"\n{len(comparable)} rows: per-row {legacy_seconds:.3f}s,"
+            f" vectorized {vectorized_seconds:.3f}s;"
+            f" {rows} rows with degrees, minutes and seconds:"
+            f" vectorized {all_formats_seconds:.3f}s"
+        )
+
+        legacy = legacy.str.split(",", expand=True).astype(float)
+        np.testing.assert_allclose(parsed["latitude"], legacy[0])
+        np.testing.assert_allclose(parsed["longitude"], legacy[1])
+        np.testing.assert_allclose(parsed_all["latitude"], lat, atol=1e-6)
+        np.testing.assert_allclose(parsed_all["longitude"], lon, atol=1e-6)
+        self.assertLess(vectorized_seconds, legacy_seconds)
+
+
+if __name__ == "__main__":
+    unittest.main()
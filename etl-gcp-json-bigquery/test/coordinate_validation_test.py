@@ -0,0 +1,116 @@
+import os
+import time
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+import pyarrow
+import pyarrow.compute as pc
+from src.data_transformation.coordinate_validation import validate_coordinates
+from src.data_transformation.data_transformation import clean_validate_data
+
+
+class TestCoordinateValidation(unittest.TestCase):
+    """This test file tests the GPS coordinates
+    validation of data transformation.
+
+    test_rejection_counts() checks every rule
+    and that a row only counts for the first
+    rule it fails.
+
+    test_clean_validate_data() checks the
+    valid rows are kept and the rejections
+    are counted for the caller, not printed.
+
+    test_benchmark() validates
+    VALIDATION_BENCHMARK_ROWS rows (1M by
+    default) and checks 10M rows would take
+    less than 30 seconds.
+    """
+
+    def test_rejection_counts(self):
+        coords = pd.Series(
+            [
+                "41.38,2.17",
+                " 41.40 , 2.10 ",
+                "41.38 N, 2.17 E",
+                None,
+                "somewhere",
+                "91.0,2.17",
+                "41.38,-180.5",
+                "40.0,3.0",
+                "95.0,200.0",
+            ]
+        )
+
+        latitude, longitude, valid, rejections = validate_coordinates(coords)
+
+        self.assertEqual(latitude.dtype, np.float32)
+        self.assertEqual(
+            list(valid), [True, True, True, False, False, False, False, True, False]
+        )
+        self.assertEqual(
+            rejections,
+            {
+                "missing": 1,
+                "format": 1,
+                "latitude_range": 2,
+                "longitude_range": 1,
+                "bounding_box": 0,
+            },
+        )
+        np.testing.assert_allclose(longitude[:3], [2.17, 2.10, 2.17], rtol=1e-6)
+
+        _, _, valid, rejections = validate_coordinates(
+            coords, {"north": 41.5, "south": 41.2, "west": 2.0, "east": 2.2}
+        )
+        self.assertEqual(int(valid.sum()), 3)
+        self.assertEqual(rejections["bounding_box"], 1)
+
+    def test_clean_validate_data(self):
+        dataframe = pd.DataFrame(
+            {"vehicle_id": [1, 2, 3], "gps_coordinates": ["41.38,2.17", "x", None]}
+        )
+
+        cleaned = clean_validate_data(dataframe)
+
+        self.assertEqual(list(cleaned["vehicle_id"]), [1])
+        self.assertEqual(list(cleaned.columns), list(dataframe.columns))
+
+        # Counts of every chunk add up, nothing is printed
+        rejections = {}
+        with mock.patch("builtins.print") as printed:
+            clean_validate_data(dataframe, rejections=rejections)
+            clean_validate_data(dataframe, rejections=rejections)
+
+        printed.assert_not_called()
+        self.assertEqual(rejections["missing"], 2)
+        self.assertEqual(rejections["format"], 2)
+
+    def test_benchmark(self):
+        rows = int(os.environ.get("VALIDATION_BENCHMARK_ROWS", 1_000_000))
+        rng = np.random.default_rng(0)
+
+        coords = pd.Series(
+            pc.binary_join_element_wise(
+                pc.cast(pyarrow.array(rng.uniform(-95, 95, rows).round(6)), "string"),
+                pc.cast(pyarrow.array(rng.uniform(-185, 185, rows).round(6)), "string"),
+                ",",
+            ).to_pandas()
+        )
+
+        started = time.perf_counter()
+        _, _, valid, rejections = validate_coordinates(coords)
+        seconds = time.perf_counter() - started
+
+        print(
+            f"\n{rows} rows validated in {seconds:.2f}s"
+            f" ({seconds / rows * 1e7:.1f}s per 10M rows): {rejections}"
+        )
+
+        self.assertEqual(int(valid.sum()) + sum(rejections.values()), rows)
+        self.assertLess(seconds / rows * 1e7, 30)
+
+
+if __name__ == "__main__":
+    unittest.main()
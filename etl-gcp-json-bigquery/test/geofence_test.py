@@ -0,0 +1,194 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+import numpy as np
+import pandas as pd
+from src.data_ingestion.data_ingestion import clean_validate_data
+from src.data_ingestion.geofence import Geofence
+
+SQUARE = [(0.0, 0.0), (0.0, 1.0), (1.0, 1.0), (1.0, 0.0)]
+# A "U": the notch between the two arms is outside
+U_SHAPE = [(0, 0), (3, 0), (3, 1), (1, 1), (1, 2), (3, 2), (3, 3), (0, 3)]
+HOLE = [(0.25, 0.25), (0.25, 0.75), (0.75, 0.75), (0.75, 0.25)]
+
+
+def naive_contains(ring, latitude, longitude):
+    """Ray casting one edge and one point at a time, the reference"""
+    inside = []
+    for y, x in zip(latitude, longitude):
+        crossings = False
+        for (y1, x1), (y2, x2) in zip(ring, ring[1:] + ring[:1]):
+            if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+                crossings = not crossings
+        inside.append(crossings)
+    return np.array(inside)
+
+
+class TestGeofence(unittest.TestCase):
+    """This test file tests the polygon geofence
+    of data ingestion.
+
+    test_polygons() checks a square, a concave
+    polygon, a hole and missing coordinates.
+
+    test_naive() checks random points against
+    ray casting one point at a time.
+
+    test_modes() checks "exclude", "include"
+    and "tag" and the zone_id column.
+
+    test_from_geojson() checks Polygon and
+    MultiPolygon features in [lng, lat] order.
+
+    test_clean_validate_data() checks points
+    in Barcelona are dropped by default.
+
+    test_benchmark() locates
+    GEOFENCE_BENCHMARK_ROWS points (2M by
+    default) around 2 city polygons, within
+    their bounding boxes, and checks they run
+    at over 1M points per second.
+    """
+
+    def test_polygons(self):
+        geofence = Geofence({"square": [SQUARE], "u": [U_SHAPE]})
+        zones = geofence.zone_id(
+            [0.5, 2.0, 1.5, 2.5, np.nan, 5.0],
+            [0.5, 1.5, 0.5, 2.5, 0.5, 5.0],
+        )
+        self.assertEqual(list(zones), ["square", None, "u", "u", None, None])
+
+        with_hole = Geofence({"frame": [SQUARE, HOLE]})
+        self.assertEqual(list(with_hole.locate([0.5, 0.1], [0.5, 0.1])), [-1, 0])
+
+        with self.assertRaises(ValueError):
+            Geofence({})
+        with self.assertRaises(ValueError):
+            Geofence({"line": [[(0, 0), (1, 1)]]})
+
+    def test_naive(self):
+        rng = np.random.default_rng(0)
+        angles = np.linspace(0, 2 * np.pi, 50, endpoint=False)
+        radius = 1 + 0.5 * np.sin(5 * angles)
+        star = list(zip(radius * np.sin(angles), radius * np.cos(angles)))
+
+        latitude = rng.uniform(-2, 2, 5_000)
+        longitude = rng.uniform(-2, 2, 5_000)
+
+        inside = Geofence({"star": [star]}).locate(latitude, longitude) == 0
+
+        np.testing.assert_array_equal(inside, naive_contains(star, latitude, longitude))
+
+    def test_modes(self):
+        geofence = Geofence({"square": [SQUARE]})
+        df = pd.DataFrame(
+            {
+                "latitude": [0.5, 2.0, 0.2],
+                "longitude": [0.5, 2.0, 0.8],
+                "row": [0, 1, 2],
+            }
+        )
+
+        self.assertEqual(list(geofence.filter(df)["row"]), [1])
+        self.assertNotIn("zone_id", geofence.filter(df).columns)
+
+        included = geofence.filter(df, "include")
+        self.assertEqual(list(included["row"]), [0, 2])
+        self.assertEqual(list(included["zone_id"]), ["square", "square"])
+
+        tagged = geofence.filter(df, "tag")
+        self.assertEqual(list(tagged["zone_id"].isna()), [False, True, False])
+        self.assertEqual(tagged["zone_id"][0], "square")
+
+        with self.assertRaises(ValueError):
+            geofence.filter(df, "drop")
+
+    def test_from_geojson(self):
+        features = [
+            {
+                "type": "Feature",
+                "properties": {"zone_id": "square"},
+                "geometry": {
+                    "type": "Polygon",
+                    "coordinates": [[[x, y] for y, x in SQUARE + SQUARE[:1]]],
+                },
+            },
+            {
+                "type": "Feature",
+                "id": "islands",
+                "geometry": {
+                    "type": "MultiPolygon",
+                    "coordinates": [
+                        [[[10, 0], [11, 0], [11, 1]]],
+                        [[[20, 0], [21, 0], [21, 1]]],
+                    ],
+                },
+            },
+            {"type": "Feature", "geometry": {"type": "Point", "coordinates": [0, 0]}},
+        ]
+
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "zones.geojson")
+            with open(path, "w", encoding="utf-8") as file:
+                json.dump({"type": "FeatureCollection", "features": features}, file)
+
+            geofence = Geofence.from_geojson(path)
+
+        self.assertEqual(geofence.zone_ids, ["square", "islands"])
+        # (latitude, longitude): x of GeoJSON is the longitude
+        self.assertEqual(
+            list(geofence.zone_id([0.5, 0.2, 0.2, 0.2], [0.5, 10.8, 20.8, 15.0])),
+            ["square", "islands", "islands", None],
+        )
+
+    def test_clean_validate_data(self):
+        df = pd.DataFrame(
+            {
+                "vehicle_id": [1, 2, 3],
+                "latitude": ["41.38,2.17", "40.42,-3.70", "41.38 N, 2.17 E"],
+                "longitude": ["41.38,2.17", "40.42,-3.70", "41.38 N, 2.17 E"],
+            }
+        )
+
+        self.assertEqual(list(clean_validate_data(df.copy())["vehicle_id"]), [2])
+
+        tagged = clean_validate_data(df.copy(), mode="tag")
+        self.assertEqual(list(tagged["zone_id"].isna()), [False, True, False])
+        self.assertEqual(tagged["zone_id"].iloc[0], "barcelona")
+
+    def test_benchmark(self):
+        rows = int(os.environ.get("GEOFENCE_BENCHMARK_ROWS", 2_000_000))
+        rng = np.random.default_rng(0)
+
+        # Two 200-vertex city outlines, the points spread over their bounding
+        # boxes so none is rejected before ray casting
+        angles = np.linspace(0, 2 * np.pi, 200, endpoint=False)
+        radius = 0.1 * (1 + 0.3 * np.sin(7 * angles))
+        zones = {
+            city: [
+                list(zip(lat + radius * np.sin(angles), lng + radius * np.cos(angles)))
+            ]
+            for city, lat, lng in [("barcelona", 41.39, 2.17), ("madrid", 40.42, -3.70)]
+        }
+        geofence = Geofence(zones)
+
+        city = rng.integers(0, 2, rows)
+        latitude = np.where(city, 41.39, 40.42) + rng.uniform(-0.13, 0.13, rows)
+        longitude = np.where(city, 2.17, -3.70) + rng.uniform(-0.13, 0.13, rows)
+
+        started = time.perf_counter()
+        located = geofence.locate(latitude, longitude)
+        seconds = time.perf_counter() - started
+
+        print(
+            f"\n{rows} points located in {seconds:.2f}s"
+            f" ({rows / seconds / 1e6:.1f}M points/s), {int((located >= 0).sum())} inside"
+        )
+
+        self.assertGreater(rows / seconds, 1_000_000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+import json
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+import pyarrow
+from src.data_ingestion.data_ingestion import ingest_raw_data
+from src.data_transformation.data_transformation import transform_file
+from src.intermediate_files import ChunkWriter, iter_chunks, read_table
+
+
+class TestIntermediateFiles(unittest.TestCase):
+    """This test file tests the files handed
+    over between the pipeline stages.
+
+    test_round_trip() checks every format gives
+    back the rows and dtypes that were written.
+
+    test_schema_drift() checks chunks whose
+    types drift, None then strings or ints then
+    floats, widen the schema of the file.
+
+    test_arrow_is_memory_mapped() checks reading
+    an uncompressed Arrow file allocates nothing.
+
+    test_pipeline() runs ingestion and
+    transformation through each format.
+    """
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.dataframe = pd.DataFrame(
+            {
+                "vehicle_id": np.arange(1_000) % 7,
+                "latitude": np.linspace(41.21, 41.49, 1_000),
+                "created_at": pd.date_range("2023-01-01", periods=1_000, freq="min"),
+            }
+        )
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def _path(self, name):
+        return os.path.join(self.folder.name, name)
+
+    def test_round_trip(self):
+        for extension in ["parquet", "arrow", "feather"]:
+            path = self._path(f"file.{extension}")
+
+            with ChunkWriter(path) as writer:
+                writer.write(self.dataframe.iloc[:600])
+                writer.write(self.dataframe.iloc[:0])
+                writer.write(self.dataframe.iloc[600:])
+
+            self.assertEqual(writer.rows, 1_000)
+
+            chunks = list(iter_chunks(path, chunk_size=250))
+            self.assertTrue(all(len(chunk) <= 250 for chunk in chunks))
+            pd.testing.assert_frame_equal(
+                pd.concat(chunks, ignore_index=True), self.dataframe, check_dtype=False
+            )
+            self.assertEqual(chunks[0]["latitude"].dtype, np.float64)
+            self.assertEqual(read_table(path).num_rows, 1_000)
+
+        path = self._path("file.json")
+        with ChunkWriter(path) as writer:
+            writer.write(self.dataframe[["vehicle_id", "latitude"]])
+        self.assertEqual(sum(len(chunk) for chunk in iter_chunks(path)), 1_000)
+
+        with self.assertRaises(ValueError):
+            ChunkWriter(self._path("file.csv"))
+
+    def test_empty_file(self):
+        path = self._path("empty.parquet")
+
+        with ChunkWriter(path) as writer:
+            writer.write(self.dataframe.iloc[:0])
+
+        self.assertEqual(list(iter_chunks(path)), [])
+        self.assertEqual(read_table(path).num_rows, 0)
+
+    def test_schema_drift(self):
+        chunks = [
+            pd.DataFrame({"vehicle_id": [1, 2], "zone_id": [None, None]}),
+            pd.DataFrame({"vehicle_id": [1.5, np.nan], "zone_id": ["bcn", None]}),
+            pd.DataFrame({"vehicle_id": [3]}),
+        ]
+
+        for extension in ["parquet", "arrow"]:
+            path = self._path(f"drift.{extension}")
+
+            with ChunkWriter(path) as writer:
+                for chunk in chunks:
+                    writer.write(chunk)
+
+            table = read_table(path)
+            self.assertEqual(table.schema.field("vehicle_id").type, pyarrow.float64())
+            self.assertEqual(
+                table.column("vehicle_id").to_pylist(), [1.0, 2.0, 1.5, None, 3.0]
+            )
+            self.assertEqual(
+                table.column("zone_id").to_pylist(), [None, None, "bcn", None, None]
+            )
+
+        # The file rewritten when the schema widened is gone
+        self.assertEqual(
+            sorted(os.listdir(self.folder.name)), ["drift.arrow", "drift.parquet"]
+        )
+
+    def test_arrow_is_memory_mapped(self):
+        path = self._path("file.arrow")
+
+        with ChunkWriter(path) as writer:
+            writer.write(self.dataframe)
+
+        allocated = pyarrow.total_allocated_bytes()
+        table = read_table(path)
+
+        self.assertEqual(table.num_rows, 1_000)
+        self.assertEqual(pyarrow.total_allocated_bytes(), allocated)
+
+    def test_pipeline(self):
+        raw_data_file = self._path("raw.json")
+        with open(raw_data_file, "w", encoding="utf-8") as file:
+            for i in range(100):
+                record = {
+                    "vehicle_id": i % 3,
+                    "year": 2022,
+                    "distance_traveled": 10.0,
+                    "latitude": "40.4,-3.7",
+                    "longitude": "40.4,-3.7",
+                    "gps_coordinates": "40.4,-3.7",
+                }
+                file.write(json.dumps(record) + "\n")
+
+        for extension in ["parquet", "arrow", "json"]:
+            intermediate_data_file = self._path(f"intermediate.{extension}")
+            processed_data_file = self._path(f"processed.{extension}")
+
+            self.assertEqual(
+                ingest_raw_data(raw_data_file, intermediate_data_file, chunk_size=30),
+                100,
+            )
+            self.assertEqual(
+                next(iter_chunks(intermediate_data_file))["latitude"].dtype,
+                np.float64,
+            )
+            self.assertEqual(
+                transform_file(intermediate_data_file, processed_data_file, 30), 3
+            )
+            processed = next(iter_chunks(processed_data_file))
+            np.testing.assert_allclose(
+                processed["distance_traveled"],
+                np.array([340.0, 330.0, 330.0]) * 0.621371,
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
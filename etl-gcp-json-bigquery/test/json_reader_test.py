@@ -0,0 +1,153 @@
+import json
+import os
+import tempfile
+import tracemalloc
+import unittest
+import pandas as pd
+from src.data_ingestion.json_reader import iter_chunks, iter_records, write_chunk
+from src.data_transformation.data_transformation import process_data_chunks
+
+
+class TestJsonReader(unittest.TestCase):
+    """This test file tests the streaming JSON
+    reader used between the pipeline stages.
+
+    test_layouts() checks line-delimited JSON,
+    JSON arrays and {"data": [...]} files give
+    the same records, whatever the block size.
+
+    test_wrapped_object() checks the records
+    array is found after other members, and
+    objects without it are read as records.
+
+    test_memory_is_flat() checks the peak memory
+    of reading a file in chunks does not grow
+    with the size of the file.
+    """
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def _write(self, name, text):
+        path = os.path.join(self.folder.name, name)
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(text)
+        return path
+
+    def _records(self, rows):
+        return [
+            {
+                "vehicle_id": i % 7,
+                "year": 2020 + i % 3,
+                "distance_traveled": i * 1.5,
+                "gps_coordinates": "41.38,2.17",
+                "tags": ["a", {"b": [1, 2]}],
+            }
+            for i in range(rows)
+        ]
+
+    def test_layouts(self):
+        records = self._records(25)
+
+        paths = [
+            self._write("lines.json", "\n".join(json.dumps(r) for r in records)),
+            self._write("array.json", json.dumps(records, indent=4)),
+            self._write("wrapped.json", json.dumps({"data": records}, indent=4)),
+            self._write("empty.json", "[ ]"),
+        ]
+
+        for path in paths[:3]:
+            for block_size in [1, 5, 64, 1024**2]:
+                self.assertEqual(
+                    list(iter_records(path, "data", block_size=block_size)), records
+                )
+
+        self.assertEqual(list(iter_records(paths[3])), [])
+        self.assertEqual(
+            [len(chunk) for chunk in iter_chunks(paths[0], chunk_size=10)],
+            [10, 10, 5],
+        )
+
+    def test_wrapped_object(self):
+        records = self._records(25)
+        meta = {"data": {"data": [1]}, "source": "fleet", "count": 25}
+
+        wrapped = self._write(
+            "wrapped.json",
+            json.dumps({"meta": meta, "data": records, "next": None}, indent=4),
+        )
+        lines = [{"vehicle_id": 1, "data": "a"}, {}, {"data": 2}]
+        unwrapped = self._write("lines.json", "\n".join(json.dumps(r) for r in lines))
+
+        for block_size in [1, 5, 64, 1024**2]:
+            self.assertEqual(
+                list(iter_records(wrapped, "data", block_size=block_size)), records
+            )
+            self.assertEqual(
+                list(iter_records(unwrapped, "data", block_size=block_size)), lines
+            )
+
+        broken = self._write("broken.json", '{"meta": 1 "data": []}')
+        with self.assertRaises(ValueError):
+            list(iter_records(broken, "data"))
+
+    def test_write_chunk(self):
+        path = os.path.join(self.folder.name, "out.json")
+        records = self._records(5)
+
+        with open(path, "w", encoding="utf-8") as file:
+            write_chunk(file, pd.DataFrame(records[:3]))
+            write_chunk(file, pd.DataFrame(columns=["vehicle_id"]))
+            write_chunk(file, pd.DataFrame(records[3:]))
+
+        self.assertEqual(list(iter_records(path)), records)
+
+    def test_process_data_chunks(self):
+        dataframe = pd.DataFrame(self._records(100))
+
+        chunks = (dataframe.iloc[i : i + 30] for i in range(0, 100, 30))
+        streamed = process_data_chunks(chunks)
+
+        expected = (
+            dataframe.groupby(["vehicle_id", "year"])["distance_traveled"]
+            .sum()
+            .reset_index()
+        )
+        expected["distance_traveled"] *= 0.621371
+
+        pd.testing.assert_frame_equal(
+            streamed.reset_index(drop=True), expected, check_dtype=False
+        )
+
+    def test_memory_is_flat(self):
+        def _peak(rows):
+            path = self._write(
+                f"lines{rows}.json",
+                "\n".join(json.dumps(r) for r in self._records(rows)),
+            )
+
+            tracemalloc.start()
+            for chunk in iter_chunks(path, chunk_size=1_000):
+                del chunk
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            return peak, os.path.getsize(path)
+
+        small_peak, small_size = _peak(40_000)
+        large_peak, large_size = _peak(160_000)
+
+        print(
+            f"\npeak {small_peak / 1024**2:.1f} MiB for {small_size / 1024**2:.1f} MiB,"
+            f" {large_peak / 1024**2:.1f} MiB for {large_size / 1024**2:.1f} MiB"
+        )
+
+        self.assertLess(large_peak, small_peak * 1.5)
+        self.assertLess(large_peak, large_size)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,192 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+from config import config
+from run_etl import process_files, run_etl
+from src.manifest import Manifest
+
+
+class TestManifest(unittest.TestCase):
+    """This test file tests the manifest of
+    raw files already through the pipeline.
+
+    test_changes() checks a file is done again
+    only if its content changes.
+
+    test_resume() checks a failed file starts
+    again at the failed stage, alone.
+
+    test_load_once() checks files are loaded
+    to BigQuery once, and a file changed since
+    it was loaded is not appended again.
+
+    test_load_errors() checks rows rejected
+    by BigQuery fail the run.
+    """
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.saved = config.__dict__.copy()
+
+        for name in ["raw", "intermediate", "processed"]:
+            os.makedirs(os.path.join(self.folder.name, name))
+        config.intermediate_data_folder = os.path.join(self.folder.name, "intermediate")
+        config.processed_data_folder = os.path.join(self.folder.name, "processed")
+        config.manifest_file = os.path.join(self.folder.name, "manifest.json")
+        config.raw_data_files = os.path.join(self.folder.name, "raw")
+
+        self.raw_data_files = [self._write(i, 50) for i in range(3)]
+        self.manifest = Manifest(config.manifest_file)
+
+    def tearDown(self):
+        config.__dict__.update(self.saved)
+        self.folder.cleanup()
+
+    def _write(self, index, rows):
+        path = os.path.join(self.folder.name, "raw", f"raw_data_file{index}.json")
+        with open(path, "w", encoding="utf-8") as file:
+            for i in range(rows):
+                record = {
+                    "vehicle_id": i % 4,
+                    "year": 2022,
+                    "distance_traveled": 1.0,
+                    "latitude": "40.4,-3.7",
+                    "longitude": "40.4,-3.7",
+                    "gps_coordinates": "40.4,-3.7",
+                }
+                file.write(json.dumps(record) + "\n")
+        return path
+
+    def _processed(self, results):
+        return [
+            os.path.basename(result["raw_data_file"])
+            for result in results
+            if result["stages"]
+        ]
+
+    def test_changes(self):
+        path = self.raw_data_files[0]
+        self.assertEqual(self.manifest.stages(path), {})
+
+        self.manifest.record(path, "ingested", path, 50)
+        self.assertEqual(
+            Manifest(config.manifest_file).stages(path),
+            {"ingested": {"file": path, "rows": 50}},
+        )
+
+        # Same content, newer mtime
+        os.utime(path, ns=(0, 10**18))
+        self.assertIn("ingested", self.manifest.stages(path))
+
+        self._write(0, 51)
+        self.assertEqual(self.manifest.stages(path), {})
+
+        with self.assertRaises(ValueError):
+            self.manifest.record(path, "copied", path, 0)
+
+    def test_incremental(self):
+        results = process_files(config.raw_data_files, 1, self.manifest)
+        self.assertEqual(len(self._processed(results)), 3)
+
+        results = process_files(config.raw_data_files, 1, self.manifest)
+        self.assertEqual(self._processed(results), [])
+        self.assertEqual(len(results), 3)
+
+        self._write(1, 60)
+        self._write(3, 10)
+        results = process_files(config.raw_data_files, 2, self.manifest)
+        self.assertEqual(
+            self._processed(results), ["raw_data_file1.json", "raw_data_file3.json"]
+        )
+        self.assertEqual(results[1]["rows"], 60)
+
+    def test_resume(self):
+        with mock.patch(
+            "src.data_transformation.data_transformation.transform_file",
+            side_effect=OSError("disk full"),
+        ):
+            results = process_files(config.raw_data_files, 1, self.manifest)
+
+        self.assertEqual(
+            [result["error"] for result in results], ["OSError: disk full"] * 3
+        )
+        self.assertEqual(
+            list(self.manifest.stages(self.raw_data_files[0])), ["ingested"]
+        )
+
+        # Ingestion is not run again
+        with mock.patch(
+            "src.data_ingestion.data_ingestion.ingest_raw_data",
+            side_effect=AssertionError,
+        ):
+            results = process_files(config.raw_data_files, 1, self.manifest)
+
+        self.assertEqual([result["error"] for result in results], [None] * 3)
+        self.assertEqual(
+            [result["stages"] for result in results], [{"transformed": 4}] * 3
+        )
+
+        # A deleted intermediate file is not needed any more
+        os.remove(self.manifest.stages(self.raw_data_files[0])["ingested"]["file"])
+        self.assertIn("transformed", self.manifest.stages(self.raw_data_files[0]))
+
+        # A deleted processed file is needed to load
+        os.remove(self.manifest.stages(self.raw_data_files[0])["transformed"]["file"])
+        self.assertEqual(self.manifest.stages(self.raw_data_files[0]), {})
+
+    def test_load_once(self):
+        config.workers = 1
+
+        with mock.patch(
+            "src.data_loading.data_loading.load_data_to_bigquery",
+            return_value={"errors": []},
+        ) as load:
+            run_etl()
+            run_etl()
+
+            # Appending a changed file would duplicate the rows of its old content
+            self._write(2, 20)
+            with self.assertRaises(RuntimeError):
+                run_etl()
+            self.assertIsNotNone(
+                Manifest(config.manifest_file).replaces(self.raw_data_files[2])
+            )
+
+            # A truncating load replaces every file
+            config.bigquery_write_disposition = "WRITE_TRUNCATE"
+            run_etl()
+
+        self.assertEqual([len(call.args) for call in load.call_args_list], [3, 3])
+        self.assertIsNone(
+            Manifest(config.manifest_file).replaces(self.raw_data_files[2])
+        )
+        self.assertEqual(
+            Manifest(config.manifest_file).stages(self.raw_data_files[2])["loaded"][
+                "rows"
+            ],
+            4,
+        )
+
+    def test_load_errors(self):
+        config.workers = 1
+
+        # Rows rejected by insert_rows fail the run and are loaded again
+        with mock.patch(
+            "src.data_loading.data_loading.load_data_to_bigquery",
+            return_value={"errors": [{"index": 0, "errors": ["invalid"]}]},
+        ) as load:
+            with self.assertRaises(RuntimeError):
+                run_etl()
+            with self.assertRaises(RuntimeError):
+                run_etl()
+
+        self.assertEqual([len(call.args) for call in load.call_args_list], [3, 3])
+        self.assertNotIn(
+            "loaded", Manifest(config.manifest_file).stages(self.raw_data_files[0])
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import json
+import os
+import tempfile
+import unittest
+import pandas as pd
+from config import config
+from run_etl import process_files, resolve_raw_data_files
+from src.intermediate_files import iter_chunks
+
+
+class TestRunEtl(unittest.TestCase):
+    """This test file tests running ingestion
+    and transformation over many raw files.
+
+    test_resolve() checks directories, glob
+    patterns and lists of files are expanded.
+
+    test_workers() checks a process pool gives
+    the same files as a single process.
+    """
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.raw_data_folder = os.path.join(self.folder.name, "raw")
+        os.makedirs(self.raw_data_folder)
+
+        for file_index in range(4):
+            path = os.path.join(self.raw_data_folder, f"raw_data_file{file_index}.json")
+            with open(path, "w", encoding="utf-8") as file:
+                for i in range(200):
+                    record = {
+                        "vehicle_id": (i + file_index) % 5,
+                        "year": 2022,
+                        "distance_traveled": float(i),
+                        "latitude": "40.4,-3.7",
+                        "longitude": "40.4,-3.7",
+                        "gps_coordinates": "40.4,-3.7",
+                    }
+                    file.write(json.dumps(record) + "\n")
+
+        self.saved = config.__dict__.copy()
+
+    def tearDown(self):
+        config.__dict__.update(self.saved)
+        self.folder.cleanup()
+
+    def _stage_folders(self, name):
+        config.intermediate_data_folder = os.path.join(self.folder.name, name, "i")
+        config.processed_data_folder = os.path.join(self.folder.name, name, "p")
+        os.makedirs(config.intermediate_data_folder)
+        os.makedirs(config.processed_data_folder)
+
+    def test_resolve(self):
+        files = resolve_raw_data_files(self.raw_data_folder)
+
+        self.assertEqual(
+            [os.path.basename(f) for f in files][:2],
+            ["raw_data_file0.json", "raw_data_file1.json"],
+        )
+        self.assertEqual(
+            resolve_raw_data_files(os.path.join(self.raw_data_folder, "*[23].json")),
+            files[2:],
+        )
+        self.assertEqual(
+            resolve_raw_data_files([files[1], files[0], files[1]]), files[:2]
+        )
+
+        with self.assertRaises(FileNotFoundError):
+            resolve_raw_data_files(os.path.join(self.raw_data_folder, "*.csv"))
+
+    def test_workers(self):
+        outputs = {}
+
+        for workers in [1, 3]:
+            self._stage_folders(f"workers{workers}")
+            results = process_files(self.raw_data_folder, workers)
+
+            self.assertEqual([result["rows"] for result in results], [200] * 4)
+            self.assertEqual(
+                os.path.basename(results[0]["processed_data_file"]),
+                "processed_data_file0.parquet",
+            )
+            outputs[workers] = [
+                pd.concat(iter_chunks(result["processed_data_file"]))
+                for result in results
+            ]
+
+        for single, parallel in zip(outputs[1], outputs[3]):
+            pd.testing.assert_frame_equal(single, parallel)
+
+
+if __name__ == "__main__":
+    unittest.main()